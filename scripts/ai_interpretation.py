@@ -0,0 +1,252 @@
+"""
+AI Interpretation Service
+Generates the forex insights interpretations with one model request per
+dataset (all sections batched), cached on disk by prompt template plus a hash
+of the input metrics, behind a pluggable backend with a deterministic stub
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+
+# Per-section prompts for the forex reserves insights page
+SECTION_PROMPTS = {
+    "kpis": "Analyze forex reserves KPIs: latest value, weekly change %, yearly change %. Provide 3-4 line economic interpretation focusing on RBI policy and market conditions.",
+    "composition": "Analyze forex reserves composition: FCA %, Gold %, SDRs %, IMF position %. Explain diversification strategy and economic implications in 3-4 lines.",
+    "import_cover": "Analyze import cover ratio (months). Explain adequacy against IMF standards and economic resilience in 3-4 lines.",
+    "volatility": "Analyze weekly volatility patterns in forex reserves. Explain RBI intervention strategy and market dynamics in 3-4 lines.",
+    "comparison": "Analyze relationship between forex reserves and USD/INR exchange rate. Explain correlation and policy implications in 3-4 lines."
+}
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '.state', 'interpretations.db')
+
+# Same lifetime as the in-memory cache in api/interpret.ts
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_ENTRIES = 5000
+
+# Metrics are rounded before hashing so float noise doesn't defeat the cache
+METRIC_PRECISION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interpretations (
+  cache_key TEXT PRIMARY KEY,
+  section TEXT NOT NULL,
+  text TEXT NOT NULL,
+  created_at REAL NOT NULL,
+  accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interpretations_accessed ON interpretations (accessed_at);
+"""
+
+
+def normalise_metrics(value, precision=METRIC_PRECISION):
+    """Round floats (recursively) so equal-looking inputs hash the same"""
+    if isinstance(value, float):
+        return round(value, precision)
+    if isinstance(value, dict):
+        return {str(k): normalise_metrics(v, precision) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalise_metrics(v, precision) for v in value]
+    return value
+
+
+def metrics_json(metrics, precision=METRIC_PRECISION):
+    return json.dumps(normalise_metrics(metrics, precision), sort_keys=True, separators=(',', ':'), default=str)
+
+
+def cache_key(template, metrics, precision=METRIC_PRECISION):
+    """Key an interpretation by its prompt template and its input metrics"""
+    payload = f"{template}\x00{metrics_json(metrics, precision)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def section_prompt(section, metrics, templates=SECTION_PROMPTS):
+    return f"{templates[section]}\n\nData: {metrics_json(metrics)}"
+
+
+class InterpretationCache:
+    """SQLite-backed interpretations with a TTL and LRU eviction by entry count"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def get_many(self, keys):
+        """{key: text} for keys cached within the TTL"""
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                f"SELECT cache_key, text FROM interpretations "
+                f"WHERE cache_key IN ({placeholders}) AND created_at > ?",
+                (*keys, now - self.ttl),
+            ).fetchall()
+            self.conn.executemany('UPDATE interpretations SET accessed_at = ? WHERE cache_key = ?',
+                                  [(now, key) for key, _ in rows])
+        return dict(rows)
+
+    def put_many(self, entries):
+        """Store [(key, section, text)] and evict the least recently used overflow"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                """INSERT OR REPLACE INTO interpretations (cache_key, section, text, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                [(key, section, text, now, now) for key, section, text in entries],
+            )
+            self.conn.execute('DELETE FROM interpretations WHERE created_at <= ?', (now - self.ttl,))
+            self.conn.execute(
+                """DELETE FROM interpretations WHERE cache_key IN (
+                     SELECT cache_key FROM interpretations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class StubBackend:
+    """Deterministic local stand-in: same prompts in, same text out, no network"""
+
+    name = 'stub'
+
+    def generate_batch(self, prompts):
+        results = {}
+        for section, prompt in prompts.items():
+            digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+            data = prompt.split('Data: ', 1)[-1]
+            results[section] = f"[{section} interpretation {digest}] Based on {data}."
+        return results
+
+
+class GeminiBackend:
+    """Google Gemini REST API, asked for every section in one request"""
+
+    name = 'gemini'
+    URL = 'https://generativelanguage.googleapis.com/v1/models/{model}:generateContent'
+
+    def __init__(self, api_key=None, model='gemini-1.0-pro', temperature=0.7,
+                 max_output_tokens=1024, timeout=60):
+        self.api_key = api_key or os.environ.get('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("Missing GEMINI_API_KEY environment variable")
+        self.model = model
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def batch_prompt(self, prompts):
+        sections = '\n\n'.join(f"[{section}]\n{prompt}" for section, prompt in prompts.items())
+        return (
+            "Answer each of the following sections. Reply with only a JSON object "
+            f"whose keys are exactly {json.dumps(list(prompts))} and whose values are "
+            f"the interpretation text for that section.\n\n{sections}"
+        )
+
+    def generate_batch(self, prompts):
+        response = self.session.post(
+            self.URL.format(model=self.model),
+            params={'key': self.api_key},
+            json={
+                'contents': [{'parts': [{'text': self.batch_prompt(prompts)}]}],
+                'generationConfig': {
+                    'temperature': self.temperature,
+                    # Room for every section in one answer
+                    'maxOutputTokens': self.max_output_tokens,
+                },
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        text = response.json()['candidates'][0]['content']['parts'][0]['text']
+        # Models often wrap JSON in a ```json fence
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+        answers = json.loads(text)
+        return {section: str(answers[section]).strip() for section in prompts if section in answers}
+
+
+BACKENDS = {'stub': StubBackend, 'gemini': GeminiBackend}
+
+
+class InterpretationService:
+    """Cache-first interpretations; all misses for a dataset go to the backend together"""
+
+    def __init__(self, backend=None, cache=None, templates=SECTION_PROMPTS):
+        self.backend = backend or StubBackend()
+        self.cache = cache or InterpretationCache()
+        self.templates = templates
+        self.stats = {'hits': 0, 'misses': 0, 'backend_calls': 0}
+
+    def interpret(self, metrics_by_section):
+        """{section: metrics} -> {section: interpretation text}"""
+        keys = {
+            section: cache_key(self.templates[section], metrics)
+            for section, metrics in metrics_by_section.items()
+        }
+        cached = self.cache.get_many(list(keys.values()))
+        results = {section: cached[key] for section, key in keys.items() if key in cached}
+        self.stats['hits'] += len(results)
+
+        missing = {section: metrics for section, metrics in metrics_by_section.items() if section not in results}
+        if missing:
+            self.stats['misses'] += len(missing)
+            self.stats['backend_calls'] += 1
+            prompts = {section: section_prompt(section, metrics, self.templates)
+                       for section, metrics in missing.items()}
+            generated = self.backend.generate_batch(prompts)
+            self.cache.put_many([(keys[section], section, text) for section, text in generated.items()])
+            results.update(generated)
+        return results
+
+    def hit_ratio(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def summary(self):
+        return (f"{self.stats['hits']} hits / {self.stats['misses']} misses "
+                f"(hit ratio {self.hit_ratio():.1%}), {self.stats['backend_calls']} {self.backend.name} calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate cached forex insight interpretations')
+    parser.add_argument('metrics', help='JSON file of {section: metrics} for one dataset')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='stub')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH)
+    parser.add_argument('--ttl', type=int, default=DEFAULT_TTL, help='Seconds an interpretation stays valid')
+    parser.add_argument('--repeat', type=int, default=1, help='Run the same request N times (cache check)')
+    args = parser.parse_args()
+
+    with open(args.metrics) as f:
+        metrics_by_section = json.load(f)
+    unknown = set(metrics_by_section) - set(SECTION_PROMPTS)
+    if unknown:
+        parser.error(f"Unknown sections: {', '.join(sorted(unknown))}")
+
+    service = InterpretationService(BACKENDS[args.backend](), InterpretationCache(args.cache, args.ttl))
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        results = service.interpret(metrics_by_section)
+    elapsed = time.perf_counter() - start
+
+    for section, text in results.items():
+        print(f"\n{section.upper()}:\n  {text}")
+    print(f"\n{service.summary()} in {elapsed * 1000:.1f} ms")
+    service.cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+"""
+AMC Portfolio Holdings Collector
+Fetches every scheme's monthly holdings file on a bounded thread pool, parses
+them in separate processes, skips schemes whose file or holdings match the last
+run, and loads the rest with their sector / asset allocation, logging timings
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import requests
+
+from pg_loader import connect, stage_and_upsert
+from table_extraction import parse_numeric
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(__file__), '.state', 'amc_holdings.db')
+
+HOLDINGS_TABLE = 'amc_portfolio_holdings'
+SECTOR_TABLE = 'portfolio_sector_allocation'
+ASSET_TABLE = 'portfolio_asset_allocation'
+LOG_TABLE = 'amc_scraping_logs'
+
+HOLDING_COLUMNS = ['stock_name', 'isin', 'sector', 'holding_percent', 'quantity', 'market_value']
+
+# Header cell -> column, first matching rule wins ("Industry / Rating" is a sector, not a name)
+HEADER_RULES = [
+    ('scheme_code', ('scheme code',)),
+    ('as_of_date', ('as of date', 'as on date', 'portfolio date')),
+    ('isin', ('isin',)),
+    ('holding_percent', ('%', 'net assets', 'holding')),
+    ('market_value', ('market', 'fair value')),
+    ('quantity', ('quantity', 'qty', 'no. of shares')),
+    ('sector', ('industry', 'sector', 'rating')),
+    ('stock_name', ('name', 'instrument', 'security', 'issuer', 'stock')),
+]
+
+# Section headings in AMC monthly disclosures -> asset type of the rows beneath
+SECTION_ASSETS = [
+    ('Money Market', ('money market', 'treps', 'reverse repo', 'cblo', 'commercial paper', 'certificate of deposit')),
+    ('Debt', ('debt', 'bond', 'debenture', 'government securit', 'treasury', 'g-sec', 'sdl')),
+    ('Equity', ('equity', 'shares', 'reit', 'invit')),
+    ('Cash & Others', ('cash', 'net current', 'receivable', 'payable', 'margin')),
+]
+
+AS_OF_RE = re.compile(r'(?:as\s+on|as\s+of|as\s+at|portfolio\s+date)\s*[:\-]?\s*'
+                      r'(\d{1,2}[\s/\-.][A-Za-z]{3,9}[\s/\-.,]+\d{4}|\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4}|\d{4}-\d{2}-\d{2})',
+                      re.I)
+
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheme_holdings (
+  scheme_code TEXT PRIMARY KEY,
+  file_hash TEXT NOT NULL,
+  as_of_date TEXT NOT NULL,
+  holdings_hash TEXT NOT NULL,
+  rows INTEGER NOT NULL,
+  updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source_files (
+  source TEXT PRIMARY KEY,
+  file_hash TEXT NOT NULL,
+  schemes TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+"""
+
+
+def read_grid(name, content):
+    """Holdings file bytes -> grid of string cells (CSV, or Excel when openpyxl/xlrd is installed)"""
+    if name.lower().endswith(('.xlsx', '.xls')):
+        return pd.read_excel(io.BytesIO(content), header=None, dtype=str)
+    rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig', errors='replace'))))
+    width = max((len(r) for r in rows), default=0)
+    return pd.DataFrame([r + [''] * (width - len(r)) for r in rows])
+
+
+def header_columns(cells):
+    """{column index: field} for a header row, or None if it isn't one"""
+    fields = {}
+    for i, cell in enumerate(cells):
+        text = str(cell).strip().lower()
+        if not text or text == 'nan':
+            continue
+        for field, words in HEADER_RULES:
+            if field not in fields.values() and any(w in text for w in words):
+                fields[i] = field
+                break
+    has = set(fields.values())
+    return fields if {'stock_name', 'holding_percent'} <= has else None
+
+
+def section_asset(text):
+    lower = text.lower()
+    for asset, words in SECTION_ASSETS:
+        if any(w in lower for w in words):
+            return asset
+    return None
+
+
+def isin_asset(isin):
+    """Asset type from the ISIN when the file has no section headings"""
+    isin = isin.fillna('').str.upper()
+    # Security type digits 8-9 of an Indian ISIN: 01 = equity shares
+    return pd.Series(np.select(
+        [isin.str[7:9].eq('01') & isin.str.startswith('INE'), isin.str.startswith('IN')],
+        ['Equity', 'Debt'], 'Cash & Others'), index=isin.index)
+
+
+def parse_as_of(grid, header_row, default=None):
+    """Portfolio date from the preamble above the header ("Portfolio as on 30-Sep-2025")"""
+    for line in grid.iloc[:header_row].fillna('').astype(str).agg(' '.join, axis=1):
+        match = AS_OF_RE.search(line)
+        if match:
+            date = pd.to_datetime(match.group(1).replace(',', ' '), dayfirst=True, errors='coerce')
+            if not pd.isna(date):
+                return date.strftime('%Y-%m-%d')
+    return default
+
+
+def holdings_hash(holdings, as_of_date):
+    """Content hash of a parsed portfolio, independent of row order and file formatting"""
+    canonical = holdings[HOLDING_COLUMNS].sort_values(['stock_name', 'isin'], na_position='first')
+    canonical = canonical.round({'holding_percent': 4, 'quantity': 2, 'market_value': 2})
+    digest = hashlib.sha256(as_of_date.encode())
+    digest.update(pd.util.hash_pandas_object(canonical, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def parse_date(value):
+    """'2025-10-01' / '30-09-2025' / '30-Sep-2025' -> 'YYYY-MM-DD', or None"""
+    date = pd.to_datetime(value, dayfirst=not value[:4].isdigit(), errors='coerce') if value else None
+    return None if date is None or pd.isna(date) else date.strftime('%Y-%m-%d')
+
+
+def portfolio(scheme_code, as_of, holdings):
+    """One scheme's parsed holdings -> {holdings, sectors, assets, as_of_date, holdings_hash}"""
+    holdings = holdings.reset_index(drop=True)
+    # A name listed twice (e.g. across two sections) is one holding
+    if holdings['stock_name'].duplicated().any():
+        grouped = holdings.groupby('stock_name', sort=False)
+        holdings = grouped[['isin', 'sector', 'asset_type']].first().join(
+            grouped[['holding_percent', 'quantity', 'market_value']].sum(min_count=1)).reset_index()
+
+    sectors = (holdings.assign(sector=holdings['sector'].fillna('Others'))
+               .groupby('sector', as_index=False)['holding_percent'].sum()
+               .rename(columns={'holding_percent': 'allocation_percent'}))
+    assets = (holdings.groupby('asset_type', as_index=False)['holding_percent'].sum()
+              .rename(columns={'holding_percent': 'allocation_percent'}))
+    return {
+        'scheme_code': scheme_code,
+        'as_of_date': as_of,
+        'holdings': holdings,
+        'sectors': sectors,
+        'assets': assets,
+        'holdings_hash': holdings_hash(holdings, as_of),
+    }
+
+
+def parse_holdings(scheme_code, name, content, default_as_of=None):
+    """A holdings file -> one portfolio() result per scheme and date in it
+
+    Runs in a worker process. AMC disclosures (a preamble, section headings and
+    subtotal rows) hold one scheme, `scheme_code`; the AMCDataAdmin portfolio
+    template has Scheme Code and As Of Date columns and may hold many
+    """
+    grid = read_grid(name, content).fillna('')
+    header_row, fields = next(((i, f) for i, f in
+                               ((i, header_columns(row)) for i, row in enumerate(grid.to_numpy()))
+                               if f), (None, None))
+    if header_row is None:
+        raise ValueError(f"{name}: no holdings header row (name and % columns) found")
+
+    body = grid.iloc[header_row + 1:, list(fields)].set_axis(list(fields.values()), axis=1)
+    body = body.apply(lambda col: col.astype(str).str.strip())
+    for col in HOLDING_COLUMNS + ['scheme_code', 'as_of_date']:
+        if col not in body:
+            body[col] = ''
+
+    percent = parse_numeric(body['holding_percent'].str.rstrip('%'))
+    names = body['stock_name']
+    # Rows with a name but no weight are section headings; their asset type applies below them
+    heading = names.ne('') & percent.isna()
+    sections = names.where(heading).map(section_asset, na_action='ignore').ffill()
+    keep = names.ne('') & percent.notna() & ~names.str.contains(r'\b(?:sub\s*)?total\b', case=False, regex=True)
+    rows = body[keep]
+
+    holdings = pd.DataFrame({
+        'stock_name': rows['stock_name'],
+        'isin': rows['isin'].replace('', None),
+        'sector': rows['sector'].replace('', None),
+        'holding_percent': percent[keep],
+        'quantity': parse_numeric(rows['quantity']),
+        'market_value': parse_numeric(rows['market_value']),
+    }).reset_index(drop=True)
+    holdings['asset_type'] = sections[keep].fillna(isin_asset(rows['isin'].replace('', None))).to_numpy() \
+        if sections[keep].notna().any() else isin_asset(holdings['isin']).to_numpy()
+
+    # Rows without a code or date of their own belong to the file's scheme and preamble date
+    dates = rows['as_of_date'].map({d: parse_date(d) for d in rows['as_of_date'].unique()})
+    if dates.isna().any():
+        file_as_of = parse_as_of(grid, header_row, default_as_of)
+        if file_as_of is None:
+            raise ValueError(f"{name}: no portfolio date in the file (pass --as-of)")
+        dates = dates.fillna(file_as_of)
+    codes = rows['scheme_code'].replace('', scheme_code)
+
+    if holdings.empty:
+        raise ValueError(f"{name}: no holdings rows found")
+    groups = holdings.groupby([codes.to_numpy(), dates.to_numpy()], sort=True)
+    return [portfolio(code, as_of, group) for (code, as_of), group in groups]
+
+
+class HoldingsState:
+    """Last holdings hash per scheme and last file hash per source, in SQLite"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(STATE_SCHEMA)
+
+    def stored(self):
+        rows = self.conn.execute('SELECT scheme_code, file_hash, as_of_date, holdings_hash FROM scheme_holdings')
+        return {code: (file_hash, as_of, h) for code, file_hash, as_of, h in rows}
+
+    def sources(self):
+        """{source: (file_hash, [scheme codes parsed from it])}"""
+        rows = self.conn.execute('SELECT source, file_hash, schemes FROM source_files')
+        return {source: (file_hash, json.loads(schemes)) for source, file_hash, schemes in rows}
+
+    def commit(self, results):
+        """Remember the results' hashes; a source file is remembered once all of its schemes are"""
+        now = datetime.now().isoformat(timespec='seconds')
+        committed = {r['scheme_code'] for r in results}
+        files = {r['source']: (r['file_hash'], r['source_schemes']) for r in results}
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO scheme_holdings VALUES (?, ?, ?, ?, ?, ?)',
+                [(r['scheme_code'], r['file_hash'], r['as_of_date'], r['holdings_hash'], len(r['holdings']), now)
+                 for r in results],
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO source_files VALUES (?, ?, ?, ?)',
+                [(source, file_hash, json.dumps(schemes), now)
+                 for source, (file_hash, schemes) in files.items() if committed.issuperset(schemes)],
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def timed_parse(source, name, content, file_hash, default_as_of=None):
+    """parse_holdings in a worker process; (results tagged with their source file, parse seconds)"""
+    start = time.perf_counter()
+    results = parse_holdings(source, name, content, default_as_of)
+    schemes = sorted({r['scheme_code'] for r in results})
+    for result in results:
+        result.update(source=source, file_hash=file_hash, source_schemes=schemes)
+    return results, time.perf_counter() - start
+
+
+_local = threading.local()
+
+
+def fetch_source(location, timeout=60):
+    """(file name, bytes) from a local path or an http(s) URL"""
+    if not location.startswith(('http://', 'https://')):
+        with open(location, 'rb') as f:
+            return os.path.basename(location), f.read()
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+        _local.session.headers.update(FETCH_HEADERS)
+    for attempt in range(3):
+        try:
+            response = _local.session.get(location, timeout=timeout)
+            response.raise_for_status()
+            return location.rsplit('/', 1)[-1].split('?')[0], response.content
+        except requests.RequestException:
+            if attempt == 2:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def collect(sources, state, workers=8, parse_workers=None, default_as_of=None):
+    """Fetch and parse every scheme; returns (changed results, unchanged results, skipped codes, failures, timings)
+
+    Downloads run on `workers` threads and each finished file goes straight to
+    the process pool, so parsing overlaps with the remaining downloads. Nothing
+    is written to the state: unchanged results (a re-published file with the
+    same portfolio) are returned for the caller to commit
+    """
+    stored, files = state.stored(), state.sources()
+    timings = {'fetch': 0.0, 'parse': 0.0}
+    changed, unchanged, skipped, failures = [], [], [], {}
+
+    def fetch(code, location):
+        start = time.perf_counter()
+        name, content = fetch_source(location)
+        return name, content, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as threads, \
+            ProcessPoolExecutor(max_workers=parse_workers) as processes:
+        downloads = {threads.submit(fetch, code, location): code for code, location in sources}
+        parsing = {}
+        for future in as_completed(downloads):
+            code = downloads[future]
+            try:
+                name, content, seconds = future.result()
+            except Exception as e:
+                failures[code] = f"fetch: {e}"
+                continue
+            timings['fetch'] += seconds
+            file_hash = hashlib.sha256(content).hexdigest()
+            if files.get(code, (None,))[0] == file_hash:
+                # Same file as last run: nothing to parse
+                skipped.extend(files[code][1])
+                continue
+            parsing[processes.submit(timed_parse, code, name, content, file_hash, default_as_of)] = code
+
+        for future in as_completed(parsing):
+            code = parsing[future]
+            try:
+                results, seconds = future.result()
+            except Exception as e:
+                failures[code] = f"parse: {e}"
+                continue
+            timings['parse'] += seconds
+            for result in results:
+                previous = stored.get(result['scheme_code'])
+                if previous and previous[1:] == (result['as_of_date'], result['holdings_hash']):
+                    # Re-published file, same portfolio: only its new file hash is worth remembering
+                    unchanged.append(result)
+                    skipped.append(result['scheme_code'])
+                    continue
+                changed.append(result)
+    return changed, unchanged, skipped, failures, timings
+
+
+def scheme_ids(conn, codes):
+    """{scheme_code: mutual_fund_schemes_new.id}"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT scheme_code, id FROM mutual_fund_schemes_new WHERE scheme_code = ANY(%s)",
+                    (list(codes),))
+        return {str(code): str(scheme_id) for code, scheme_id in cur.fetchall()}
+
+
+def table_frames(results, ids):
+    """The three tables' frames for the changed schemes that exist in mutual_fund_schemes_new"""
+    frames = {HOLDINGS_TABLE: [], SECTOR_TABLE: [], ASSET_TABLE: []}
+    for r in results:
+        keys = {'scheme_id': ids[r['scheme_code']], 'as_of_date': r['as_of_date']}
+        frames[HOLDINGS_TABLE].append(r['holdings'][HOLDING_COLUMNS].assign(**keys))
+        frames[SECTOR_TABLE].append(r['sectors'].assign(**keys))
+        frames[ASSET_TABLE].append(r['assets'].assign(**keys))
+    return {table: pd.concat(parts, ignore_index=True) for table, parts in frames.items() if parts}
+
+
+def load_holdings(conn, results):
+    """Replace each changed scheme's portfolio for its date; returns (loaded results, unknown codes)"""
+    ids = scheme_ids(conn, [r['scheme_code'] for r in results])
+    unknown = [r['scheme_code'] for r in results if r['scheme_code'] not in ids]
+    loaded = [r for r in results if r['scheme_code'] in ids]
+    if not loaded:
+        return loaded, unknown
+    frames = table_frames(loaded, ids)
+    pairs = [(ids[r['scheme_code']], r['as_of_date']) for r in loaded]
+    # Holdings sold since the last version of the same month must not linger. The deletes and
+    # loads share one transaction, so a failed load leaves the previous portfolios in place
+    with conn:
+        with conn.cursor() as cur:
+            for table, frame in frames.items():
+                cur.execute(
+                    f"DELETE FROM {table} WHERE (scheme_id::text, as_of_date) IN "
+                    f"(SELECT * FROM unnest(%s::text[], %s::date[]))",
+                    ([p[0] for p in pairs], [p[1] for p in pairs]))
+                stage_and_upsert(cur, table, [frame])
+    return loaded, unknown
+
+
+def log_run(conn, amc_code, started_at, status, records, errors, counts, timings):
+    """One amc_scraping_logs row with the run's timing"""
+    completed_at = datetime.now(timezone.utc)
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""INSERT INTO {LOG_TABLE}
+                    (amc_code, data_type, status, records_processed, error_message, started_at, completed_at,
+                     duration_seconds, schemes_total, schemes_changed, schemes_skipped, schemes_failed,
+                     stage_timings)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                (amc_code, 'portfolio_holdings', status, records, errors or None, started_at, completed_at,
+                 round((completed_at - started_at).total_seconds(), 3), counts['total'], counts['changed'],
+                 counts['skipped'], counts['failed'], json.dumps({k: round(v, 3) for k, v in timings.items()})),
+            )
+
+
+def read_sources(manifest=None, input_dir=None):
+    """[(scheme_code, path or URL)] from a manifest CSV and/or a directory of <scheme_code>.<ext> files
+
+    The code names the file's scheme for AMC disclosures; template files name
+    their schemes in their Scheme Code column
+    """
+    sources = []
+    if manifest:
+        df = pd.read_csv(manifest, dtype=str)
+        sources += list(zip(df['Scheme Code'].str.strip(), df['Source'].str.strip()))
+    if input_dir:
+        for name in sorted(os.listdir(input_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in ('.csv', '.xlsx', '.xls'):
+                sources.append((stem, os.path.join(input_dir, name)))
+    return sources
+
+
+def write_synthetic_holdings(directory, schemes, holdings=60, seed=0, as_of='30-Sep-2025'):
+    """AMC-disclosure-style CSVs (preamble, sections, subtotals) for `schemes` schemes"""
+    rng = np.random.default_rng(seed)
+    sectors = ['Banks', 'IT - Software', 'Petroleum Products', 'Pharmaceuticals', 'Automobiles',
+               'Finance', 'Power', 'Cement & Cement Products', 'Consumer Non Durables', 'Telecom - Services']
+    os.makedirs(directory, exist_ok=True)
+    for s in range(schemes):
+        code = str(100000 + s)
+        weights = rng.dirichlet(np.ones(holdings)) * 95
+        lines = [f"Scheme Name,Synthetic Fund {code}", f"Monthly Portfolio Statement as on {as_of}", '',
+                 'Name of the Instrument,ISIN,Industry / Rating,Quantity,Market value (Rs. in Lakhs),% to Net Assets',
+                 'Equity & Equity related,,,,,']
+        for h in range(holdings):
+            stock = int(rng.integers(0, 2000))
+            quantity = int(rng.integers(1_000, 5_000_000))
+            lines.append(f"Company {stock} Limited,INE{stock:03d}A01{h % 10:02d}{stock % 10},"
+                         f"{sectors[stock % len(sectors)]},\"{quantity:,}\",{weights[h] * 100:.2f},{weights[h]:.2f}%")
+        lines += [f"Sub Total,,,,,{weights.sum():.2f}%", 'TREPS / Reverse Repo,,,,,',
+                  f"Clearing Corporation of India Ltd,,,,,{100 - weights.sum():.2f}%", 'Grand Total,,,,,100.00%']
+        with open(os.path.join(directory, f"{code}.csv"), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+def benchmark(schemes=500, workers=8, parse_workers=None):
+    """Cold run, then a nightly re-run where only a tenth of the schemes changed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = os.path.join(tmp, 'holdings')
+        write_synthetic_holdings(files, schemes)
+        sources = read_sources(input_dir=files)
+        state = HoldingsState(os.path.join(tmp, 'state.db'))
+
+        for label in ('cold', 'nightly'):
+            if label == 'nightly':
+                write_synthetic_holdings(os.path.join(tmp, 'changed'), schemes // 10, seed=1, as_of='31-Oct-2025')
+                for name in os.listdir(os.path.join(tmp, 'changed')):
+                    os.replace(os.path.join(tmp, 'changed', name), os.path.join(files, name))
+            start = time.perf_counter()
+            changed, unchanged, skipped, failures, timings = collect(sources, state, workers, parse_workers)
+            state.commit(changed + unchanged)
+            elapsed = time.perf_counter() - start
+            rows = sum(len(r['holdings']) for r in changed)
+            print(f"{label}: {schemes} schemes in {elapsed:.2f}s ({schemes / elapsed:,.0f} schemes/s) - "
+                  f"{len(changed)} parsed ({rows:,} holdings), {len(skipped)} unchanged, {len(failures)} failed; "
+                  f"fetch {timings['fetch']:.2f}s, parse {timings['parse']:.2f}s summed")
+        state.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collect AMC portfolio holdings for many schemes in parallel')
+    parser.add_argument('--manifest', help="CSV with 'Scheme Code' and 'Source' (file path or URL) columns")
+    parser.add_argument('--input-dir', help='Directory of <scheme_code>.csv / .xlsx holdings files')
+    parser.add_argument('--amc-code', default='ALL', help='amc_code written to amc_scraping_logs')
+    parser.add_argument('--as-of', help='Portfolio date (YYYY-MM-DD) for files that do not state one')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent downloads')
+    parser.add_argument('--parse-workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help='SQLite file with the last hashes per scheme')
+    parser.add_argument('--dry-run', action='store_true', help='Parse and compare only; no DB writes, no state')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--benchmark', type=int, metavar='SCHEMES', help='Time a run over synthetic schemes')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.workers, args.parse_workers)
+        return
+    sources = read_sources(args.manifest, args.input_dir)
+    if not sources:
+        parser.error('no schemes: give --manifest and/or --input-dir')
+
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    state = HoldingsState(args.state)
+    try:
+        changed, unchanged, skipped, failures, timings = collect(sources, state, args.workers, args.parse_workers,
+                                                                args.as_of)
+        # Failed files count once; a template file can hold many schemes
+        total = len(changed) + len(skipped) + len(failures)
+        print(f"📊 {len(sources)} files, {total} schemes: {len(changed)} changed, {len(skipped)} unchanged, "
+              f"{len(failures)} failed")
+        for code, error in sorted(failures.items()):
+            print(f"❌ {code}: {error}")
+        if args.dry_run:
+            for r in changed:
+                print(f"   {r['scheme_code']} {r['as_of_date']}: {len(r['holdings'])} holdings, "
+                      f"{len(r['sectors'])} sectors")
+            return
+
+        conn = connect(args.dsn)
+        try:
+            load_start = time.perf_counter()
+            loaded, unknown = load_holdings(conn, changed) if changed else ([], [])
+            timings['load'] = time.perf_counter() - load_start
+            timings['wall'] = time.perf_counter() - start
+            state.commit(loaded + unchanged)
+            for code in unknown:
+                failures[code] = 'scheme_code not in mutual_fund_schemes_new'
+                print(f"⚠️  {code}: scheme_code not in mutual_fund_schemes_new")
+
+            records = sum(len(r['holdings']) for r in loaded)
+            status = 'success' if not failures else ('partial' if loaded or skipped else 'failed')
+            errors = '; '.join(f"{code}: {e}" for code, e in sorted(failures.items())[:20])
+            counts = {'total': total, 'changed': len(loaded), 'skipped': len(skipped), 'failed': len(failures)}
+            log_run(conn, args.amc_code, started_at, status, records, errors, counts, timings)
+        finally:
+            conn.close()
+        print(f"✅ {records:,} holdings for {len(loaded)} schemes loaded in {timings['wall']:.2f}s ({status})")
+    finally:
+        state.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+AMFI Report Parser
+Parses the AMFI investor-behaviour, quarterly AUM and state/city AUM reports
+(free-text preamble, then one or more header blocks) into typed long-format
+frames, and batch-processes a directory of them across processes
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+import pandas as pd
+
+from fii_dii_calendar import calendar_fields
+from table_extraction import parse_numeric
+
+# Report layout, recognised by the leading cells of its header row:
+# id columns are kept as-is, every other column is melted into variable/value
+LAYOUTS = {
+    'investor_behavior': {
+        'header': ['Age Group', 'Asset Type'],
+        'ids': {'Age Group': 'age_group', 'Asset Type': 'asset_type'},
+        'variable': 'holding_period',
+    },
+    'quarterly_aum': {
+        'header': ['Category of the Scheme'],
+        'ids': {'Category of the Scheme': 'category'},
+        'variable': 'measure',
+    },
+    'state_aum_category': {
+        'header': ['Category', 'State'],
+        'ids': {'Category': 'category', 'State': 'state'},
+        'variable': 'measure',
+    },
+    'state_aum_composition': {
+        'header': ['State'],
+        'ids': {'State': 'state'},
+        'variable': 'category',
+    },
+    'city_aum': {
+        'header': ['City Name'],
+        'ids': {'City Name': 'city'},
+        'variable': 'measure',
+    },
+}
+
+# "Quarter Ended: 30-Jun-2024", "Quarter End Date: 2024-06-30", "Month Year: 2025-07-01"
+PERIOD_RE = re.compile(r'^\s*(Quarter\s+Ended|Quarter\s+End\s+Date|Month\s+Year)\s*:\s*([^,]+)', re.I)
+NOTE_RE = re.compile(r'^\s*NOTE\s*:\s*(.+)$', re.I)
+TOTAL_RE = re.compile(r'\btotal\b', re.I)
+
+PERIOD_FORMATS = ['%d-%b-%Y', '%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d %b %Y']
+
+REPORT_EXTENSIONS = ('.csv', '.txt')
+
+
+def parse_period(text):
+    """Report period date from its preamble text"""
+    text = text.strip().strip('"')
+    for fmt in PERIOD_FORMATS:
+        try:
+            return pd.to_datetime(text, format=fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised report date: {text!r}")
+
+
+def split_cells(line):
+    return [cell.strip().strip('"') for cell in line.split(',')]
+
+
+def match_layout(line):
+    """Layout name whose header this line is, or None"""
+    cells = [c.lower() for c in split_cells(line)]
+    # Longest header prefix first, so 'Category, State' wins over a bare match
+    for name, layout in sorted(LAYOUTS.items(), key=lambda item: -len(item[1]['header'])):
+        header = [h.lower() for h in layout['header']]
+        if cells[:len(header)] == header:
+            return name
+    return None
+
+
+def iter_blocks(lines):
+    """Yield (layout, metadata, header + data lines) for every header block in a report"""
+    metadata = {'title': None, 'period_end': None, 'notes': []}
+    layout, block = None, []
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip(' ,"'):
+            continue
+
+        period = PERIOD_RE.match(line)
+        note = NOTE_RE.match(line)
+        header = match_layout(line)
+
+        if period or note or header:
+            # Anything that isn't a data row ends the current block
+            if block:
+                yield layout, dict(metadata), block
+                block = []
+            if period:
+                metadata = {**metadata, 'period_end': parse_period(period.group(2)), 'notes': []}
+            elif note:
+                metadata['notes'] = metadata['notes'] + [note.group(1).strip()]
+            else:
+                layout, block = header, [line]
+        elif block:
+            block.append(line)
+        elif metadata['title'] is None:
+            metadata['title'] = line.strip(' ,"')
+
+    if block:
+        yield layout, dict(metadata), block
+
+
+def block_to_long(layout_name, metadata, block, source_file=None):
+    """One header block as a long frame: ids, variable, value plus report metadata"""
+    layout = LAYOUTS[layout_name]
+    df = pd.read_csv(StringIO('\n'.join(block)), dtype=str, skipinitialspace=True)
+    df.columns = [c.strip() for c in df.columns]
+    ids = list(layout['ids'])
+
+    long = df.melt(id_vars=ids, var_name=layout['variable'], value_name='value')
+    long = long.rename(columns=layout['ids'])
+    for col in layout['ids'].values():
+        long[col] = long[col].str.strip()
+    long['value'] = parse_numeric(long['value'])
+    long = long.dropna(subset=['value'])
+    long['is_total'] = long[next(iter(layout['ids'].values()))].str.contains(TOTAL_RE)
+
+    if layout_name == 'quarterly_aum':
+        # "Equity Scheme - Large Cap Fund" -> scheme type + category
+        parts = long['category'].str.split(' - ', n=1, expand=True)
+        long['scheme_type'] = parts[0].where(parts[1].notna())
+        long['category'] = parts[1].fillna(parts[0])
+
+    period_end = metadata['period_end']
+    long.insert(0, 'report', layout_name)
+    long.insert(1, 'period_end', period_end.strftime('%Y-%m-%d') if period_end is not None else None)
+    quarter = calendar_fields(pd.Series([period_end]))['quarter'].iloc[0] if period_end is not None else None
+    long.insert(2, 'quarter_label', quarter)
+    long['title'] = metadata['title']
+    if source_file is not None:
+        long['source_file'] = os.path.basename(source_file)
+    return long.reset_index(drop=True)
+
+
+def parse_report(path):
+    """Every header block of one report file; returns {layout: long frame}"""
+    with open(path, encoding='utf-8-sig') as f:
+        lines = f.readlines()
+
+    frames = {}
+    for layout_name, metadata, block in iter_blocks(lines):
+        if len(block) < 2:
+            continue
+        frames.setdefault(layout_name, []).append(block_to_long(layout_name, metadata, block, path))
+    return {name: pd.concat(parts, ignore_index=True) for name, parts in frames.items()}
+
+
+def report_files(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(REPORT_EXTENSIONS)
+    )
+
+
+def parse_reports(paths, workers=None):
+    """Parse many report files in parallel processes; returns {layout: combined long frame}"""
+    combined = {}
+    failures = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(parse_report, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                failures[path] = str(e)
+                print(f"❌ {os.path.basename(path)}: {e}")
+                continue
+            for name, frame in result.items():
+                combined.setdefault(name, []).append(frame)
+
+    return {name: pd.concat(parts, ignore_index=True) for name, parts in combined.items()}, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse AMFI investor behaviour / AUM reports to long format')
+    parser.add_argument('paths', nargs='+', help='Report files or directories of them')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--output-dir', help='Write one <layout>_long.csv per report type here')
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        paths.extend(report_files(path) if os.path.isdir(path) else [path])
+
+    frames, failures = parse_reports(paths, args.workers)
+    for name, df in sorted(frames.items()):
+        periods = df['period_end'].dropna().unique()
+        print(f"✅ {name}: {len(df):,} values across {len(periods)} periods")
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            output_file = os.path.join(args.output_dir, f"{name}_long.csv")
+            df.to_csv(output_file, index=False)
+            print(f"   saved to {output_file}")
+        else:
+            print(df.head())
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+FII/DII Benchmark Suite
+Times the extraction and transform hot paths on the saved Trendlyne/NSE fixture
+pages and on synthetic multi-year datasets of several sizes, reporting rows/s
+and peak memory per stage against a stored baseline to catch regressions
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from embedded_json import extract_json_tables
+from fii_dii_calendar import calendar_fields, get_financial_year
+from fii_dii_rollups import compute_rollups
+from fii_dii_transform import MONTHLY_SPEC, TABLE_SPECS, synthetic_trendlyne_frame, transform
+from fii_dii_validation import synthetic_flow_frame, validate
+from nse_stream_ingest import fii_dii_trade_frame
+from table_extraction import parse_html_tables
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+DEFAULT_BASELINE = os.path.join(FIXTURES_DIR, 'benchmark_baseline.json')
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+FIXTURE_STAGES = ('read_html', 'embedded_json', 'nse_fii_dii')
+SYNTHETIC_STAGES = ('transform_monthly', 'validate_monthly', 'transform_flows', 'validate_flows',
+                    'calendar_fields', 'get_financial_year', 'rollups')
+FLOW_TABLE = 'fii_cash_data'
+
+# Fixture pages are small, so each timing parses them this many times
+FIXTURE_LOOPS = 20
+# get_financial_year is per-date Python; larger sizes are sampled down to this
+SCALAR_ROWS = 2_000
+
+# Shortest single timing; quicker cases are run in a loop
+MIN_TIMING = 0.2
+
+# A stage regresses when it is this much slower (or uses this much more memory), beyond its own noise
+DEFAULT_TOLERANCE = 0.3
+# Peak-memory differences below this are noise
+MEMORY_SLACK_MB = 1.0
+
+
+def read_fixtures():
+    pages = {}
+    for name in sorted(os.listdir(os.path.join(FIXTURES_DIR, 'trendlyne'))):
+        if name.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, 'trendlyne', name), encoding='utf-8') as f:
+                pages[name] = f.read()
+    with open(os.path.join(FIXTURES_DIR, 'nse', 'fiidiiTradeReact.json')) as f:
+        nse_records = json.load(f)
+    return pages, nse_records
+
+
+def fixture_cases():
+    """{stage: function returning rows parsed} for the recorded pages"""
+    pages, nse_records = read_fixtures()
+
+    def repeated(parse, inputs):
+        def run():
+            rows = 0
+            for _ in range(FIXTURE_LOOPS):
+                for value in inputs:
+                    rows += sum(len(df) for df in parse(value))
+            return rows
+        return run
+
+    return {
+        'read_html': repeated(parse_html_tables, pages.values()),
+        'embedded_json': repeated(extract_json_tables, pages.values()),
+        'nse_fii_dii': repeated(lambda records: [fii_dii_trade_frame(records)], [nse_records]),
+    }
+
+
+def synthetic_cases(rows):
+    """{stage: function returning rows processed} on synthetic data of one size"""
+    monthly_raw = synthetic_trendlyne_frame(rows)
+    monthly = transform(monthly_raw, MONTHLY_SPEC, fill_value=None)
+    flow_spec = TABLE_SPECS[FLOW_TABLE]
+    flow_raw = synthetic_flow_frame(FLOW_TABLE, rows)
+    flows = transform(flow_raw, flow_spec, calendar=True, fill_value=None)
+    clean_flows = validate(flows, flow_spec, FLOW_TABLE)[0]
+    dates = pd.to_datetime(flows['date'])
+    sample = flows['date'].iloc[:SCALAR_ROWS]
+
+    def counted(func, n=rows):
+        def run():
+            func()
+            return n
+        return run
+
+    return {
+        # What transform_to_monthly_format / convert_to_monthly_format run
+        'transform_monthly': counted(lambda: transform(monthly_raw, MONTHLY_SPEC)),
+        'validate_monthly': counted(lambda: validate(monthly, MONTHLY_SPEC, daily=False)),
+        'transform_flows': counted(lambda: transform(flow_raw, flow_spec, calendar=True, fill_value=None)),
+        'validate_flows': counted(lambda: validate(flows, flow_spec, FLOW_TABLE)),
+        'calendar_fields': counted(lambda: calendar_fields(dates)),
+        'get_financial_year': counted(lambda: sample.map(get_financial_year), len(sample)),
+        'rollups': counted(lambda: compute_rollups(clean_flows, FLOW_TABLE), len(clean_flows)),
+    }
+
+
+def measure(run, repeat=5):
+    """Median throughput over `repeat` timings and their spread, then peak traced memory from one separate run
+
+    Fast cases are looped (like timeit's autorange) so each timing lasts at
+    least MIN_TIMING seconds and scheduler noise doesn't dominate. `noise` is
+    (slowest - fastest) / median, the case's own run-to-run variation
+    """
+    start = time.perf_counter()
+    rows = run()
+    loops = max(1, math.ceil(MIN_TIMING / max(time.perf_counter() - start, 1e-6)))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        timings.append((time.perf_counter() - start) / loops)
+    median = statistics.median(timings)
+
+    # Tracing allocations slows everything down, so it never overlaps the timings
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'rows': rows,
+        'seconds': round(median, 6),
+        'rows_per_s': round(rows / median, 1),
+        'noise': round((max(timings) - min(timings)) / median, 3),
+        'peak_mb': round(peak / 1024 / 1024, 3),
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, stages=None, repeat=5, cases=None):
+    """{'stage@size': measurement} for every selected stage (or just the named cases)"""
+    selected = lambda case, stage: (stages is None or stage in stages) and (cases is None or case in cases)
+    results = {}
+    for stage, run in fixture_cases().items():
+        if selected(f"{stage}@fixtures", stage):
+            results[f"{stage}@fixtures"] = measure(run, repeat)
+    for size in sizes:
+        if cases is not None and not any(case.endswith(f"@{size}") for case in cases):
+            continue
+        for stage, run in synthetic_cases(size).items():
+            if selected(f"{stage}@{size}", stage):
+                results[f"{stage}@{size}"] = measure(run, repeat)
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Rows of (case, rows/s change %, peak MB change, regressed) against the baseline
+
+    A case's allowed slowdown is the tolerance plus the larger of its baseline
+    and current noise, so cases that swing run to run don't fail on the swing
+    """
+    rows = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            rows.append((case, None, None, False))
+            continue
+        speed = current['rows_per_s'] / previous['rows_per_s'] - 1
+        memory = current['peak_mb'] - previous['peak_mb']
+        margin = tolerance + max(previous.get('noise', 0.0), current.get('noise', 0.0))
+        regressed = speed < -margin or (
+            memory > MEMORY_SLACK_MB and current['peak_mb'] > previous['peak_mb'] * (1 + tolerance))
+        rows.append((case, speed, memory, regressed))
+    return rows
+
+
+def print_results(results, comparison=None):
+    changes = {case: (speed, memory, regressed) for case, speed, memory, regressed in comparison or []}
+    print(f"{'case':<32} {'rows':>10} {'rows/s':>14} {'noise':>6} {'peak MB':>9}" +
+          ('   vs baseline' if comparison is not None else ''))
+    for case, m in results.items():
+        speed, memory, regressed = changes.get(case, (None, None, False))
+        versus = 'new' if speed is None else f"{speed:+.0%} speed, {memory:+.2f} MB"
+        mark = '❌' if regressed else ('  ' if speed is None else '✅')
+        line = f"{case:<32} {m['rows']:>10,} {m['rows_per_s']:>14,.0f} {m['noise']:>6.0%} {m['peak_mb']:>9.2f}"
+        print(f"{line}   {mark} {versus}" if comparison is not None else line)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    """Write the baseline atomically, with the machine it was recorded on"""
+    data = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'results': results,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the FII/DII extraction and transform stages')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Synthetic dataset sizes in rows')
+    parser.add_argument('--stages', nargs='+', choices=FIXTURE_STAGES + SYNTHETIC_STAGES, help='Stages to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Record this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown / memory growth as a fraction (0.3 = 30%%), on top of each '
+                             "case's recorded noise")
+    parser.add_argument('--output', help='Also write this run\'s results to a JSON file')
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.stages, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        print_results(results)
+        save_baseline(args.baseline, results)
+        print(f"\n✅ Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print_results(results)
+        print(f"\n⚠️  No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+
+    comparison = compare(results, baseline['results'], args.tolerance)
+    regressions = [case for case, _, _, regressed in comparison if regressed]
+    if regressions:
+        # A slow stretch of the machine can hit a few cases; only a slowdown that repeats counts
+        rerun = run_suite(args.sizes, args.stages, args.repeat, cases=regressions)
+        for case, m in rerun.items():
+            if m['rows_per_s'] > results[case]['rows_per_s']:
+                results[case] = m
+        comparison = compare(results, baseline['results'], args.tolerance)
+        regressions = [case for case, _, _, regressed in comparison if regressed]
+    print(f"Baseline: {baseline['recorded_at']} (Python {baseline['python']}, pandas {baseline['pandas']})\n")
+    print_results(results, comparison)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%} plus noise, confirmed on a re-run: "
+              f"{', '.join(regressions)}")
+        raise SystemExit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
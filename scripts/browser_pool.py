@@ -0,0 +1,155 @@
+"""
+Headless Browser Pool for the Selenium extractors
+Keeps N Chrome instances warm, hands them out to extraction jobs and
+replaces fixed sleeps with explicit DOM / network-idle readiness checks
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Number of network resources the page has loaded so far; stops growing once idle
+RESOURCE_COUNT_JS = "return window.performance.getEntriesByType('resource').length;"
+
+# Seconds a waiting acquire() sleeps between checks that the pool still has browsers
+ACQUIRE_POLL = 1.0
+
+
+def wait_for_page_ready(driver, timeout=15, idle_time=0.5, poll=0.1):
+    """Wait until the document has loaded and no new network requests start for idle_time"""
+    WebDriverWait(driver, timeout, poll_frequency=poll).until(
+        lambda d: d.execute_script('return document.readyState') == 'complete'
+    )
+
+    deadline = time.monotonic() + timeout
+    last_count = driver.execute_script(RESOURCE_COUNT_JS)
+    last_change = time.monotonic()
+    while time.monotonic() - last_change < idle_time:
+        if time.monotonic() > deadline:
+            raise TimeoutException(f"Network did not go idle within {timeout}s")
+        time.sleep(poll)
+        count = driver.execute_script(RESOURCE_COUNT_JS)
+        if count != last_count:
+            last_count = count
+            last_change = time.monotonic()
+
+
+def wait_for_table(driver, timeout=15):
+    """Wait for the page to settle and return the first table on it"""
+    wait_for_page_ready(driver, timeout)
+    return WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.TAG_NAME, 'table'))
+    )
+
+
+def is_alive(driver):
+    """True if the browser session still answers commands"""
+    try:
+        driver.execute_script('return 1')
+        return True
+    except WebDriverException:
+        return False
+
+
+class DriverPool:
+    """Fixed-size pool of warm WebDriver instances"""
+
+    def __init__(self, factory, size=2):
+        self.factory = factory
+        self.size = size
+        self.drivers = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+
+        # Start browsers in parallel; Chrome startup dominates otherwise
+        with ThreadPoolExecutor(max_workers=size) as pool:
+            for driver in pool.map(lambda _: factory(), range(size)):
+                self.drivers.put(driver)
+        print(f"Browser pool ready with {size} drivers")
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Borrow a driver; a driver that crashes is replaced with a fresh one
+
+        Raises RuntimeError once every browser has failed to restart, instead of waiting forever
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.closed:
+                raise RuntimeError("Driver pool is closed")
+            with self.lock:
+                if self.size <= 0:
+                    raise RuntimeError("Driver pool has no working browsers left")
+            # Wake up now and then to notice the pool emptying while we wait
+            wait = ACQUIRE_POLL if deadline is None else min(ACQUIRE_POLL, deadline - time.monotonic())
+            try:
+                driver = self.drivers.get(timeout=max(wait, 0))
+                break
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"No browser free within {timeout}s") from None
+        try:
+            yield driver
+        finally:
+            if is_alive(driver):
+                self.drivers.put(driver)
+            else:
+                self.replace(driver)
+
+    def replace(self, driver):
+        """Swap a crashed driver for a new one"""
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        try:
+            self.drivers.put(self.factory())
+        except Exception as e:
+            with self.lock:
+                self.size -= 1
+                size = self.size
+            print(f"❌ Could not restart browser, pool shrinks to {size}: {e}")
+
+    def close(self):
+        """Quit every driver in the pool"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        while not self.drivers.empty():
+            try:
+                self.drivers.get_nowait().quit()
+            except WebDriverException:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_batch(pool, jobs):
+    """Run {name: fn(driver)} jobs concurrently on the pool; returns {name: result or None}"""
+
+    def run_job(name, fn):
+        started = time.perf_counter()
+        try:
+            with pool.acquire() as driver:
+                result = fn(driver)
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            result = None
+        print(f"⏱  {name} finished in {time.perf_counter() - started:.1f}s")
+        return name, result
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        futures = [executor.submit(run_job, name, fn) for name, fn in jobs.items()]
+        return dict(f.result() for f in futures)
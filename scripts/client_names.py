@@ -0,0 +1,369 @@
+"""
+Deal Client-Name Index
+Resolves the free-text Client Name of bulk/block deals to canonical investor
+IDs: names are normalised, candidates are blocked on shared tokens and name
+prefixes, scored by trigram overlap, and the mapping is cached between runs
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), '.state', 'client_names.db')
+
+# Trigram Jaccard similarity at which two normalised names are the same investor
+DEFAULT_THRESHOLD = 0.75
+# Blocks bigger than this are too generic to say anything ('FUND', 'CAPITAL')
+DEFAULT_MAX_BLOCK = 200
+PREFIX_LENGTH = 5
+
+ABBREVIATIONS = {
+    r'\bMF\b': 'MUTUAL FUND',
+    r'\bINTL\b': 'INTERNATIONAL',
+    r'\bINVT?S?\b': 'INVESTMENTS',
+    r'\bMGMT\b': 'MANAGEMENT',
+    r'\bSECS?\b': 'SECURITIES',
+    r'\bFPI\b': 'FOREIGN PORTFOLIO INVESTOR',
+}
+# A trailing number or roman numeral names a distinct vehicle ('... MAURITIUS I' vs '... MAURITIUS II')
+SERIES_RE = r'\s(\d+|X{0,3}(?:IX|IV|V?I{0,3}))$'
+ROMAN = {'I': 1, 'V': 5, 'X': 10}
+LEGAL_SUFFIX_RE = (r'(\s+(LIMITED|LTD|PVT|PRIVATE|LLP|LLC|INC|PLC|PTE|CO|COMPANY|CORP|CORPORATION'
+                   r'|SA|SE|AG|NV|BV|GMBH|THE))+$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS client_names (
+  raw_name TEXT PRIMARY KEY,
+  normalized TEXT NOT NULL,
+  investor_id TEXT NOT NULL,
+  score REAL,
+  created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS client_names_normalized ON client_names (normalized);
+CREATE TABLE IF NOT EXISTS investors (
+  investor_id TEXT PRIMARY KEY,
+  canonical_name TEXT NOT NULL,
+  created_at REAL NOT NULL
+);
+"""
+
+
+def normalize_names(names):
+    """Upper-case, drop punctuation and legal suffixes, expand common abbreviations"""
+    text = names.astype(str).str.upper().str.replace('&', ' AND ', regex=False)
+    text = text.str.replace(r'[^A-Z0-9 ]+', ' ', regex=True)
+    for pattern, replacement in ABBREVIATIONS.items():
+        text = text.str.replace(pattern, replacement, regex=True)
+    text = text.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return text.str.replace(LEGAL_SUFFIX_RE, '', regex=True).str.strip()
+
+
+def roman_value(numeral):
+    values = [ROMAN[c] for c in numeral]
+    return sum(-v if v < nxt else v for v, nxt in zip(values, values[1:] + [0]))
+
+
+def series_numbers(normalized):
+    """Trailing series number of each normalised name ('II' and '2' -> 2), 0 when it has none"""
+    token = pd.Series(normalized).str.extract(SERIES_RE, expand=False).fillna('')
+    return token.map(lambda t: int(t) if t.isdigit() else roman_value(t) if t else 0).to_numpy()
+
+
+def investor_id(normalized):
+    """Stable ID from the normalised name that founded the investor"""
+    return 'INV-' + hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12].upper()
+
+
+def trigrams(name):
+    padded = f"  {name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def block_keys(normalized):
+    """(node, key) rows: every token of 3+ characters plus the name prefix"""
+    nodes = pd.Series(normalized)
+    tokens = nodes.str.split().explode()
+    tokens = tokens[tokens.str.len() >= 3]
+    keys = pd.concat([
+        pd.DataFrame({'node': tokens.index.to_numpy(), 'key': 'T:' + tokens.to_numpy()}),
+        pd.DataFrame({'node': nodes.index.to_numpy(), 'key': 'P:' + nodes.str[:PREFIX_LENGTH].to_numpy()}),
+    ], ignore_index=True)
+    return keys.drop_duplicates()
+
+
+def candidate_pairs(normalized, is_new, max_block=DEFAULT_MAX_BLOCK):
+    """Node pairs sharing a block key where at least one side is new; never all-pairs"""
+    keys = block_keys(normalized)
+    sizes = keys.groupby('key')['node'].transform('size')
+    keys = keys[(sizes >= 2) & (sizes <= max_block)]
+    # Only blocks holding a new name can produce a new match
+    has_new = keys['node'].map(pd.Series(is_new)).groupby(keys['key']).transform('any')
+    keys = keys[has_new.astype(bool)]
+    pairs = keys.merge(keys, on='key', suffixes=('_a', '_b'))
+    pairs = pairs[pairs['node_a'] < pairs['node_b']]
+    a = pairs['node_a'].to_numpy()
+    b = pairs['node_b'].to_numpy()
+    keep = is_new[a] | is_new[b]
+    unique = np.unique(np.stack([a[keep], b[keep]], axis=1), axis=0) if keep.any() else np.empty((0, 2), int)
+    return unique[:, 0], unique[:, 1]
+
+
+def similarity(normalized, a, b):
+    """Trigram Jaccard similarity for each candidate pair"""
+    grams = [trigrams(name) for name in normalized]
+    return np.fromiter(
+        (len(grams[i] & grams[j]) / len(grams[i] | grams[j]) for i, j in zip(a, b)),
+        dtype='float64', count=len(a),
+    )
+
+
+def connected_components(n, a, b):
+    """Component label (smallest member) per node, by min-label propagation"""
+    labels = np.arange(n)
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        updated = labels.copy()
+        np.minimum.at(updated, a, low)
+        np.minimum.at(updated, b, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class ClientNameIndex:
+    """Raw client name -> canonical investor, persisted in SQLite between runs"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=DEFAULT_THRESHOLD, max_block=DEFAULT_MAX_BLOCK):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.threshold = threshold
+        self.max_block = max_block
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.stats = {'cached': 0, 'exact': 0, 'matched': 0, 'new_investors': 0, 'candidate_pairs': 0}
+
+    def known_names(self):
+        return pd.read_sql_query('SELECT raw_name, normalized, investor_id FROM client_names', self.conn)
+
+    def investors(self):
+        return pd.read_sql_query('SELECT investor_id, canonical_name FROM investors', self.conn)
+
+    def resolve(self, names):
+        """Frame of raw_name, investor_id, canonical_name for every distinct name given"""
+        names = pd.Series(names).dropna().astype(str)
+        counts = names.value_counts()
+        known = self.known_names()
+        new = counts.index.difference(known['raw_name'])
+        self.stats['cached'] += len(counts) - len(new)
+        if len(new):
+            self.add_names(pd.Series(new), counts, known)
+        return self.lookup(counts.index)
+
+    def add_names(self, raw, counts, known):
+        """Match new raw names against each other and the cached index, then store them"""
+        normalized = normalize_names(raw)
+        now = time.time()
+
+        # Exact normalised matches need no scoring
+        by_normalized = known.drop_duplicates('normalized').set_index('normalized')['investor_id']
+        exact = normalized.map(by_normalized)
+        self.stats['exact'] += int(exact.notna().sum())
+        rows = pd.DataFrame({'raw_name': raw.to_numpy(), 'normalized': normalized.to_numpy(),
+                             'investor_id': exact.to_numpy(dtype=object),'score': np.where(exact.notna(), 1.0, np.nan)})
+
+        pending = rows[rows['investor_id'].isna()]
+        if not pending.empty:
+            new_nodes = pending['normalized'].unique()
+            # New spellings that normalise alike are exact matches of the first one
+            self.stats['exact'] += len(pending) - len(new_nodes)
+            old_nodes = by_normalized.index.to_numpy()
+            nodes = np.concatenate([new_nodes, old_nodes])
+            is_new = np.arange(len(nodes)) < len(new_nodes)
+            a, b = candidate_pairs(nodes, is_new, self.max_block)
+            self.stats['candidate_pairs'] += len(a)
+            scores = similarity(nodes, a, b)
+            # Trigrams can't tell 'FUND I' from 'FUND II': a different series number never matches
+            series = series_numbers(nodes)
+            linked = (scores >= self.threshold) & (series[a] == series[b])
+            labels = connected_components(len(nodes), a[linked], b[linked])
+
+            node_ids = np.full(len(nodes), None, dtype=object)
+            node_ids[~is_new] = by_normalized.to_numpy()
+            node_ids = self.assign_ids(nodes, labels, node_ids, is_new, pending, counts)
+            best = pd.Series(np.concatenate([scores[linked], scores[linked]]),
+                             index=np.concatenate([a[linked], b[linked]])).groupby(level=0).max()
+            node_score = best.reindex(np.arange(len(nodes))).to_numpy()
+
+            position = pd.Series(np.arange(len(new_nodes)), index=new_nodes)
+            at = position.reindex(pending['normalized']).to_numpy()
+            rows.loc[pending.index, 'investor_id'] = node_ids[at]
+            rows.loc[pending.index, 'score'] = node_score[at]
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO client_names (raw_name, normalized, investor_id, score, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(r, n, i, None if pd.isna(s) else float(s), now)
+                 for r, n, i, s in rows[['raw_name', 'normalized', 'investor_id', 'score']].itertuples(index=False)],
+            )
+
+    def assign_ids(self, nodes, labels, node_ids, is_new, pending, counts):
+        """Give every component the cached investor it touches, or a new one"""
+        components = pd.DataFrame({'label': labels, 'investor_id': node_ids, 'is_new': is_new})
+        # A component reaching cached names joins the investor with the most of them
+        existing = (components.dropna(subset=['investor_id'])
+                    .groupby(['label', 'investor_id']).size().reset_index(name='n')
+                    .sort_values(['label', 'n', 'investor_id'], ascending=[True, False, True])
+                    .drop_duplicates('label').set_index('label')['investor_id'])
+        ids = components['label'].map(existing)
+
+        fresh = ids.isna().to_numpy() & is_new
+        founders = 0
+        if fresh.any():
+            # New investors are named after their most frequent raw spelling
+            spellings = pending.assign(count=pending['raw_name'].map(counts).to_numpy())
+            spellings['label'] = pd.Series(labels[:is_new.sum()], index=nodes[is_new]).reindex(
+                spellings['normalized']).to_numpy()
+            spellings = spellings[spellings['label'].isin(labels[fresh])]
+            canonical = (spellings.sort_values(['label', 'count', 'raw_name'], ascending=[True, False, True])
+                         .drop_duplicates('label').set_index('label'))
+            canonical['investor_id'] = canonical['normalized'].map(investor_id)
+            ids = ids.fillna(components['label'].map(canonical['investor_id']))
+            founders = len(canonical)
+            self.stats['new_investors'] += founders
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO investors (investor_id, canonical_name, created_at) VALUES (?, ?, ?)',
+                    [(i, name, now) for i, name in canonical[['investor_id', 'raw_name']].itertuples(index=False)],
+                )
+        # Every linked node of a component is a match, except each new investor's founding name
+        self.stats['matched'] += int(is_new.sum()) - founders
+        return ids.to_numpy(dtype=object)
+
+    def lookup(self, raw_names):
+        names = self.known_names().merge(self.investors(), on='investor_id', how='left')
+        return names.set_index('raw_name').reindex(raw_names)[['investor_id', 'canonical_name']] \
+            .rename_axis('raw_name').reset_index()
+
+    def canonical_names(self, names):
+        """Canonical investor name for every entry of a name column"""
+        resolved = self.resolve(names).set_index('raw_name')['canonical_name']
+        return pd.Series(names).map(resolved).fillna(pd.Series(names))
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['cached']} cached, {s['exact']} exact, {s['matched']} fuzzy matches, "
+                f"{s['new_investors']} new investors from {s['candidate_pairs']:,} candidate pairs")
+
+    def close(self):
+        self.conn.close()
+
+
+# Word pools for synthetic institutional names
+WORDS = ['ALPHA', 'BHARAT', 'CAPITAL', 'DELTA', 'EMERGING', 'FRONTIER', 'GLOBAL', 'HORIZON', 'INDIA',
+         'JUPITER', 'KOTAK', 'LOTUS', 'MERIDIAN', 'NORTHERN', 'OCEAN', 'PACIFIC', 'QUANT', 'RIVER',
+         'SUMMIT', 'TIGER', 'UNITED', 'VALUE', 'WESTERN', 'ZENITH', 'ASIA', 'MAURITIUS', 'OPPORTUNITIES',
+         'EQUITY', 'GROWTH', 'STRATEGIC', 'PARTNERS', 'ADVISORS', 'HOLDINGS', 'SECURITIES', 'FUND']
+SUFFIXES = ['LIMITED', 'LTD', 'LTD.', 'PVT LTD', 'PRIVATE LIMITED', 'LLP', '']
+
+
+def synthetic_names(entities, deals, seed=0):
+    """(deal client names, true entity per deal) with spelling variants of each entity"""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS + [f"{w}{i}" for w in ('ORION', 'VEGA', 'ATLAS') for i in range(entities // 20 + 1)])
+    base = pd.Series([' '.join(rng.choice(words, size=rng.integers(2, 5), replace=False))
+                      for _ in range(entities)]).drop_duplicates().reset_index(drop=True)
+    entity = rng.zipf(1.3, deals) % len(base)
+    names = base.to_numpy()[entity]
+
+    suffix = np.array(SUFFIXES)[rng.integers(0, len(SUFFIXES), deals)]
+    names = np.char.add(np.char.add(names.astype(str), ' '), suffix)
+    variant = rng.random(deals)
+    names = pd.Series(names).str.strip()
+    names = names.mask(variant < 0.15, names.str.lower())
+    names = names.mask((variant >= 0.15) & (variant < 0.25), names.str.replace(' ', '  ', n=1))
+    # Typos: drop one character
+    typo = (variant >= 0.25) & (variant < 0.32)
+    cut = rng.integers(3, 10, deals)
+    names = names.mask(typo, [n[:c] + n[c + 1:] for n, c in zip(names, cut)])
+    return names, entity
+
+
+def pair_quality(names, entity, resolved):
+    """Pairwise precision / recall of the resolution against the true entities"""
+    frame = pd.DataFrame({'name': names, 'entity': entity}).drop_duplicates('name')
+    frame['investor_id'] = frame['name'].map(resolved.set_index('raw_name')['investor_id'])
+    pairs = lambda keys: (frame.groupby(keys).size() * (frame.groupby(keys).size() - 1) // 2).sum()
+    same_both = pairs(['entity', 'investor_id'])
+    precision = same_both / max(pairs(['investor_id']), 1)
+    recall = same_both / max(pairs(['entity']), 1)
+    return precision, recall
+
+
+def benchmark(entities=20_000, deals=1_000_000):
+    """Resolve synthetic deal names from scratch, then again from the cache"""
+    names, entity = synthetic_names(entities, deals)
+    unique = names.nunique()
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ClientNameIndex(os.path.join(tmp, 'names.db'))
+        start = time.perf_counter()
+        resolved = index.resolve(names)
+        cold = time.perf_counter() - start
+        pairs = index.stats['candidate_pairs']
+
+        start = time.perf_counter()
+        index.canonical_names(names)
+        warm = time.perf_counter() - start
+        index.close()
+
+    precision, recall = pair_quality(names, entity, resolved)
+    all_pairs = unique * (unique - 1) // 2
+    print(f"{deals:,} deals, {unique:,} distinct names of {len(np.unique(entity)):,} investors")
+    print(f"cold: {cold:.2f}s, {pairs:,} candidate pairs ({pairs / max(all_pairs, 1):.4%} of all pairs)")
+    print(f"warm (cached) mapping of every deal: {warm:.2f}s ({deals / warm:,.0f} deals/s)")
+    print(f"{resolved['investor_id'].nunique():,} investors found, pairwise precision {precision:.3f}, "
+          f"recall {recall:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resolve deal client names to canonical investor IDs')
+    parser.add_argument('files', nargs='*', help='Deal CSVs with a Client Name column')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='SQLite index file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--seed', help='Investor master CSV whose names should become canonical first')
+    parser.add_argument('--output', help='Write raw_name, investor_id, canonical_name to this CSV')
+    parser.add_argument('--benchmark', type=int, metavar='DEALS', help='Time resolution of synthetic deal names')
+    parser.add_argument('--entities', type=int, default=20_000, help='Investors behind the synthetic names')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.entities, args.benchmark)
+        return
+    if not args.files and not args.seed:
+        parser.error('give deal CSVs or --seed unless --benchmark is given')
+
+    index = ClientNameIndex(args.index, args.threshold)
+    try:
+        if args.seed:
+            index.resolve(pd.read_csv(args.seed, dtype=str)['Client Name'])
+        names = pd.concat([pd.read_csv(f, dtype=str, usecols=['Client Name'])['Client Name'] for f in args.files]) \
+            if args.files else pd.Series([], dtype=str)
+        resolved = index.resolve(names)
+        print(f"✅ {len(resolved)} distinct names -> {resolved['investor_id'].nunique()} investors "
+              f"({index.summary()})")
+        if args.output:
+            resolved.to_csv(args.output, index=False)
+            print(f"   saved to {args.output}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Bulk / Block Deals Analytics
+Computes the useDealsAnalysis aggregates (KPIs, sector, stock, investor with
+top buyers/sellers, daily trend) from one group-by per dataset and stores them
+per day in deals_daily_aggregates, recomputing only the days that changed
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from psycopg2 import sql
+
+from client_names import ClientNameIndex
+from nse_stream_ingest import iter_chunks, write_synthetic_deals
+from pg_loader import connect, stage_and_upsert
+
+TABLE = 'deals_daily_aggregates'
+
+# deal_source -> source table and its price column
+SOURCES = {
+    'bulk': ('bulk_deals', 'avg_price'),
+    'block': ('block_deals', 'trade_price'),
+}
+
+SECTOR_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'src', 'utils', 'financialYearUtils.ts')
+SECTOR_ENTRY_RE = re.compile(r"^\s*'([A-Z0-9&\-]+)'\s*:\s*'([^']+)'", re.M)
+
+# classifyInvestor in useDealsAnalysis.ts: first matching group wins
+INVESTOR_PATTERNS = [
+    ('FII', ['morgan', 'goldman', 'blackrock', 'vanguard', 'fidelity', 'capital',
+             'international', 'global', 'offshore']),
+    ('DII', ['mutual fund', 'insurance', 'lic', 'sbi', 'hdfc', 'icici',
+             'aditya birla', 'reliance', 'nippon']),
+    ('HNI', ['family', 'trust', 'holdings', 'investments', 'enterprises']),
+]
+
+# Same list lengths as the dashboard shows
+TOP_CLIENTS = 5
+TOP_SECTORS = 3
+
+MEASURES = ['buy_value', 'sell_value', 'deal_count', 'buy_deals', 'sell_deals', 'buy_price_sum', 'sell_price_sum']
+COLUMNS = ['date', 'deal_source', 'dimension', 'key', 'label', 'sector', 'investor_type',
+           'buy_value', 'sell_value', 'net_flow', 'deal_count', 'buy_deals', 'sell_deals',
+           'buy_price_sum', 'sell_price_sum', 'counterparties', 'top_buyers', 'top_sellers', 'top_sectors']
+
+
+@lru_cache(maxsize=None)
+def sector_mapping(path=SECTOR_SOURCE):
+    """SECTOR_MAPPING read from the frontend source, so both sides agree"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    start = text.index('SECTOR_MAPPING')
+    block = text[start:text.index('};', start)]
+    return dict(SECTOR_ENTRY_RE.findall(block))
+
+
+def classify_investors(names):
+    """classifyInvestor for a whole column of client names"""
+    lower = names.str.lower()
+    conditions = [lower.str.contains('|'.join(map(re.escape, words)), regex=True) for _, words in INVESTOR_PATTERNS]
+    return pd.Series(np.select(conditions, [kind for kind, _ in INVESTOR_PATTERNS], 'Others'), index=names.index)
+
+
+def prepare_deals(df, price_col):
+    """Source rows -> the hook's Deal shape: value, side, sector, investor type"""
+    deals = pd.DataFrame({
+        'date': df['date'].astype(str),
+        'symbol': df['symbol'],
+        'stock_name': df['stock_name'].fillna(df['symbol']),
+        'client_name': df['client_name'].fillna('Unknown'),
+        'is_buy': df['deal_type'].ne('sell').to_numpy(),
+        'quantity': pd.to_numeric(df['quantity'], errors='coerce').fillna(0).to_numpy(dtype='float64'),
+        'price': pd.to_numeric(df[price_col], errors='coerce').fillna(0).to_numpy(dtype='float64'),
+    })
+    deals['value'] = deals['quantity'] * deals['price']
+    deals['sector'] = deals['symbol'].str.upper().map(sector_mapping()).fillna('Others')
+    return deals
+
+
+def deal_positions(deals):
+    """The one group-by pass: per date, symbol, client and side"""
+    buy = deals['is_buy'].to_numpy()
+    keyed = deals.assign(
+        buy_value=np.where(buy, deals['value'], 0.0),
+        sell_value=np.where(buy, 0.0, deals['value']),
+        buy_deals=buy.astype('int64'),
+        sell_deals=(~buy).astype('int64'),
+        buy_price_sum=np.where(buy, deals['price'], 0.0),
+        sell_price_sum=np.where(buy, 0.0, deals['price']),
+    )
+    positions = keyed.groupby(['date', 'symbol', 'client_name'], sort=False).agg(
+        stock_name=('stock_name', 'first'),
+        sector=('sector', 'first'),
+        buy_value=('buy_value', 'sum'),
+        sell_value=('sell_value', 'sum'),
+        deal_count=('value', 'size'),
+        buy_deals=('buy_deals', 'sum'),
+        sell_deals=('sell_deals', 'sum'),
+        buy_price_sum=('buy_price_sum', 'sum'),
+        sell_price_sum=('sell_price_sum', 'sum'),
+    ).reset_index()
+    positions['investor_type'] = classify_investors(positions['client_name'])
+    return positions
+
+
+def top_names(positions, by, name_col, value_col, n):
+    """JSON list of the n largest name_col per `by` group, ranked by value_col"""
+    ranked = positions[positions[value_col] > 0].sort_values(value_col, ascending=False, kind='stable')
+    top = ranked.groupby(by, sort=False).head(n)
+    # Quote each distinct name once, then join the ranked slots column-wise
+    codes, names = pd.factorize(top[name_col])
+    quoted = np.array([json.dumps(name) for name in names], dtype=object).take(codes)
+    slots = top[by].assign(slot=top.groupby(by, sort=False).cumcount().to_numpy(), quoted=quoted)
+    wide = slots.set_index(by + ['slot'])['quoted'].unstack('slot')
+    joined = wide[0]
+    for slot in wide.columns[1:]:
+        joined = joined + (', ' + wide[slot]).fillna('')
+    return '[' + joined + ']'
+
+
+def reduce_dimension(positions, dimension, by, counterpart):
+    """Sum the positions up to one dashboard dimension"""
+    grouped = positions.groupby(by, sort=False)
+    frame = grouped[MEASURES].sum()
+    frame['counterparties'] = grouped[counterpart].nunique()
+    if dimension == 'stock':
+        frame['label'] = grouped['stock_name'].first()
+        frame['sector'] = grouped['sector'].first()
+        frame['top_buyers'] = top_names(positions, by, 'client_name', 'buy_value', TOP_CLIENTS)
+        frame['top_sellers'] = top_names(positions, by, 'client_name', 'sell_value', TOP_CLIENTS)
+    elif dimension == 'investor':
+        frame['label'] = frame.index.get_level_values('client_name')
+        frame['investor_type'] = grouped['investor_type'].first()
+        traded = positions.assign(traded=positions['buy_value'] + positions['sell_value'])
+        by_sector = traded.groupby(by + ['sector'], sort=False)['traded'].sum().reset_index()
+        frame['top_sectors'] = top_names(by_sector, by, 'sector', 'traded', TOP_SECTORS)
+    elif dimension == 'sector':
+        frame['label'] = frame.index.get_level_values('sector')
+
+    frame = frame.reset_index()
+    frame['key'] = frame[by[-1]] if len(by) > 1 else 'ALL'
+    frame['dimension'] = dimension
+    return frame
+
+
+def compute_aggregates(df, deal_source, names=None):
+    """deals_daily_aggregates rows for every day in a source frame
+
+    With a ClientNameIndex, spelling variants of one client are counted as the
+    same investor under its canonical name
+    """
+    if names is not None:
+        df = df.assign(client_name=names.canonical_names(df['client_name']).to_numpy())
+    deals = prepare_deals(df, SOURCES[deal_source][1])
+    if deals.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    positions = deal_positions(deals)
+    frames = [
+        reduce_dimension(positions, 'market', ['date'], 'symbol'),
+        reduce_dimension(positions, 'sector', ['date', 'sector'], 'symbol'),
+        reduce_dimension(positions, 'stock', ['date', 'symbol'], 'client_name'),
+        reduce_dimension(positions, 'investor', ['date', 'client_name'], 'symbol'),
+    ]
+    result = pd.concat(frames, ignore_index=True).reindex(columns=COLUMNS)
+    result['deal_source'] = deal_source
+    result['net_flow'] = result['buy_value'] - result['sell_value']
+    result[['buy_value', 'sell_value', 'net_flow']] = result[['buy_value', 'sell_value', 'net_flow']].round(2)
+    return result
+
+
+def load_deals(conn, deal_source, dates):
+    """Deal rows of one source table for the given days"""
+    table, price_col = SOURCES[deal_source]
+    columns = ['date', 'symbol', 'stock_name', 'client_name', 'deal_type', 'quantity', price_col]
+    query = sql.SQL("SELECT {} FROM {} WHERE date = ANY(%s::date[])").format(
+        sql.SQL(', ').join(map(sql.Identifier, columns)), sql.Identifier(table))
+    with conn.cursor() as cur:
+        cur.execute(query, (list(dates),))
+        return pd.DataFrame(cur.fetchall(), columns=columns)
+
+
+def refresh_days(conn, deal_source, dates, names=None):
+    """Recompute one source's aggregates for the given days; returns rows written"""
+    dates = sorted({str(d)[:10] for d in dates})
+    if not dates:
+        return 0
+    aggregates = compute_aggregates(load_deals(conn, deal_source, dates), deal_source, names)
+    # Days whose deals were deleted upstream must not keep stale rows; delete and reload in one
+    # transaction so a failed load leaves the previous aggregates in place
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DELETE FROM {TABLE} WHERE deal_source = %s AND date = ANY(%s::date[])",
+                        (deal_source, dates))
+            return stage_and_upsert(cur, TABLE, [aggregates])
+
+
+def source_dates(conn, deal_source, since=None):
+    table = SOURCES[deal_source][0]
+    query = sql.SQL("SELECT DISTINCT date FROM {}").format(sql.Identifier(table))
+    with conn.cursor() as cur:
+        if since:
+            cur.execute(query + sql.SQL(" WHERE date >= %s"), (since,))
+        else:
+            cur.execute(query)
+        return [row[0] for row in cur.fetchall()]
+
+
+def summarize(aggregates):
+    """KPI view over a range, the way the dashboard reads the stored days
+
+    Only additive columns are summed; counterparties and the top_* lists hold for a single day
+    """
+    market = aggregates[aggregates['dimension'] == 'market']
+    stocks = aggregates[aggregates['dimension'] == 'stock'].groupby(['key', 'label'])['deal_count'].sum()
+    most_active = stocks.idxmax() if len(stocks) else (None, None)
+    return {
+        'totalBuying': round(market['buy_value'].sum(), 2),
+        'totalSelling': round(market['sell_value'].sum(), 2),
+        'netFlow': round(market['net_flow'].sum(), 2),
+        'totalDeals': int(market['deal_count'].sum()),
+        'buyDeals': int(market['buy_deals'].sum()),
+        'sellDeals': int(market['sell_deals'].sum()),
+        'mostActiveStock': most_active[0],
+    }
+
+
+def benchmark(rows=1_000_000):
+    """Aggregate a synthetic bulk-deals file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bulk_deals.csv')
+        write_synthetic_deals(path, rows)
+        df = pd.concat(iter_chunks(path, 'bulk_deals'), ignore_index=True)
+    start = time.perf_counter()
+    aggregates = compute_aggregates(df, 'bulk')
+    elapsed = time.perf_counter() - start
+    print(f"bulk: {len(df):,} deals over {df['date'].nunique():,} days -> {len(aggregates):,} aggregate rows "
+          f"in {elapsed:.2f}s ({len(df) / elapsed:,.0f} deals/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute bulk/block deal aggregates per day')
+    parser.add_argument('sources', nargs='*', default=sorted(SOURCES), help='bulk and/or block (default: both)')
+    parser.add_argument('--dates', nargs='+', help='Only recompute these days (YYYY-MM-DD)')
+    parser.add_argument('--since', help='Only recompute days from here (YYYY-MM-DD)')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--csv', help='Aggregate a deals template CSV instead of the DB (one source)')
+    parser.add_argument('--output', help='With --csv, write the aggregates to this CSV')
+    parser.add_argument('--resolve-names', action='store_true',
+                        help='Merge spelling variants of client names through the client-name index')
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', help='Time aggregation of ROWS synthetic deals')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"Unknown sources: {', '.join(sorted(unknown))}")
+
+    if args.csv:
+        if len(args.sources) != 1:
+            parser.error('--csv needs exactly one source (bulk or block)')
+        source = args.sources[0]
+        df = pd.concat(iter_chunks(args.csv, SOURCES[source][0]), ignore_index=True)
+        names = ClientNameIndex() if args.resolve_names else None
+        aggregates = compute_aggregates(df, source, names)
+        print(f"{source}: {len(df)} deals -> {len(aggregates)} aggregate rows")
+        if names is not None:
+            print(f"   client names: {names.summary()}")
+            names.close()
+        print(json.dumps(summarize(aggregates), indent=2))
+        if args.output:
+            aggregates.to_csv(args.output, index=False)
+            print(f"✅ Saved to {args.output}")
+        return
+
+    conn = connect(args.dsn)
+    names = ClientNameIndex() if args.resolve_names else None
+    try:
+        for source in args.sources:
+            dates = args.dates or source_dates(conn, source, args.since)
+            rows = refresh_days(conn, source, dates, names)
+            print(f"✅ {source}: {len(dates)} days recomputed, {rows} aggregate rows written")
+    finally:
+        conn.close()
+        if names is not None:
+            names.close()
+
+
+if __name__ == "__main__":
+    main()
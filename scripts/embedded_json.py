@@ -0,0 +1,153 @@
+"""
+Embedded JSON Extraction
+Reads the `var data = ...` style payloads Trendlyne embeds in <script> tags
+straight from the raw page text into column arrays, without building a DOM
+or running pandas' HTML table parser
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from table_extraction import parse_html_tables, type_columns
+
+# `var data = `, `const chartData = `, `let tableData = ` ...
+ASSIGNMENT_RE = re.compile(r'\b(?:var|let|const)\s+([A-Za-z_$][\w$]*)\s*=\s*(?=[\[{])')
+
+# Keys that hold the row matrix / header list in {columns: [...], data: [[...]]} payloads
+HEADER_KEYS = ('columns', 'headers', 'header')
+ROW_KEYS = ('data', 'rows', 'values')
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'trendlyne')
+
+decoder = json.JSONDecoder()
+
+
+def iter_embedded_json(html, name_filter='data'):
+    """Yield (variable name, payload) for every JSON literal assigned in the page"""
+    for match in ASSIGNMENT_RE.finditer(html):
+        name = match.group(1)
+        if name_filter and name_filter not in name.lower():
+            continue
+        try:
+            # raw_decode stops at the end of the literal, so only the payload
+            # itself is decoded and the rest of the page is never touched
+            payload, _ = decoder.raw_decode(html, match.end())
+        except json.JSONDecodeError:
+            # Not strict JSON (JS object literal, function call, ...)
+            continue
+        yield name, payload
+
+
+def records_to_columns(records):
+    """Turn a list of row dicts into {column: values}"""
+    columns = {}
+    for i, record in enumerate(records):
+        for key, value in record.items():
+            if key not in columns:
+                columns[key] = [None] * i
+            columns[key].append(value)
+        for key, values in columns.items():
+            if len(values) <= i:
+                values.append(None)
+    return columns
+
+
+def payload_to_columns(payload):
+    """Find the first tabular structure in a payload and return it as {column: values}"""
+    if isinstance(payload, list):
+        if payload and all(isinstance(r, dict) for r in payload):
+            return records_to_columns(payload)
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+
+    header_key = next((k for k in HEADER_KEYS if isinstance(payload.get(k), list)), None)
+    row_key = next((k for k in ROW_KEYS if isinstance(payload.get(k), list)), None)
+    if header_key and row_key:
+        headers = [h['title'] if isinstance(h, dict) and 'title' in h else h for h in payload[header_key]]
+        rows = payload[row_key]
+        if all(isinstance(r, list) for r in rows):
+            return {h: [r[i] if i < len(r) else None for r in rows] for i, h in enumerate(headers)}
+
+    lists = {k: v for k, v in payload.items() if isinstance(v, list)}
+    lengths = {len(v) for v in lists.values()}
+    if len(lists) > 1 and len(lengths) == 1 and not any(
+            isinstance(x, (dict, list)) for v in lists.values() for x in v[:1]):
+        return lists
+
+    # Payloads are often wrapped: {"status": ..., "body": {"tableData": [...]}}
+    for value in payload.values():
+        if isinstance(value, (dict, list)):
+            columns = payload_to_columns(value)
+            if columns:
+                return columns
+    return None
+
+
+def extract_json_tables(html, name_filter='data'):
+    """Extract every embedded JSON table in the page as typed DataFrames"""
+    tables = []
+    for _, payload in iter_embedded_json(html, name_filter):
+        columns = payload_to_columns(payload)
+        if columns:
+            tables.append(type_columns(pd.DataFrame(columns)))
+    return tables
+
+
+def parse_page(html):
+    """Prefer embedded JSON; fall back to HTML tables when the page has none"""
+    return extract_json_tables(html) or parse_html_tables(html)
+
+
+def check_fixtures(fixture_dir=DEFAULT_FIXTURE_DIR):
+    """Compare the JSON path with HTML table parsing on saved fixture pages"""
+    ok = True
+    for file_name in sorted(os.listdir(fixture_dir)):
+        if not file_name.endswith('.html'):
+            continue
+        with open(os.path.join(fixture_dir, file_name), encoding='utf-8') as f:
+            html = f.read()
+
+        start = time.perf_counter()
+        json_tables = extract_json_tables(html)
+        json_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        html_tables = parse_html_tables(html)
+        html_time = time.perf_counter() - start
+
+        if not json_tables or not html_tables:
+            print(f"❌ {file_name}: json={len(json_tables)} html={len(html_tables)} tables")
+            ok = False
+            continue
+
+        json_df, html_df = json_tables[0], html_tables[0]
+        try:
+            pd.testing.assert_frame_equal(json_df, html_df, check_dtype=False)
+            same = True
+        except AssertionError as e:
+            print(e)
+            same = False
+        ok &= same
+        print(f"{'✅' if same else '❌'} {file_name}: {len(json_df)} rows, "
+              f"json {json_time * 1000:.1f}ms vs html {html_time * 1000:.1f}ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check embedded JSON extraction against fixture pages')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_DIR)
+    args = parser.parse_args()
+
+    if not check_fixtures(args.fixtures):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,14 +8,18 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-import pandas as pd
-import time
 from datetime import datetime
 
-def setup_driver():
+from browser_pool import wait_for_page_ready, wait_for_table
+from fii_dii_transform import MONTHLY_SPEC, transform
+from parquet_cache import write_dataset
+from table_extraction import extract_table
+
+def setup_driver(headless=False):
     """Setup Chrome driver with options"""
     chrome_options = Options()
-    # chrome_options.add_argument('--headless')  # Uncomment for headless mode
+    if headless:
+        chrome_options.add_argument('--headless')
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
     chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
@@ -23,51 +27,28 @@ def setup_driver():
     driver = webdriver.Chrome(options=chrome_options)
     return driver
 
-def get_financial_year(date_str):
-    """Convert date to financial year"""
-    date = pd.to_datetime(date_str)
-    if date.month >= 4:
-        return f"FY {date.year}-{str(date.year + 1)[-2:]}"
-    else:
-        return f"FY {date.year - 1}-{str(date.year)[-2:]}"
-
 def extract_cash_provisional_data(driver):
     """Extract Cash Provisional data"""
     url = 'https://trendlyne.com/macro-data/fii-dii/latest/cash-pastmonth/'
     driver.get(url)
     
-    # Wait for page to load
-    time.sleep(3)
-    
     try:
+        # Wait for page to load
+        wait_for_page_ready(driver)
+        
         # Click on "Monthly" tab
         monthly_tab = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Monthly')]"))
         )
         monthly_tab.click()
-        time.sleep(2)
         
-        # Find the data table
-        table = driver.find_element(By.TAG_NAME, 'table')
+        # Find the data table once the tab's requests have settled
+        table = wait_for_table(driver)
         
-        # Extract table data
-        rows = table.find_elements(By.TAG_NAME, 'tr')
+        # Extract the whole table in a single WebDriver call
+        df = extract_table(driver, table)
         
-        data = []
-        headers = []
-        
-        for idx, row in enumerate(rows):
-            cells = row.find_elements(By.TAG_NAME, 'td')
-            if not cells:  # Header row
-                cells = row.find_elements(By.TAG_NAME, 'th')
-                headers = [cell.text.strip() for cell in cells]
-            else:
-                row_data = [cell.text.strip() for cell in cells]
-                data.append(row_data)
-        
-        # Create DataFrame
-        if headers and data:
-            df = pd.DataFrame(data, columns=headers)
+        if not df.empty:
             print("Extracted Cash Provisional Data:")
             print(df.head())
             return df
@@ -80,37 +61,18 @@ def extract_fii_cash_data(driver):
     """Extract FII Cash data"""
     url = 'https://trendlyne.com/macro-data/fii-dii/latest/fii-cash/'
     driver.get(url)
-    time.sleep(3)
     
     try:
-        # Similar extraction logic
-        table = driver.find_element(By.TAG_NAME, 'table')
-        # Extract and process...
-        pass
+        table = wait_for_table(driver)
+        return extract_table(driver, table)
     except Exception as e:
         print(f"Error extracting FII cash data: {e}")
         return None
 
 def convert_to_monthly_format(df):
     """Convert extracted data to monthly CSV format"""
-    # Transform data to match our template
-    monthly_data = []
-    
-    for _, row in df.iterrows():
-        monthly_row = {
-            'Date': row.get('Date', ''),
-            'FII_Equity': row.get('FII Equity', 0),
-            'FII_Debt': row.get('FII Debt', 0),
-            'FII_Derivatives': row.get('FII Derivatives', 0),
-            'FII_Total': row.get('FII Total', 0),
-            'DII_Equity': row.get('DII Equity', 0),
-            'DII_Debt': row.get('DII Debt', 0),
-            'DII_Derivatives': row.get('DII Derivatives', 0),
-            'DII_Total': row.get('DII Total', 0)
-        }
-        monthly_data.append(monthly_row)
-    
-    return pd.DataFrame(monthly_data)
+    # Transform data to match our template (see MONTHLY_SPEC)
+    return transform(df, MONTHLY_SPEC)
 
 def main():
     """Main execution function"""
@@ -134,6 +96,7 @@ def main():
         if cash_df is not None:
             # Convert to our format
             monthly_df = convert_to_monthly_format(cash_df)
+            write_dataset(monthly_df, 'fii_dii_monthly', date_col='Date')
             
             # Save to CSV
             output_file = '../public/templates/fii_dii_monthly_extracted.csv'
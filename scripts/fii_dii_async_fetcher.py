@@ -0,0 +1,135 @@
+"""
+Concurrent FII/DII Fetcher for Trendlyne
+Fetches every segment in URLS over one pooled keep-alive session with
+a per-host token bucket, bounded concurrency and retry with backoff
+"""
+
+import asyncio
+import random
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from embedded_json import parse_page
+from http_cache import UNCHANGED
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Status codes worth retrying; any other error status is raised immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """Keeps one token bucket per host so different sites don't throttle each other"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+
+    async def acquire(self, url):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        await self.buckets[host].acquire()
+
+
+async def fetch_page(session, url, limiter, semaphore, retries=3, backoff=1.0, headers=None, params=None):
+    """Fetch one page, retrying transient failures with exponential backoff
+
+    Returns (status, body bytes, response headers); status is 304 when a
+    conditional request finds the cached copy still current
+    """
+    for attempt in range(retries + 1):
+        await limiter.acquire(url)
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers, params=params) as response:
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return response.status, await response.read(), response.headers
+                    error = f"HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if isinstance(e, aiohttp.ClientResponseError) and e.status not in RETRY_STATUSES:
+                raise
+            error = str(e) or type(e).__name__
+
+        if attempt == retries:
+            raise RuntimeError(f"Giving up on {url} after {retries + 1} attempts: {error}")
+        delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+        print(f"Retrying {url} in {delay:.1f}s ({error})")
+        await asyncio.sleep(delay)
+
+
+async def fetch_all_segments_async(urls, rate=1.0, burst=2, concurrency=4,
+                                   retries=3, backoff=1.0, timeout=30, parser=parse_page, cache=None):
+    """Fetch and parse every segment concurrently; returns {segment: tables or None}
+
+    With an HTTPCache, fresh pages are not re-downloaded, stale ones are
+    revalidated, and a segment whose body is identical to the last one parsed
+    maps to UNCHANGED instead of being parsed again
+    """
+    limiter = HostRateLimiter(rate, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=60)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector,
+                                     timeout=client_timeout) as session:
+
+        async def fetch_segment(data_type, url):
+            entry = cache.lookup(url) if cache else None
+            try:
+                if entry is not None and cache.is_fresh(entry):
+                    page = cache.page_from_entry(entry, 200)
+                else:
+                    headers = cache.conditional_headers(entry) if cache else None
+                    status, body, response_headers = await fetch_page(
+                        session, url, limiter, semaphore, retries, backoff, headers)
+                    if cache is None:
+                        return data_type, parser(body.decode('utf-8', errors='replace'))
+                    page = cache.revalidated(url, entry, status, body, response_headers)
+            except Exception as e:
+                print(f"Error fetching {data_type}: {e}")
+                return data_type, None
+
+            if not page.changed:
+                return data_type, UNCHANGED
+            tables = parser(page.text)
+            cache.mark_processed(page)
+            return data_type, tables
+
+        results = await asyncio.gather(*(fetch_segment(k, v) for k, v in urls.items()))
+
+    return dict(results)
+
+
+def fetch_all_segments(urls, **kwargs):
+    """Blocking wrapper around fetch_all_segments_async"""
+    return asyncio.run(fetch_all_segments_async(urls, **kwargs))
+
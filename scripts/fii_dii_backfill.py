@@ -0,0 +1,201 @@
+"""
+FII/DII Historical Backfill
+Splits a date range into month or financial-year shards, extracts them on a
+worker pool and checkpoints after every shard so interrupted runs can resume
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+from fii_dii_async_fetcher import HEADERS
+from fii_dii_calendar import get_financial_year
+from incremental_sync import SyncState
+from parquet_cache import write_dataset
+from table_extraction import parse_html_tables
+
+DEFAULT_OUTPUT_DIR = '../public/templates/backfill'
+
+
+def make_shards(start, end, mode='month'):
+    """Split [start, end] into month or financial-year shards"""
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    if end < start:
+        raise ValueError(f"End date {end.date()} is before start date {start.date()}")
+
+    shards = []
+    current = start
+    while current <= end:
+        if mode == 'month':
+            key = current.strftime('%Y-%m')
+            period_end = current + pd.offsets.MonthEnd(0)
+        elif mode == 'fy':
+            key = get_financial_year(current)
+            fy_end_year = current.year + 1 if current.month >= 4 else current.year
+            period_end = pd.Timestamp(year=fy_end_year, month=3, day=31)
+        else:
+            raise ValueError(f"Unknown shard mode: {mode}")
+
+        shard_end = min(period_end, end)
+        shards.append({
+            'key': key,
+            'start': current.strftime('%Y-%m-%d'),
+            'end': shard_end.strftime('%Y-%m-%d'),
+        })
+        current = shard_end + pd.Timedelta(days=1)
+
+    return shards
+
+
+def load_checkpoint(path):
+    """Load checkpoint state, or an empty state if none exists"""
+    if not os.path.exists(path):
+        return {'completed': {}, 'failed': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    """Write checkpoint atomically so a crash never leaves a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def shard_done(shard, completed):
+    """Whether a completed run of the shard's key already covered its whole date range
+
+    Checkpoints without a recorded range are refetched
+    """
+    done = completed.get(shard['key'])
+    return bool(done) and done.get('start', '9999') <= shard['start'] and done.get('end', '') >= shard['end']
+
+
+def widen_to_done(shard, completed):
+    """The shard stretched over the range an earlier run of its key fetched
+
+    Refetching just the newly requested days would overwrite the shard file and
+    checkpoint with a subset; the union keeps what was already there
+    """
+    done = completed.get(shard['key'])
+    if not done or 'start' not in done:
+        return shard
+    return {**shard, 'start': min(shard['start'], done['start']), 'end': max(shard['end'], done['end'])}
+
+
+def filter_date_range(df, start, end, date_col='Date'):
+    """Keep only rows whose date falls inside [start, end]"""
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    return df[(dates >= start) & (dates <= end)]
+
+
+def trendlyne_shard_fetcher(url_template):
+    """Build a shard fetcher that formats url_template with {start}/{end}/{key}"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+
+    def fetch(shard):
+        url = url_template.format(**shard)
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+
+        tables = [t for t in parse_html_tables(response.text) if 'Date' in t.columns or 'DATE' in t.columns]
+        if not tables:
+            return None
+        df = max(tables, key=len).rename(columns={'DATE': 'Date'})
+        return filter_date_range(df, shard['start'], shard['end'])
+
+    return fetch
+
+
+def run_backfill(start, end, fetch_shard, name, mode='month', workers=4,
+                 output_dir=DEFAULT_OUTPUT_DIR, checkpoint_path=None):
+    """Extract every pending shard in parallel, checkpointing as each one finishes"""
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(output_dir, f"{name}_checkpoint.json")
+    state = load_checkpoint(checkpoint_path)
+    state_lock = threading.Lock()
+
+    shards = make_shards(start, end, mode)
+    # A shard fetched only partly (its range started or ended mid-period) is fetched again when asked for more
+    pending = [widen_to_done(s, state['completed']) for s in shards if not shard_done(s, state['completed'])]
+    print(f"{len(shards)} shards, {len(shards) - len(pending)} already done, {len(pending)} to fetch")
+
+    def run_shard(shard):
+        df = fetch_shard(shard)
+        rows = 0 if df is None else len(df)
+        output_file = None
+        if rows:
+            safe_key = shard['key'].replace(' ', '_')
+            output_file = os.path.join(output_dir, f"{name}_{safe_key}.csv")
+            df.to_csv(output_file, index=False)
+            write_dataset(df, name, date_col='Date')
+        return {'rows': rows, 'file': output_file}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_shard, shard): shard for shard in pending}
+        for future in as_completed(futures):
+            shard = futures[future]
+            with state_lock:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ {shard['key']}: {e}")
+                    state['failed'][shard['key']] = str(e)
+                else:
+                    print(f"✅ {shard['key']}: {result['rows']} rows")
+                    state['failed'].pop(shard['key'], None)
+                    state['completed'][shard['key']] = {
+                        **result,
+                        'start': shard['start'],
+                        'end': shard['end'],
+                        'finished_at': datetime.now().isoformat(timespec='seconds'),
+                    }
+                save_checkpoint(checkpoint_path, state)
+
+    print(f"\nCompleted {len(state['completed'])}/{len(shards)} shards")
+    if state['failed']:
+        print(f"Failed shards (rerun to retry): {', '.join(sorted(state['failed']))}")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill FII/DII history in resumable shards')
+    parser.add_argument('--start', help='First date (YYYY-MM-DD)')
+    parser.add_argument('--since-last-sync', action='store_true',
+                        help="Start the day after <name>'s incremental-sync high-water mark")
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'), help='Last date (YYYY-MM-DD)')
+    parser.add_argument('--shard', choices=['month', 'fy'], default='month')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--name', default='fii_dii', help='Prefix for shard files and checkpoint')
+    parser.add_argument('--url-template', required=True,
+                        help='Page URL with {start}, {end} and/or {key} placeholders')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output-dir>/<name>_checkpoint.json)')
+    args = parser.parse_args()
+
+    start = args.start
+    if args.since_last_sync:
+        with SyncState() as state:
+            last_date = state.high_water_mark(args.name)
+        if last_date:
+            start = (pd.Timestamp(last_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            print(f"Last synced date for {args.name}: {last_date}")
+    if not start:
+        parser.error('--start is required when there is no sync state to resume from')
+
+    run_backfill(start, args.end, trendlyne_shard_fetcher(args.url_template), args.name,
+                 mode=args.shard, workers=args.workers, output_dir=args.output_dir,
+                 checkpoint_path=args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+FII/DII Calendar
+Financial-year (Apr-Mar), month name and quarter labels, as used by the
+financial_year / month_name / quarter columns of the FII/DII tables
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = np.array(['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                        'August', 'September', 'October', 'November', 'December'])
+
+# Years covered by the precomputed lookup; dates outside it are computed directly
+LOOKUP_START_YEAR = 1990
+LOOKUP_END_YEAR = 2050
+
+
+def get_financial_year(date_str):
+    """Convert date to financial year (Apr-Mar)"""
+    date = pd.to_datetime(date_str)
+    if date.month >= 4:
+        return f"FY {date.year}-{str(date.year + 1)[-2:]}"
+    else:
+        return f"FY {date.year - 1}-{str(date.year)[-2:]}"
+
+
+def compute_labels(year, month):
+    """financial_year, month_name and quarter label arrays for year/month arrays"""
+    fy_start = np.where(month >= 4, year, year - 1)
+    fy_label = np.char.add(np.char.add(fy_start.astype(str), '-'),
+                           np.char.zfill(((fy_start + 1) % 100).astype(str), 2))
+    fiscal_quarter = ((month - 4) % 12) // 3 + 1
+    return (
+        np.char.add('FY ', fy_label).astype(object),
+        np.char.add(np.char.add(MONTH_NAMES[month - 1], ' '), year.astype(str)).astype(object),
+        np.char.add(np.char.add(np.char.add('Q', fiscal_quarter.astype(str)), ' FY'), fy_label).astype(object),
+    )
+
+
+@lru_cache(maxsize=None)
+def month_lookup(start_year=LOOKUP_START_YEAR, end_year=LOOKUP_END_YEAR):
+    """Labels for every month in [start_year, end_year], indexed by months since start"""
+    months = np.arange((end_year - start_year + 1) * 12)
+    return compute_labels(start_year + months // 12, months % 12 + 1)
+
+
+def calendar_fields(dates):
+    """financial_year, month_name and quarter for a whole date column at once"""
+    dates = pd.to_datetime(dates)
+    # Unparsed dates (NaT) get no labels
+    valid = dates.notna().to_numpy()
+    year = dates.dt.year.fillna(LOOKUP_START_YEAR).to_numpy().astype('int64')
+    month = dates.dt.month.fillna(1).to_numpy().astype('int64')
+
+    offset = (year - LOOKUP_START_YEAR) * 12 + (month - 1)
+    in_span = (year >= LOOKUP_START_YEAR) & (year <= LOOKUP_END_YEAR)
+    labels = [table.take(np.where(in_span, offset, 0)) for table in month_lookup()]
+
+    if not in_span.all():
+        outside = ~in_span
+        for table, computed in zip(labels, compute_labels(year[outside], month[outside])):
+            table[outside] = computed
+    if not valid.all():
+        for table in labels:
+            table[~valid] = None
+
+    return pd.DataFrame({
+        'financial_year': labels[0],
+        'month_name': labels[1],
+        'quarter': labels[2],
+    }, index=dates.index)
+
+
+def add_calendar_fields(df, date_col='Date'):
+    """Add financial_year, month_name and quarter columns to a frame"""
+    return pd.concat([df, calendar_fields(df[date_col])], axis=1)
+
+
+def check_against_scalar(start='1985-01-01', end='2055-12-31'):
+    """Verify the vectorised financial years match get_financial_year day by day"""
+    dates = pd.Series(pd.date_range(start, end))
+    expected = dates.map(get_financial_year)
+    actual = calendar_fields(dates)['financial_year']
+    mismatches = int((expected != actual).sum())
+    print(f"Checked {len(dates):,} dates: {mismatches} mismatches")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    if not check_against_scalar():
+        raise SystemExit(1)
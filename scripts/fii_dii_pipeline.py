@@ -0,0 +1,231 @@
+"""
+FII/DII Pipeline Orchestrator
+Runs extract -> transform -> validate -> load -> rollup for every dataset as one
+dependency graph, non-interactively, with independent datasets in parallel so a
+refresh takes as long as its slowest chain
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from graphlib import TopologicalSorter
+
+import pandas as pd
+
+from fii_dii_rollups import compute_rollups, db_frames, refresh_rollups
+from fii_dii_transform import MONTHLY_SPEC, TABLE_SPECS, transform
+from fii_dii_validation import DEFAULT_QUARANTINE_DIR, print_report, validate, write_quarantine
+from incremental_sync import write_delta
+from parquet_cache import write_dataset
+from pg_loader import connect, load_frame, record_upload
+
+TEMPLATES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'public', 'templates'))
+
+# Source CSV of each dataset, as exported into the input directory
+SOURCE_FILES = {
+    'fii_dii_cash_provisional': 'fii_dii_cash_provisional_template.csv',
+    'fii_cash_data': 'fii_cash_template.csv',
+    'fii_fo_indices_data': 'fii_fo_indices_template.csv',
+    'fii_fo_stocks_data': 'fii_fo_stocks_template.csv',
+    'dii_cash_data': 'dii_cash_template.csv',
+    'dii_fo_indices_data': 'dii_fo_indices_template.csv',
+    'dii_fo_stocks_data': 'dii_fo_stocks_template.csv',
+    'fii_dii_monthly': 'fii_dii_monthly_template.csv',
+}
+
+STAGES = ('extract', 'transform', 'validate', 'load', 'rollup')
+# The monthly summary has no table of its own (it is uploaded via the admin panel)
+MONTHLY_STAGES = ('extract', 'transform', 'validate', 'load')
+
+
+def dataset_stages(dataset):
+    return MONTHLY_STAGES if dataset == 'fii_dii_monthly' else STAGES
+
+
+def build_graph(datasets, stop_after=None):
+    """{'dataset:stage': {upstream nodes}} for the selected datasets"""
+    graph = {}
+    for dataset in datasets:
+        stages = dataset_stages(dataset)
+        if stop_after is not None:
+            stages = stages[:stages.index(stop_after) + 1] if stop_after in stages else stages
+        previous = None
+        for stage in stages:
+            node = f"{dataset}:{stage}"
+            graph[node] = {previous} if previous else set()
+            previous = node
+    return graph
+
+
+class PipelineRun:
+    """Settings and stage outputs shared by the stages of one run"""
+
+    def __init__(self, args):
+        self.input_dir = args.input_dir
+        self.output_dir = args.output_dir
+        self.quarantine_dir = args.quarantine_dir
+        self.since = pd.Timestamp(args.since) if args.since else None
+        self.dry_run = args.dry_run
+        self.monthly_source = args.monthly_source
+        self.dsn = args.dsn
+        self.outputs = {}
+        self.lock = threading.Lock()
+
+    def spec(self, dataset):
+        return MONTHLY_SPEC if dataset == 'fii_dii_monthly' else TABLE_SPECS[dataset]
+
+    # Stages take the dataset name and the upstream stage's output
+
+    def extract(self, dataset, _):
+        if dataset == 'fii_dii_monthly' and self.monthly_source == 'trendlyne':
+            # Imported here so the CSV datasets run without selenium installed
+            from trendlyne_fii_dii_extractor import extract_batch
+            raw = extract_batch(workers=2)
+            if raw is None:
+                raise RuntimeError('Trendlyne extraction returned no table')
+            return raw
+        return pd.read_csv(os.path.join(self.input_dir, SOURCE_FILES[dataset]), dtype=str)
+
+    def transform(self, dataset, raw):
+        spec = self.spec(dataset)
+        frame = transform(raw, spec, calendar=dataset != 'fii_dii_monthly', fill_value=None)
+        if self.since is not None:
+            dates = pd.to_datetime(frame[spec['date_col']], errors='coerce')
+            # Unreadable dates are kept for the validator to report
+            frame = frame[(dates >= self.since) | dates.isna()]
+        return frame
+
+    def validate(self, dataset, frame):
+        clean, quarantined, report = validate(frame, self.spec(dataset), dataset,
+                                              daily=dataset != 'fii_dii_monthly')
+        with self.lock:
+            print_report(report, limit=5)
+        if not self.dry_run:
+            write_quarantine(quarantined, report, self.quarantine_dir)
+        return clean
+
+    def load(self, dataset, clean):
+        if self.dry_run:
+            return f"{len(clean)} rows would be loaded"
+        if dataset == 'fii_dii_monthly':
+            write_dataset(clean, dataset, date_col='Date')
+            path = write_delta(clean, dataset, self.output_dir)
+            return f"delta written to {path}" if path else 'already up to date'
+        conn = connect(self.dsn)
+        try:
+            rows = load_frame(conn, dataset, clean)
+            record_upload(conn, dataset, SOURCE_FILES[dataset], clean)
+        finally:
+            conn.close()
+        return f"{rows} rows upserted"
+
+    def rollup(self, dataset, _):
+        clean = self.outputs[f"{dataset}:validate"]
+        if clean.empty:
+            return 'no changed dates'
+        if self.dry_run:
+            # Computed from the validated rows alone, nothing is written
+            daily, period = map(len, db_frames(dataset, *compute_rollups(clean, dataset, clean['date'])))
+        else:
+            conn = connect(self.dsn)
+            try:
+                daily, period = refresh_rollups(conn, dataset, clean['date'].tolist())
+            finally:
+                conn.close()
+        return f"{daily} daily flow rows, {period} period rollups"
+
+    def run_node(self, node, upstream):
+        dataset, stage = node.split(':')
+        start = time.perf_counter()
+        result = getattr(self, stage)(dataset, self.outputs.get(upstream))
+        return result, time.perf_counter() - start
+
+
+def describe(result):
+    if isinstance(result, pd.DataFrame):
+        return f"{len(result):,} rows"
+    return str(result)
+
+
+def run_graph(run, graph, workers=4):
+    """Run every node once its upstream node succeeded; returns {node: (status, seconds, detail)}"""
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()
+    results = {}
+    failed = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while sorter.is_active():
+            for node in sorter.get_ready():
+                upstream = next(iter(graph[node]), None)
+                if upstream in failed:
+                    # Everything downstream of a failure is skipped, other datasets carry on
+                    failed.add(node)
+                    results[node] = ('skipped', 0.0, f"{upstream} did not run")
+                    sorter.done(node)
+                    continue
+                running[pool.submit(run.run_node, node, upstream)] = node
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    output, elapsed = future.result()
+                except Exception as e:
+                    failed.add(node)
+                    message = (str(e).strip().splitlines() or [type(e).__name__])[0]
+                    results[node] = ('failed', 0.0, message)
+                    print(f"❌ {node}: {message}")
+                else:
+                    run.outputs[node] = output
+                    results[node] = ('ok', elapsed, describe(output))
+                    print(f"✅ {node} ({elapsed:.2f}s): {describe(output)}")
+                sorter.done(node)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the FII/DII extract -> load -> rollup pipeline')
+    parser.add_argument('--only', nargs='+', choices=sorted(SOURCE_FILES), metavar='DATASET',
+                        help=f"Datasets to run (default: all): {', '.join(sorted(SOURCE_FILES))}")
+    parser.add_argument('--since', help='Only process rows dated on or after this day (YYYY-MM-DD)')
+    parser.add_argument('--stop-after', choices=STAGES, help='Last stage to run')
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Run every stage without writing to the DB, quarantine or outputs")
+    parser.add_argument('--input-dir', default=TEMPLATES_DIR, help='Directory holding the source CSVs')
+    parser.add_argument('--output-dir', default=os.path.join(TEMPLATES_DIR, 'deltas'),
+                        help='Where the monthly delta CSV is written')
+    parser.add_argument('--quarantine-dir', default=DEFAULT_QUARANTINE_DIR)
+    parser.add_argument('--monthly-source', choices=['trendlyne', 'csv'], default='trendlyne',
+                        help='Extract the monthly summary with a headless browser or from --input-dir')
+    parser.add_argument('--workers', type=int, default=4, help='Stages run at the same time')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    args = parser.parse_args()
+
+    datasets = args.only or list(SOURCE_FILES)
+    graph = build_graph(datasets, args.stop_after)
+    print(f"🚀 {len(graph)} stages across {len(datasets)} datasets on {args.workers} workers"
+          f"{' (dry run)' if args.dry_run else ''}")
+
+    start = time.perf_counter()
+    results = run_graph(PipelineRun(args), graph, args.workers)
+    wall = time.perf_counter() - start
+
+    print("\n" + "=" * 70)
+    for node in graph:
+        status, elapsed, detail = results[node]
+        print(f"{node:<35} {status:<8} {elapsed:6.2f}s  {detail}")
+    stage_time = sum(elapsed for _, elapsed, _ in results.values())
+    print(f"\nWall time {wall:.2f}s for {stage_time:.2f}s of stage work")
+
+    if any(status != 'ok' for status, _, _ in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
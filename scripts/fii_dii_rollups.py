@@ -0,0 +1,200 @@
+"""
+FII/DII Rollups
+Aggregates the seven daily FII/DII tables into fii_dii_daily_flows (FY-to-date
+cumulative net, 5/20-day rolling averages) and fii_dii_period_rollups (month,
+quarter and FY sums), recomputing only the financial years a change touches
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from psycopg2 import sql
+
+from fii_dii_calendar import calendar_fields
+from fii_dii_transform import MEASURES, TABLE_SPECS, table_legs
+from pg_loader import connect, load_frame, prepare_frame
+
+ROLLING_WINDOWS = (5, 20)
+PERIOD_TYPES = ('month', 'quarter', 'financial_year')
+PERIOD_COLUMNS = {'month': 'month_name', 'quarter': 'quarter', 'financial_year': 'financial_year'}
+
+DAILY_TABLE = 'fii_dii_daily_flows'
+PERIOD_TABLE = 'fii_dii_period_rollups'
+
+# Calendar days loaded before the first affected FY so its first rolling
+# averages have a full 20 trading days behind them
+WARMUP_DAYS = 45
+
+
+def to_long(df, table):
+    """One row per date and leg with gross_purchase / gross_sales / net"""
+    dates = pd.to_datetime(df['date'])
+    parts = []
+    for leg, columns in table_legs(TABLE_SPECS[table]).items():
+        part = pd.DataFrame({measure: df[col].astype('float64').to_numpy()
+                             for measure, col in columns.items()})
+        part.insert(0, 'leg', leg)
+        part.insert(0, 'date', dates.to_numpy())
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True).sort_values(['leg', 'date'], ignore_index=True)
+
+
+def daily_flows(long):
+    """Add financial year, FY-to-date cumulative net and rolling averages"""
+    flows = pd.concat([long, calendar_fields(long['date'])], axis=1)
+    by_leg = flows.groupby('leg', sort=False)['net']
+    for window in ROLLING_WINDOWS:
+        flows[f"net_avg_{window}d"] = by_leg.transform(lambda s: s.rolling(window, min_periods=window).mean())
+    flows['cumulative_net_fy'] = flows.groupby(['leg', 'financial_year'], sort=False)['net'].cumsum()
+    return flows
+
+
+def period_rollups(flows):
+    """Month, quarter and FY sums per leg, with FY-to-date cumulative net"""
+    frames = []
+    for period_type in PERIOD_TYPES:
+        keyed = flows.assign(period=flows[PERIOD_COLUMNS[period_type]])
+        grouped = keyed.groupby(['leg', 'period'], sort=False).agg(
+            financial_year=('financial_year', 'first'),
+            period_start=('date', 'min'),
+            period_end=('date', 'max'),
+            trading_days=('date', 'size'),
+            gross_purchase=('gross_purchase', 'sum'),
+            gross_sales=('gross_sales', 'sum'),
+            net=('net', 'sum'),
+        ).reset_index()
+        grouped.insert(1, 'period_type', period_type)
+        frames.append(grouped)
+
+    rollups = pd.concat(frames, ignore_index=True)
+    rollups['avg_daily_net'] = rollups['net'] / rollups['trading_days']
+    rollups = rollups.sort_values(['leg', 'period_type', 'period_start'], ignore_index=True)
+    rollups['cumulative_net_fy'] = rollups.groupby(
+        ['leg', 'period_type', 'financial_year'], sort=False)['net'].cumsum()
+    return rollups
+
+
+def affected_years(flows, changed_dates):
+    """FYs containing a changed date, or one of the 19 trading days after it"""
+    trading_days = np.sort(flows['date'].unique())
+    changed = pd.to_datetime(pd.Series(changed_dates)).to_numpy()
+    start = np.searchsorted(trading_days, changed)
+    reach = max(ROLLING_WINDOWS) - 1
+    touched = np.unique(np.concatenate([
+        trading_days[s:s + reach + 1] for s in start
+    ])) if len(start) else trading_days[:0]
+    return set(calendar_fields(pd.Series(touched))['financial_year']) | \
+        set(calendar_fields(pd.Series(changed))['financial_year'])
+
+
+def compute_rollups(df, table, changed_dates=None):
+    """(daily flows, period rollups) for a source frame, limited to affected FYs if given"""
+    flows = daily_flows(to_long(df, table))
+    periods = period_rollups(flows)
+    if changed_dates is not None:
+        years = affected_years(flows, changed_dates)
+        flows = flows[flows['financial_year'].isin(years)]
+        periods = periods[periods['financial_year'].isin(years)]
+    return flows, periods
+
+
+def db_frames(table, flows, periods):
+    """Shape the computed frames for the rollup tables"""
+    daily = flows.assign(source_table=table, date=flows['date'].dt.strftime('%Y-%m-%d'))[
+        ['source_table', 'leg', 'date', 'financial_year', *MEASURES, 'cumulative_net_fy',
+         *[f"net_avg_{w}d" for w in ROLLING_WINDOWS]]
+    ]
+    period = periods.assign(
+        source_table=table,
+        period_start=periods['period_start'].dt.strftime('%Y-%m-%d'),
+        period_end=periods['period_end'].dt.strftime('%Y-%m-%d'),
+    )[['source_table', 'leg', 'period_type', 'period', 'financial_year', 'period_start', 'period_end',
+       'trading_days', *MEASURES, 'avg_daily_net', 'cumulative_net_fy']]
+    return daily.round(2), period.round(2)
+
+
+def load_source(conn, table, start=None):
+    """Daily rows of a source table from `start` onward"""
+    columns = ['date'] + [c for c in TABLE_SPECS[table]['columns'] if c != 'date']
+    query = sql.SQL("SELECT {} FROM {}").format(
+        sql.SQL(', ').join(map(sql.Identifier, columns)), sql.Identifier(table))
+    params = ()
+    if start is not None:
+        query += sql.SQL(" WHERE date >= %s")
+        params = (start,)
+    with conn.cursor() as cur:
+        cur.execute(query + sql.SQL(" ORDER BY date"), params)
+        return pd.DataFrame(cur.fetchall(), columns=columns)
+
+
+def fy_start(date):
+    date = pd.Timestamp(date)
+    return pd.Timestamp(year=date.year if date.month >= 4 else date.year - 1, month=4, day=1)
+
+
+def refresh_rollups(conn, table, changed_dates=None):
+    """Recompute and upsert rollups for one source table; returns (daily rows, period rows)"""
+    start = None
+    if changed_dates is not None:
+        if len(changed_dates) == 0:
+            return 0, 0
+        start = (fy_start(min(pd.to_datetime(changed_dates))) - pd.Timedelta(days=WARMUP_DAYS)).date()
+
+    df = load_source(conn, table, start)
+    if df.empty:
+        return 0, 0
+    flows, periods = compute_rollups(df, table, changed_dates)
+    daily, period = db_frames(table, flows, periods)
+    return load_frame(conn, DAILY_TABLE, daily), load_frame(conn, PERIOD_TABLE, period)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh FII/DII daily flows and period rollups')
+    parser.add_argument('tables', nargs='*', default=sorted(TABLE_SPECS), help='Source tables (default: all 7)')
+    parser.add_argument('--since', help='Dates from here (YYYY-MM-DD) changed; only their FYs are recomputed')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--csv', help='Compute from a template CSV instead of the DB (one table)')
+    parser.add_argument('--output-dir', help='With --csv, write the rollups here')
+    args = parser.parse_args()
+
+    unknown = set(args.tables) - set(TABLE_SPECS)
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(sorted(unknown))}")
+
+    if args.csv:
+        if len(args.tables) != 1:
+            parser.error('--csv needs exactly one source table')
+        table = args.tables[0]
+        df = prepare_frame(table, pd.read_csv(args.csv))
+        changed = None
+        if args.since:
+            dates = pd.to_datetime(df['date'])
+            changed = dates[dates >= pd.Timestamp(args.since)]
+        daily, period = db_frames(table, *compute_rollups(df, table, changed))
+        print(f"{table}: {len(daily)} daily flow rows, {len(period)} period rollups")
+        print(period[period['period_type'] == 'month'].tail(6).to_string(index=False))
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            daily.to_csv(os.path.join(args.output_dir, f"{table}_daily_flows.csv"), index=False)
+            period.to_csv(os.path.join(args.output_dir, f"{table}_period_rollups.csv"), index=False)
+        return
+
+    conn = connect(args.dsn)
+    try:
+        for table in args.tables:
+            changed = None
+            if args.since:
+                with conn.cursor() as cur:
+                    cur.execute(sql.SQL("SELECT date FROM {} WHERE date >= %s").format(sql.Identifier(table)),
+                                (args.since,))
+                    changed = [row[0] for row in cur.fetchall()]
+            daily, period = refresh_rollups(conn, table, changed)
+            print(f"✅ {table}: {daily} daily flow rows, {period} period rollups refreshed")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
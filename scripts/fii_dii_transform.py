@@ -0,0 +1,143 @@
+"""
+FII/DII Transform Stage
+Declarative column specs plus one vectorised transform that maps columns,
+parses Trendlyne-style numbers, normalises dates and derives calendar fields
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fii_dii_calendar import calendar_fields
+from table_extraction import parse_numeric
+
+# Output column -> source column names seen on Trendlyne pages / in our CSVs
+MONTHLY_SPEC = {
+    'date_col': 'Date',
+    'columns': {
+        'Date': ['Date', 'DATE'],
+        'FII_Equity': ['FII Equity', 'FII_Equity'],
+        'FII_Debt': ['FII Debt', 'FII_Debt'],
+        'FII_Derivatives': ['FII Derivatives', 'FII_Derivatives'],
+        'FII_Total': ['FII Total', 'FII_Total'],
+        'DII_Equity': ['DII Equity', 'DII_Equity'],
+        'DII_Debt': ['DII Debt', 'DII_Debt'],
+        'DII_Derivatives': ['DII Derivatives', 'DII_Derivatives'],
+        'DII_Total': ['DII Total', 'DII_Total'],
+    },
+}
+
+
+# Every flow leg is a gross purchase / gross sales / net triplet
+MEASURES = ('gross_purchase', 'gross_sales', 'net')
+
+
+def flow_spec(legs, suffix=''):
+    """Spec for a gross purchase / gross sales / net table keyed by date
+
+    legs maps the DB column prefix to the CSV template prefix, e.g.
+    {'equity': 'FII_EQUITY'} gives equity_gross_purchase <- FII_EQUITY_Gross_Purchase
+    """
+    columns = {'date': ['Date', 'DATE', 'date']}
+    for leg, source in legs.items():
+        for measure in ('Gross_Purchase', 'Gross_Sales', 'Net'):
+            columns[f"{leg}_{measure.lower()}{suffix.lower()}"] = [f"{source}_{measure}{suffix}"]
+    return {'date_col': 'date', 'columns': columns}
+
+
+# The seven FII/DII tables, mapped from their public/templates CSV formats
+TABLE_SPECS = {
+    'fii_dii_cash_provisional': flow_spec({'fii': 'FII', 'dii': 'DII'}),
+    'fii_cash_data': flow_spec({'equity': 'FII_EQUITY', 'debt': 'FII_DEBT'}),
+    'fii_fo_indices_data': flow_spec({'futures': 'FII_FUTURES', 'options': 'FII_OPTIONS'}, '_Indices'),
+    'fii_fo_stocks_data': flow_spec({'futures': 'FII_FUTURES', 'options': 'FII_OPTIONS'}),
+    'dii_cash_data': flow_spec({'equity': 'DII_EQUITY', 'debt': 'DII_DEBT'}),
+    'dii_fo_indices_data': flow_spec({'futures': 'DII_FUTURES', 'options': 'DII_OPTIONS'}, '_Indices'),
+    'dii_fo_stocks_data': flow_spec({'futures': 'DII_FUTURES', 'options': 'DII_OPTIONS'}),
+}
+
+
+def table_legs(spec):
+    """{leg: {measure: column}} for a flow spec, e.g. futures_indices -> futures_net_indices"""
+    legs = {}
+    for col in spec['columns']:
+        for measure in MEASURES:
+            if f"_{measure}" in col:
+                legs.setdefault(col.replace(f"_{measure}", '', 1), {})[measure] = col
+                break
+    return legs
+
+
+def parse_numeric_frame(df):
+    """Parse every cell of a frame as a number in a single vectorised pass"""
+    if df.empty or all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        return df.apply(pd.to_numeric, errors='coerce')
+    # Stack the columns end to end so the string ops run once over every cell
+    flat = pd.concat([df[col].astype(str) for col in df.columns], ignore_index=True)
+    values = parse_numeric(flat).to_numpy().reshape(df.shape[1], df.shape[0]).T
+    return pd.DataFrame(values, columns=df.columns, index=df.index)
+
+
+def transform(df, spec=MONTHLY_SPEC, calendar=False, fill_value=0):
+    """Apply a column spec to a raw extracted frame
+
+    fill_value=None keeps unparseable cells as NaN (and bad dates as NaT) so
+    fii_dii_validation can report them instead of loading zeros
+    """
+    date_col = spec['date_col']
+    aliases = {src: out for out, sources in spec['columns'].items() for src in sources}
+    columns = list(spec['columns'])
+    value_cols = [c for c in columns if c != date_col]
+
+    result = df.rename(columns=aliases).reindex(columns=columns)
+    values = parse_numeric_frame(result[value_cols])
+    result[value_cols] = values if fill_value is None else values.fillna(fill_value)
+    dates = pd.to_datetime(result[date_col], cache=True, errors='raise' if fill_value is not None else 'coerce')
+    result[date_col] = dates.dt.strftime('%Y-%m-%d')
+
+    if calendar:
+        result = pd.concat([result, calendar_fields(dates)], axis=1)
+    return result
+
+
+def synthetic_trendlyne_frame(rows, seed=0):
+    """Multi-year daily frame with Trendlyne-formatted numbers, for benchmarking"""
+    rng = np.random.default_rng(seed)
+    # ~20 years of trading days, repeated to reach the requested size
+    dates = pd.bdate_range(end='2025-09-18', periods=min(rows, 5200))
+    data = {'Date': np.resize(dates.strftime('%d %b %Y').to_numpy(), rows)}
+    for source in MONTHLY_SPEC['columns']:
+        if source == 'Date':
+            continue
+        values = rng.normal(0, 20000, rows).round(2)
+        text = pd.Series(values).map('{:,.2f}'.format)
+        # Some pages show negatives in parentheses
+        data[source.replace('_', ' ')] = text.where(values >= 0, '(' + text.str.lstrip('-') + ')')
+    return pd.DataFrame(data)
+
+
+def benchmark(rows=100_000, repeat=3):
+    """Time transform() on synthetic multi-year daily data"""
+    df = synthetic_trendlyne_frame(rows)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transform(df, calendar=True)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"transform: {rows:,} rows in {best:.3f}s ({rows / best:,.0f} rows/s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the FII/DII transform stage')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
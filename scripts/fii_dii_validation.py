@@ -0,0 +1,324 @@
+"""
+FII/DII Data-Quality Validator
+Checks transformed flow frames as whole arrays: net vs gross purchase - sales,
+component totals, unparseable cells, duplicate dates, trading-day gaps and
+outliers. Rows with errors are quarantined instead of being loaded as zeros
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fii_dii_transform import MONTHLY_SPEC, TABLE_SPECS, synthetic_trendlyne_frame, table_legs, transform
+
+# Errors quarantine the row; warnings are reported only. The last three are raised
+# by template_ingest for the non-flow templates
+ERROR_CHECKS = ('invalid_date', 'missing_value', 'negative_gross', 'net_mismatch', 'duplicate_date',
+                'invalid_value', 'empty_row', 'duplicate_key')
+WARNING_CHECKS = ('total_mismatch', 'non_trading_day', 'outlier', 'empty_column', 'trading_day_gap')
+
+# Each figure is rounded separately (₹ crore, 1-2 decimals), so allow rounding slack
+DEFAULT_TOLERANCE = 0.5
+# Robust z-score (median / MAD) above which a value is flagged
+DEFAULT_OUTLIER_Z = 12.0
+# Weekday runs longer than this without data are flagged (exchange holidays are shorter)
+DEFAULT_MAX_GAP_DAYS = 3
+
+DEFAULT_QUARANTINE_DIR = os.path.join(os.path.dirname(__file__), '.state', 'quarantine')
+
+
+def spec_for(name):
+    return MONTHLY_SPEC if name == 'fii_dii_monthly' else TABLE_SPECS[name]
+
+
+def table_totals(spec):
+    """{total column: component columns} for specs with <prefix>_Total columns"""
+    columns = [c for c in spec['columns'] if c != spec['date_col']]
+    return {
+        col: [c for c in columns if c != col and c.startswith(col[:-len('Total')])]
+        for col in columns if col.endswith('_Total')
+    }
+
+
+def cell_issues(check, mask, columns, values, dates, expected=None):
+    """One issue row per True cell of a rows x columns mask"""
+    rows, cols = np.nonzero(mask)
+    return pd.DataFrame({
+        'row': rows,
+        'date': dates[rows],
+        'check': check,
+        'column': np.asarray(columns, dtype=object)[cols],
+        'value': values[rows, cols],
+        'expected': expected[rows, cols] if expected is not None else np.nan,
+    })
+
+
+def row_issues(check, mask, dates):
+    rows = np.flatnonzero(mask)
+    return pd.DataFrame({'row': rows, 'date': dates[rows], 'check': check,
+                         'column': None, 'value': np.nan, 'expected': np.nan})
+
+
+def issue_labels(errors, rows):
+    """'net_mismatch,duplicate_date'-style label for each of the given rows"""
+    labels = np.full(len(rows), '', dtype=object)
+    for check in ERROR_CHECKS:
+        flagged = np.isin(rows, errors.loc[errors['check'] == check, 'row'].to_numpy())
+        labels = labels + np.where(flagged, check + ',', '')
+    return pd.Series(labels).str.rstrip(',').to_numpy()
+
+
+def trading_day_gaps(dates, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+    """Runs of more than max_gap_days weekdays with no data between consecutive dates"""
+    days = np.unique(dates.dropna().to_numpy().astype('datetime64[D]'))
+    if len(days) < 2:
+        return pd.DataFrame(columns=['after', 'before', 'missing_weekdays'])
+    missing = np.busday_count(days[:-1] + 1, days[1:])
+    wide = missing > max_gap_days
+    return pd.DataFrame({
+        'after': pd.to_datetime(days[:-1][wide]).strftime('%Y-%m-%d'),
+        'before': pd.to_datetime(days[1:][wide]).strftime('%Y-%m-%d'),
+        'missing_weekdays': missing[wide],
+    })
+
+
+class ValidationReport:
+    """Issues found in one frame, with per-check counts and the quarantined rows"""
+
+    def __init__(self, name, rows, issues, gaps, elapsed):
+        self.name = name
+        self.rows = rows
+        self.issues = issues
+        self.gaps = gaps
+        self.elapsed = elapsed
+
+    @property
+    def errors(self):
+        return self.issues[self.issues['severity'] == 'error']
+
+    @property
+    def bad_rows(self):
+        return np.unique(self.errors['row'].to_numpy())
+
+    @property
+    def ok(self):
+        return self.errors.empty
+
+    def counts(self):
+        counts = self.issues.groupby('check').size().to_dict()
+        if not self.gaps.empty:
+            counts['trading_day_gap'] = len(self.gaps)
+        return {check: int(counts[check]) for check in ERROR_CHECKS + WARNING_CHECKS if check in counts}
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'rows': self.rows,
+            'quarantined_rows': int(len(self.bad_rows)),
+            'counts': self.counts(),
+            'gaps': self.gaps.to_dict('records'),
+            'issues': json.loads(self.issues.to_json(orient='records')),
+            'elapsed_ms': round(self.elapsed * 1000, 2),
+        }
+
+    def summary(self):
+        counts = ', '.join(f"{check}={n}" for check, n in self.counts().items()) or 'no issues'
+        return (f"{self.name}: {self.rows:,} rows, {len(self.bad_rows):,} quarantined "
+                f"({counts}) in {self.elapsed * 1000:.1f} ms")
+
+
+def validate(df, spec, name=None, tolerance=DEFAULT_TOLERANCE, outlier_z=DEFAULT_OUTLIER_Z,
+             max_gap_days=DEFAULT_MAX_GAP_DAYS, daily=True):
+    """Check a frame from transform(..., fill_value=None); returns (clean, quarantined, report)"""
+    start = time.perf_counter()
+    date_col = spec['date_col']
+    value_cols = [c for c in spec['columns'] if c != date_col]
+    dates = pd.to_datetime(df[date_col], errors='coerce').reset_index(drop=True)
+    date_text = dates.dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    values = df[value_cols].to_numpy(dtype='float64')
+    position = {col: i for i, col in enumerate(value_cols)}
+    parts = []
+
+    parts.append(row_issues('invalid_date', dates.isna().to_numpy(), date_text))
+
+    # A column missing from the source altogether is a layout issue, not bad cells
+    nan = np.isnan(values)
+    empty = nan.all(axis=0) if len(df) else np.zeros(len(value_cols), dtype=bool)
+    parts.append(pd.DataFrame({'row': -1, 'date': None, 'check': 'empty_column',
+                               'column': np.asarray(value_cols, dtype=object)[empty],
+                               'value': np.nan, 'expected': np.nan}))
+    parts.append(cell_issues('missing_value', nan & ~empty, value_cols, values, date_text))
+
+    legs = table_legs(spec)
+    if legs:
+        triplets = [cols for cols in legs.values() if len(cols) == 3]
+        gross_cols = [cols[m] for cols in triplets for m in ('gross_purchase', 'gross_sales')]
+        gross = values[:, [position[c] for c in gross_cols]]
+        parts.append(cell_issues('negative_gross', gross < 0, gross_cols, gross, date_text))
+
+        net_cols = [cols['net'] for cols in triplets]
+        net = values[:, [position[c] for c in net_cols]]
+        expected = (values[:, [position[cols['gross_purchase']] for cols in triplets]]
+                    - values[:, [position[cols['gross_sales']] for cols in triplets]])
+        mismatch = np.abs(net - expected) > tolerance
+        parts.append(cell_issues('net_mismatch', mismatch, net_cols, net, date_text, expected.round(2)))
+
+    totals = table_totals(spec)
+    if totals:
+        total_cols = list(totals)
+        total = values[:, [position[c] for c in total_cols]]
+        expected = np.column_stack([
+            values[:, [position[c] for c in totals[col]]].sum(axis=1) for col in total_cols
+        ])
+        mismatch = np.abs(total - expected) > tolerance
+        parts.append(cell_issues('total_mismatch', mismatch, total_cols, total, date_text, expected.round(2)))
+
+    # Keep the last copy of a date, as the loader's upsert would
+    duplicated = dates.duplicated(keep='last').to_numpy() & dates.notna().to_numpy()
+    parts.append(row_issues('duplicate_date', duplicated, date_text))
+
+    if daily:
+        parts.append(row_issues('non_trading_day', (dates.dt.dayofweek >= 5).to_numpy(), date_text))
+
+    if len(df) >= 20:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            median = np.nanmedian(values, axis=0)
+            mad = np.nanmedian(np.abs(values - median), axis=0)
+            z = 0.6745 * (values - median) / mad
+        outliers = np.nan_to_num(np.abs(z), nan=0.0, posinf=0.0) > outlier_z
+        parts.append(cell_issues('outlier', outliers, value_cols, values, date_text))
+
+    issues = pd.concat([p for p in parts if not p.empty], ignore_index=True) if any(
+        not p.empty for p in parts) else parts[0]
+    issues['severity'] = np.where(issues['check'].isin(ERROR_CHECKS), 'error', 'warning')
+    issues = issues.sort_values(['row', 'check'], kind='stable', ignore_index=True)
+
+    gaps = trading_day_gaps(dates, max_gap_days) if daily else trading_day_gaps(dates[:0])
+    report = ValidationReport(name or 'frame', len(df), issues, gaps, 0.0)
+
+    bad = np.zeros(len(df), dtype=bool)
+    bad[report.bad_rows] = True
+    clean = df[~bad]
+    quarantined = df[bad].copy()
+    if len(quarantined):
+        quarantined['issues'] = issue_labels(report.errors, np.flatnonzero(bad))
+    report.elapsed = time.perf_counter() - start
+    return clean, quarantined, report
+
+
+def validated_transform(df, spec, name=None, **options):
+    """transform() + validate(): the clean rows of a raw frame plus the report"""
+    frame = transform(df, spec, calendar=spec is not MONTHLY_SPEC, fill_value=None)
+    return validate(frame, spec, name, daily=spec is not MONTHLY_SPEC, **options)
+
+
+def write_quarantine(quarantined, report, output_dir=DEFAULT_QUARANTINE_DIR):
+    """Save quarantined rows and the JSON report; returns the CSV path (None if nothing to save)"""
+    if quarantined.empty and not report.counts():
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base = os.path.join(output_dir, f"{report.name}_{stamp}")
+    quarantined.to_csv(f"{base}.csv", index=False)
+    with open(f"{base}.json", 'w') as f:
+        json.dump(report.to_dict(), f, indent=2, default=str)
+    return f"{base}.csv"
+
+
+def print_report(report, limit=20):
+    print(("✅ " if report.ok else "⚠️  ") + report.summary())
+    if not report.issues.empty:
+        print(report.issues.head(limit).to_string(index=False))
+        if len(report.issues) > limit:
+            print(f"   ... {len(report.issues) - limit:,} more")
+    if not report.gaps.empty:
+        print("Trading-day gaps:")
+        print(report.gaps.to_string(index=False))
+
+
+def synthetic_flow_frame(table, rows, seed=0, corrupt=0.001):
+    """Multi-year template-format frame for a flow table, with a few corrupted cells"""
+    rng = np.random.default_rng(seed)
+    spec = TABLE_SPECS[table]
+    # ~20 years of trading days, repeated (as re-sent history) to reach the requested size
+    dates = pd.bdate_range(end='2025-09-18', periods=min(rows, 5200))
+    data = {'Date': np.resize(dates.strftime('%Y-%m-%d').to_numpy(), rows)}
+    for cols in table_legs(spec).values():
+        purchase = rng.uniform(1e4, 4e5, rows).round(2)
+        sales = rng.uniform(1e4, 4e5, rows).round(2)
+        for out, value in zip((cols['gross_purchase'], cols['gross_sales'], cols['net']),
+                              (purchase, sales, (purchase - sales).round(2))):
+            data[spec['columns'][out][0]] = value.astype(object)
+    df = pd.DataFrame(data)
+    value_cols = df.columns[1:]
+    picks = rng.random((rows, len(value_cols))) < corrupt
+    df[value_cols] = df[value_cols].mask(picks, 'n/a')
+    return df
+
+
+def benchmark(rows=100_000, repeat=3):
+    """Time validate() on synthetic daily flows and on the Trendlyne monthly format"""
+    cases = {
+        'fii_fo_indices_data': (TABLE_SPECS['fii_fo_indices_data'],
+                                synthetic_flow_frame('fii_fo_indices_data', rows)),
+        'fii_dii_monthly': (MONTHLY_SPEC, synthetic_trendlyne_frame(rows)),
+    }
+    for name, (spec, raw) in cases.items():
+        daily = spec is not MONTHLY_SPEC
+        frame = transform(raw, spec, calendar=daily, fill_value=None)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _, quarantined, report = validate(frame, spec, name, daily=daily)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"validate {name}: {rows:,} rows in {best:.3f}s ({rows / best:,.0f} rows/s), "
+              f"{len(quarantined):,} quarantined, {len(report.issues):,} issues")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate FII/DII flow CSVs and quarantine bad rows')
+    parser.add_argument('table', nargs='?', choices=sorted(TABLE_SPECS) + ['fii_dii_monthly'])
+    parser.add_argument('files', nargs='*', help='CSV files in the table\'s template format')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed gap between net and gross purchase - sales')
+    parser.add_argument('--outlier-z', type=float, default=DEFAULT_OUTLIER_Z)
+    parser.add_argument('--max-gap', type=int, default=DEFAULT_MAX_GAP_DAYS,
+                        help='Weekdays without data before a gap is reported')
+    parser.add_argument('--quarantine-dir', default=DEFAULT_QUARANTINE_DIR)
+    parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', help='Time validation on synthetic data')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if not args.table or not args.files:
+        parser.error('table and files are required unless --benchmark is given')
+
+    failed = False
+    for file_name in args.files:
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        _, quarantined, report = validated_transform(
+            pd.read_csv(file_name, dtype=str), spec_for(args.table), name,
+            tolerance=args.tolerance, outlier_z=args.outlier_z, max_gap_days=args.max_gap,
+        )
+        if args.json:
+            print(json.dumps(report.to_dict(), indent=2, default=str))
+        else:
+            print_report(report)
+        path = write_quarantine(quarantined, report, args.quarantine_dir)
+        if path:
+            print(f"   report and {len(quarantined)} quarantined rows saved to {path}")
+        failed = failed or not report.ok
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
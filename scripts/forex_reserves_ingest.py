@@ -0,0 +1,142 @@
+"""
+RBI Forex Reserves Weekly Ingester
+Parses forex_reserves_template.csv ("Year / Week Ended" plus paired INR Crore /
+USD Million columns), keeps only weeks after the latest one already loaded,
+reconciles components against the total and upserts into forex_reserves_weekly
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from fii_dii_transform import parse_numeric_frame
+from pg_loader import connect, load_frame
+from table_extraction import parse_dates
+
+TABLE = 'forex_reserves_weekly'
+
+WEEK_FORMATS = ['%d-%b-%Y', '%d-%B-%Y', '%Y-%m-%d', '%d/%m/%Y']
+
+# DB column prefix -> template label; every component has INR Crore and USD Million columns
+COMPONENTS = {
+    'foreign_currency_assets': 'Foreign Currency Assets',
+    'gold': 'Gold',
+    'sdrs': 'SDRs',
+    'reserve_position_imf': 'Reserve Position in the IMF',
+}
+UNITS = {'inr_crore': 'INR Crore', 'usd_mn': 'USD Million'}
+
+FOREX_SPEC = {
+    'date_col': 'week_ended',
+    'columns': {
+        'week_ended': ['Year / Week Ended', 'Week Ended', 'week_ended'],
+        **{
+            f"{prefix}_{unit}": [f"{label} ({unit_label})", f"{prefix}_{unit}"]
+            for prefix, label in {'total_reserves': 'Total Reserves', **COMPONENTS}.items()
+            for unit, unit_label in UNITS.items()
+        },
+    },
+}
+
+# RBI rounds each figure separately, so allow a small gap before flagging
+DEFAULT_TOLERANCE_PCT = 0.5
+
+
+def parse_forex_frame(df):
+    """Template frame -> forex_reserves_weekly columns, newest week last"""
+    aliases = {src: out for out, sources in FOREX_SPEC['columns'].items() for src in sources}
+    columns = list(FOREX_SPEC['columns'])
+    value_cols = columns[1:]
+
+    result = df.rename(columns=lambda c: aliases.get(c.strip(), c.strip())).reindex(columns=columns)
+    result[value_cols] = parse_numeric_frame(result[value_cols])
+    weeks = parse_dates(result['week_ended'].astype(str).str.strip(), WEEK_FORMATS)
+
+    bad = weeks.isna()
+    if bad.any():
+        print(f"⚠️  Skipping {int(bad.sum())} rows with unreadable week dates")
+    result['week_ended'] = weeks
+    result = result[~bad].drop_duplicates(subset=['week_ended'], keep='last')
+    return result.sort_values('week_ended').reset_index(drop=True)
+
+
+def latest_week(conn):
+    """Most recent week_ended already in the table, or None"""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT MAX(week_ended) FROM {TABLE}")
+        value = cur.fetchone()[0]
+    return pd.Timestamp(value) if value is not None else None
+
+
+def weeks_after(df, since):
+    return df if since is None else df[df['week_ended'] > pd.Timestamp(since)]
+
+
+def reconcile(df, tolerance_pct=DEFAULT_TOLERANCE_PCT):
+    """Rows where the components don't add up to the total, for both units at once"""
+    units = list(UNITS)
+    totals = df[[f"total_reserves_{u}" for u in units]].to_numpy()
+    # weeks x components x units, summed over components
+    parts = df[[f"{p}_{u}" for p in COMPONENTS for u in units]].to_numpy()
+    sums = parts.reshape(len(df), len(COMPONENTS), len(units)).sum(axis=1)
+
+    diff = sums - totals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.abs(diff) / np.abs(totals) * 100
+    # Weeks with a missing figure give NaN and are not flagged
+    mismatched = np.nan_to_num(pct, nan=0.0, posinf=np.inf) > tolerance_pct
+
+    rows, cols = mismatched.nonzero()
+    return pd.DataFrame({
+        'week_ended': df['week_ended'].to_numpy()[rows],
+        'unit': [units[c] for c in cols],
+        'total': totals[rows, cols],
+        'components_sum': sums[rows, cols],
+        'difference': diff[rows, cols],
+        'difference_pct': pct[rows, cols].round(3),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append new weeks of RBI forex reserves to Postgres')
+    parser.add_argument('file', help='CSV in the forex_reserves_template.csv format')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--since', help='Treat this week (YYYY-MM-DD) as the latest loaded instead of asking the DB')
+    parser.add_argument('--full', action='store_true', help='Upsert every week in the file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE_PCT,
+                        help='Allowed component/total gap in percent')
+    parser.add_argument('--strict', action='store_true', help="Don't load if any week fails reconciliation")
+    parser.add_argument('--dry-run', action='store_true', help='Parse and reconcile only')
+    args = parser.parse_args()
+
+    df = parse_forex_frame(pd.read_csv(args.file, dtype=str))
+    conn = None if args.dry_run else connect(args.dsn)
+    try:
+        since = None
+        if not args.full:
+            since = pd.Timestamp(args.since) if args.since else (latest_week(conn) if conn is not None else None)
+        new = weeks_after(df, since)
+        print(f"{len(df)} weeks in file, {len(new)} after {since.date() if since is not None else 'the start'}")
+        if new.empty:
+            print("✅ Already up to date")
+            return
+
+        mismatches = reconcile(new, args.tolerance)
+        if not mismatches.empty:
+            print(f"⚠️  {len(mismatches)} component/total mismatches over {args.tolerance}%:")
+            print(mismatches.to_string(index=False))
+            if args.strict:
+                raise SystemExit(1)
+
+        if conn is not None:
+            new = new.assign(week_ended=new['week_ended'].dt.strftime('%Y-%m-%d'))
+            rows = load_frame(conn, TABLE, new)
+            print(f"✅ Upserted {rows} weeks into {TABLE}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
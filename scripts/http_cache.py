@@ -0,0 +1,245 @@
+"""
+HTTP Page Cache
+Disk-backed cache for scraped pages: per-URL TTLs, conditional requests
+(If-None-Match / If-Modified-Since), size-bounded LRU eviction, and a
+content hash so callers can skip parsing a page that has not changed
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '.state', 'http_cache')
+
+DEFAULT_TTL = 15 * 60
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Returned instead of parsed tables when a page body matches the last one processed
+UNCHANGED = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+  url TEXT PRIMARY KEY,
+  content_hash TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  etag TEXT,
+  last_modified TEXT,
+  fetched_at REAL NOT NULL,
+  accessed_at REAL NOT NULL,
+  processed_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+class CachedPage:
+    """A page body plus whether it differs from the last processed version"""
+
+    def __init__(self, url, text, content_hash, changed, from_cache, status):
+        self.url = url
+        self.text = text
+        self.content_hash = content_hash
+        self.changed = changed
+        self.from_cache = from_cache
+        self.status = status
+
+
+class HTTPCache:
+    """Page bodies stored by content hash, indexed by URL in SQLite"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, default_ttl=DEFAULT_TTL,
+                 ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.body_dir = os.path.join(cache_dir, 'bodies')
+        os.makedirs(self.body_dir, exist_ok=True)
+        self.default_ttl = default_ttl
+        # URL prefix -> TTL seconds; the longest matching prefix wins
+        self.ttls = dict(ttls or {})
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.stats = {'fresh': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0}
+
+    def ttl_for(self, url):
+        matches = [prefix for prefix in self.ttls if url.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else self.default_ttl
+
+    def lookup(self, url):
+        """Index row for url as a dict, or None if it is not cached"""
+        with self.lock:
+            cur = self.conn.execute('SELECT * FROM entries WHERE url = ?', (url,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            entry = dict(zip([c[0] for c in cur.description], row))
+        if not os.path.exists(self.body_path(entry['content_hash'])):
+            return None
+        return entry
+
+    def is_fresh(self, entry, now=None):
+        return (now or time.time()) - entry['fetched_at'] < self.ttl_for(entry['url'])
+
+    def conditional_headers(self, entry):
+        """Validators to revalidate a cached entry with"""
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body_path(self, content_hash):
+        return os.path.join(self.body_dir, content_hash)
+
+    def read_body(self, entry):
+        with open(self.body_path(entry['content_hash']), 'rb') as f:
+            return f.read()
+
+    def page_from_entry(self, entry, status):
+        """CachedPage for a cached body (fresh hit or 304)"""
+        body = self.read_body(entry)
+        changed = entry['processed_hash'] != entry['content_hash']
+        self.stats['not_modified' if status == 304 else 'fresh'] += 1
+        with self.lock, self.conn:
+            now = time.time()
+            if status == 304:
+                self.conn.execute('UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE url = ?',
+                                  (now, now, entry['url']))
+            else:
+                self.conn.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (now, entry['url']))
+        return CachedPage(entry['url'], body.decode('utf-8', errors='replace'),
+                          entry['content_hash'], changed, True, status)
+
+    def store(self, url, body, etag=None, last_modified=None, status=200):
+        """Save a freshly downloaded body; returns a CachedPage"""
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self.body_path(content_hash)
+        if not os.path.exists(path):
+            tmp_path = os.path.join(self.body_dir, f".{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute('SELECT content_hash, processed_hash FROM entries WHERE url = ?',
+                                    (url,)).fetchone()
+            previous_hash, processed_hash = row if row else (None, None)
+            self.conn.execute(
+                """INSERT INTO entries (url, content_hash, size, etag, last_modified, fetched_at, accessed_at, processed_hash)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (url) DO UPDATE SET
+                     content_hash = excluded.content_hash, size = excluded.size,
+                     etag = excluded.etag, last_modified = excluded.last_modified,
+                     fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at""",
+                (url, content_hash, len(body), etag, last_modified, now, now, processed_hash),
+            )
+        if previous_hash and previous_hash != content_hash:
+            self.remove_body_if_unused(previous_hash)
+        self.evict()
+
+        changed = processed_hash != content_hash
+        self.stats['changed' if changed else 'unchanged'] += 1
+        return CachedPage(url, body.decode('utf-8', errors='replace'), content_hash, changed, False, status)
+
+    def revalidated(self, url, entry, status, body, headers):
+        """CachedPage for the response to a conditional request (200 or 304)"""
+        if status == 304 and entry is not None:
+            return self.page_from_entry(entry, 304)
+        return self.store(url, body, headers.get('ETag'), headers.get('Last-Modified'), status)
+
+    def mark_processed(self, page):
+        """Remember that this body was parsed successfully, so identical bodies are skipped"""
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE entries SET processed_hash = ? WHERE url = ?',
+                              (page.content_hash, page.url))
+
+    def delete_unreferenced(self, content_hash):
+        """Delete a body file no entry points at any more (caller holds the lock)"""
+        if self.conn.execute('SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1',
+                             (content_hash,)).fetchone():
+            return False
+        try:
+            os.remove(self.body_path(content_hash))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def remove_body_if_unused(self, content_hash):
+        with self.lock:
+            self.delete_unreferenced(content_hash)
+
+    def evict(self):
+        """Drop least recently used entries until bodies fit in max_bytes"""
+        with self.lock, self.conn:
+            # Bodies are shared by hash, so count each one once
+            total = self.conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM entries)'
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self.conn.execute('SELECT url, content_hash, size FROM entries ORDER BY accessed_at').fetchall()
+            for url, content_hash, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+                if self.delete_unreferenced(content_hash):
+                    total -= size
+
+    def get(self, url, session=None, headers=None, timeout=30):
+        """Fetch url with requests, served from cache while fresh and revalidated after"""
+        entry = self.lookup(url)
+        if entry is not None and self.is_fresh(entry):
+            return self.page_from_entry(entry, 200)
+
+        request_headers = {**(headers or {}), **self.conditional_headers(entry)}
+        response = (session or requests).get(url, headers=request_headers, timeout=timeout)
+        response.raise_for_status()
+        return self.revalidated(url, entry, response.status_code, response.content, response.headers)
+
+    def summary(self):
+        with self.lock:
+            entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return (f"{entries} cached pages ({size / 1024:,.0f} KiB); fresh hits {self.stats['fresh']}, "
+                f"304s {self.stats['not_modified']}, unchanged bodies {self.stats['unchanged']}, "
+                f"changed {self.stats['changed']}")
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM entries')
+        for name in os.listdir(self.body_dir):
+            os.remove(os.path.join(self.body_dir, name))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or clear the scraper HTTP cache')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--clear', action='store_true', help='Delete every cached page')
+    args = parser.parse_args()
+
+    with HTTPCache(args.cache_dir) as cache:
+        if args.clear:
+            cache.clear()
+            print("🗑️  Cache cleared")
+        print(cache.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Incremental Sync State
+Keeps a per-table high-water mark and per-date row hashes in a local SQLite
+store so each run only emits rows that are new or have changed
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(__file__), '.state', 'sync_state.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+  table_name TEXT PRIMARY KEY,
+  max_date TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS row_hashes (
+  table_name TEXT NOT NULL,
+  date TEXT NOT NULL,
+  row_hash TEXT NOT NULL,
+  PRIMARY KEY (table_name, date)
+);
+"""
+
+
+def hash_rows(df, date_col='Date'):
+    """Hash every row's values (excluding the date key) in one vectorised pass"""
+    values = df.drop(columns=[date_col])
+    return pd.util.hash_pandas_object(values, index=False).astype(str)
+
+
+class SyncState:
+    """SQLite-backed high-water marks and row hashes per table"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def high_water_mark(self, table):
+        """Latest date stored for a table, or None if it has never synced"""
+        row = self.conn.execute(
+            'SELECT max_date FROM watermarks WHERE table_name = ?', (table,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def stored_hashes(self, table, since):
+        """{date: hash} for stored rows on or after `since`"""
+        rows = self.conn.execute(
+            'SELECT date, row_hash FROM row_hashes WHERE table_name = ? AND date >= ?',
+            (table, since),
+        )
+        return dict(rows)
+
+    def compute_delta(self, df, table, date_col='Date'):
+        """Return only the rows of df that are new or changed since the last commit"""
+        if df.empty:
+            return df
+        dates = pd.to_datetime(df[date_col]).dt.strftime('%Y-%m-%d')
+        hashes = hash_rows(df, date_col)
+
+        stored = pd.Series(self.stored_hashes(table, dates.min()), dtype=object)
+        previous = dates.map(stored)
+        changed = previous.isna() | (previous != hashes)
+        return df[changed.to_numpy()]
+
+    def commit(self, df, table, date_col='Date'):
+        """Record rows as synced and advance the table's high-water mark"""
+        if df.empty:
+            return
+        dates = pd.to_datetime(df[date_col]).dt.strftime('%Y-%m-%d')
+        hashes = hash_rows(df, date_col)
+        now = datetime.now().isoformat(timespec='seconds')
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO row_hashes (table_name, date, row_hash) VALUES (?, ?, ?)',
+                [(table, d, h) for d, h in zip(dates, hashes)],
+            )
+            self.conn.execute(
+                """INSERT INTO watermarks (table_name, max_date, updated_at) VALUES (?, ?, ?)
+                   ON CONFLICT (table_name) DO UPDATE SET
+                     max_date = MAX(max_date, excluded.max_date),
+                     updated_at = excluded.updated_at""",
+                (table, dates.max(), now),
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_delta(df, table, output_dir, state_path=DEFAULT_STATE_PATH, date_col='Date'):
+    """Write new/changed rows to a timestamped delta CSV and commit them; returns the path or None"""
+    with SyncState(state_path) as state:
+        delta = state.compute_delta(df, table, date_col)
+        print(f"{table}: {len(delta)} new or changed rows out of {len(df)} "
+              f"(last synced date: {state.high_water_mark(table) or 'never'})")
+        if delta.empty:
+            return None
+
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(output_dir, f"{table}_delta_{stamp}.csv")
+        delta.to_csv(output_file, index=False)
+        # Only advance the watermark once the delta is safely on disk
+        state.commit(delta, table, date_col)
+        return output_file
@@ -0,0 +1,207 @@
+"""
+NSE API Client
+One pooled requests session for many NSE /api endpoints, with the homepage
+cookies kept warm in a jar that is persisted between runs and refreshed
+only when it has expired or NSE answers 401/403
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = 'https://www.nseindia.com'
+
+DEFAULT_COOKIE_PATH = os.path.join(os.path.dirname(__file__), '.state', 'nse_cookies.json')
+
+# NSE rotates its session cookies (nsit, nseappid, ...) every few minutes to
+# hours; treat a jar older than this as stale even if no cookie says so
+COOKIE_MAX_AGE = 30 * 60
+
+# Same browser-like headers the fetch-nse-data edge function sends
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+PAGE_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0',
+}
+
+API_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': '*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-origin',
+}
+
+# Statuses NSE returns when the session cookies are missing or stale
+AUTH_STATUSES = {401, 403}
+
+
+class CookieJarCache:
+    """Session cookies saved to a JSON file along with when they were obtained"""
+
+    def __init__(self, path=DEFAULT_COOKIE_PATH, max_age=COOKIE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+
+    def load(self, jar):
+        """Fill jar from disk; returns when it was warmed, or None if nothing usable"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not saved.get('cookies') or self.is_expired(saved):
+            return None
+        for cookie in saved['cookies']:
+            jar.set(cookie['name'], cookie['value'], domain=cookie['domain'],
+                    path=cookie['path'], expires=cookie['expires'])
+        return saved['warmed_at']
+
+    def save(self, jar, warmed_at):
+        """Atomically write the jar's cookies to disk"""
+        if not self.path:
+            return
+        cookies = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path, 'expires': c.expires}
+            for c in jar
+        ]
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'warmed_at': warmed_at, 'cookies': cookies}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def is_expired(self, saved, now=None):
+        """True once the jar is older than max_age or any cookie has expired"""
+        now = now or time.time()
+        if now - saved.get('warmed_at', 0) > self.max_age:
+            return True
+        return any(c['expires'] is not None and c['expires'] <= now for c in saved.get('cookies', []))
+
+
+class NSEClient:
+    """Pooled, cookie-warm client for https://www.nseindia.com/api/<endpoint>"""
+
+    def __init__(self, base_url=BASE_URL, cookie_path=DEFAULT_COOKIE_PATH,
+                 max_age=COOKIE_MAX_AGE, pool_size=10, timeout=15):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJarCache(cookie_path, max_age)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'warmups': 0, 'auth_retries': 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.warmed_at = self.cookies.load(self.session.cookies)
+
+    def is_warm(self):
+        if self.warmed_at is None:
+            return False
+        cookies = [{'expires': c.expires} for c in self.session.cookies]
+        return not self.cookies.is_expired({'warmed_at': self.warmed_at, 'cookies': cookies})
+
+    def warm(self, force=False):
+        """Visit the homepage for fresh cookies unless the jar is still good"""
+        with self.lock:
+            if not force and self.is_warm():
+                return
+            self.session.cookies.clear()
+            response = self.session.get(f"{self.base_url}/", headers=PAGE_HEADERS, timeout=self.timeout)
+            response.raise_for_status()
+            self.warmed_at = time.time()
+            self.stats['warmups'] += 1
+            self.cookies.save(self.session.cookies, self.warmed_at)
+
+    def request(self, endpoint, params=None):
+        """GET an API endpoint, re-warming cookies once if NSE rejects them"""
+        self.warm()
+        url = f"{self.base_url}/api/{endpoint}"
+        headers = {**API_HEADERS, 'Referer': f"{self.base_url}/", 'Origin': self.base_url}
+
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        self.stats['requests'] += 1
+        if response.status_code in AUTH_STATUSES:
+            self.stats['auth_retries'] += 1
+            self.warm(force=True)
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            self.stats['requests'] += 1
+        response.raise_for_status()
+        return response
+
+    def get(self, endpoint, params=None):
+        """Decoded JSON for an API endpoint"""
+        return self.request(endpoint, params).json()
+
+    def fii_dii_trade(self):
+        return self.get('fiidiiTradeReact')
+
+    def bulk_deals(self, from_date, to_date):
+        """Historical bulk deals; dates as DD-MM-YYYY"""
+        return self.get('historical/bulk-deals', {'from': from_date, 'to': to_date})
+
+    def block_deals(self, from_date, to_date):
+        """Historical block deals; dates as DD-MM-YYYY"""
+        return self.get('historical/block-deals', {'from': from_date, 'to': to_date})
+
+    def all_indices(self):
+        return self.get('allIndices')
+
+    def index_constituents(self, index='NIFTY 50'):
+        return self.get('equity-stockIndices', {'index': index})
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch NSE API endpoints over one warm session')
+    parser.add_argument('endpoints', nargs='*', default=['fiidiiTradeReact', 'allIndices'],
+                        help='API endpoints, e.g. fiidiiTradeReact allIndices')
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help='Query parameter sent with every endpoint')
+    parser.add_argument('--base-url', default=BASE_URL, help='Point at a mock NSE server for testing')
+    parser.add_argument('--cookies', default=DEFAULT_COOKIE_PATH, help='Cookie jar file')
+    args = parser.parse_args()
+
+    params = dict(p.split('=', 1) for p in args.param) or None
+    with NSEClient(args.base_url, args.cookies) as client:
+        for endpoint in args.endpoints:
+            try:
+                data = client.get(endpoint, params)
+            except requests.RequestException as e:
+                print(f"❌ {endpoint}: {e}")
+                continue
+            size = len(data.get('data', data)) if isinstance(data, dict) else len(data)
+            print(f"✅ {endpoint}: {size} records")
+        print(f"Requests: {client.stats['requests']}, cookie warmups: {client.stats['warmups']}, "
+              f"auth retries: {client.stats['auth_retries']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Streaming NSE Deals / Stock Price Ingester
+Reads nse_bulk_deals, nse_block_deals and nse_stock_prices CSVs chunk by
+chunk, parses dates and numbers per chunk and streams every chunk into
+pg_loader, so multi-year backfills load at constant memory
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from fii_dii_transform import parse_numeric_frame
+from pg_loader import connect, load_frames
+from table_extraction import parse_dates
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+DEAL_COLUMNS = {
+    'date': ['Date', 'DATE', 'date'],
+    'symbol': ['Symbol', 'SYMBOL'],
+    'stock_name': ['Stock Name', 'Security Name'],
+    'client_name': ['Client Name'],
+    'deal_type': ['buy / sell', 'Buy/Sell', 'Buy / Sell'],
+    'quantity': ['Quantity', 'Quantity Traded'],
+    'exchange': ['Exchange'],
+}
+
+# Table -> template columns, per the admin uploaders (NSE*Upload.tsx).
+# Deal templates use MM/DD/YYYY like the uploaders; --dayfirst switches to
+# the DD/MM/YYYY layout of raw NSE exports. Later formats are only tried on
+# values the earlier ones could not parse.
+STREAM_SPECS = {
+    'bulk_deals': {
+        'date_col': 'date',
+        'date_formats': ['%m/%d/%Y', '%d-%b-%Y', '%Y-%m-%d'],
+        'columns': {**DEAL_COLUMNS, 'avg_price': ['Trade Price', 'Trade Price / Wght. Avg. Price']},
+        'int_cols': ['quantity'],
+        'float_cols': ['avg_price'],
+        'required': ['date', 'symbol', 'quantity', 'avg_price'],
+    },
+    'block_deals': {
+        'date_col': 'date',
+        'date_formats': ['%m/%d/%Y', '%d-%b-%Y', '%Y-%m-%d'],
+        'columns': {**DEAL_COLUMNS, 'trade_price': ['Trade Price']},
+        'int_cols': ['quantity'],
+        'float_cols': ['trade_price'],
+        'required': ['date', 'symbol', 'quantity', 'trade_price'],
+    },
+    'stock_prices': {
+        'date_col': 'timestamp',
+        'date_formats': ['%Y-%m-%d', '%d/%m/%Y', '%d-%b-%Y'],
+        'columns': {
+            'timestamp': ['Date', 'DATE'],
+            'symbol': ['Symbol', 'SYMBOL'],
+            'name': ['Stock Name'],
+            'open': ['Open'],
+            'high': ['High'],
+            'low': ['Low'],
+            'ltp': ['LTP', 'Close'],
+            'previous_close': ['Previous Close'],
+            'change': ['Change'],
+            'change_percent': ['Change %'],
+            'volume': ['Volume'],
+            'value': ['Value (Cr)'],
+            'delivery_qty': ['Delivery Qty'],
+            'delivery_percent': ['Delivery %'],
+            'vwap': ['VWAP'],
+            'week_52_high': ['52W High'],
+            'week_52_low': ['52W Low'],
+        },
+        'int_cols': ['volume', 'delivery_qty'],
+        'float_cols': ['open', 'high', 'low', 'ltp', 'previous_close', 'change', 'change_percent',
+                       'value', 'delivery_percent', 'vwap', 'week_52_high', 'week_52_low'],
+        # Value (Cr) is stored in rupees
+        'scale': {'value': 10_000_000},
+        'required': ['timestamp', 'symbol'],
+    },
+}
+
+# Deal tables -> deals_analytics source name
+DEAL_SOURCES = {'bulk_deals': 'bulk', 'block_deals': 'block'}
+
+DAYFIRST_FORMATS = ['%d/%m/%Y', '%d-%b-%Y', '%Y-%m-%d']
+
+
+def prepare_chunk(chunk, spec, date_formats=None):
+    """Map, type and validate one raw chunk; returns (clean frame, rejected row count)"""
+    aliases = {src: out for out, sources in spec['columns'].items() for src in sources}
+    columns = list(spec['columns'])
+    df = chunk.rename(columns=lambda c: aliases.get(c.strip(), c.strip())).reindex(columns=columns)
+
+    numeric_cols = spec['int_cols'] + spec['float_cols']
+    df[numeric_cols] = parse_numeric_frame(df[numeric_cols])
+    for col, factor in spec.get('scale', {}).items():
+        df[col] = df[col] * factor
+
+    # Columns absent from the file (raw NSE exports have no Exchange) come back from reindex as float NaN
+    text_cols = [c for c in columns if c not in numeric_cols]
+    for col in text_cols:
+        df[col] = df[col].astype('string').str.strip()
+    dates = parse_dates(df[spec['date_col']], date_formats or spec['date_formats'])
+
+    valid = dates.notna().to_numpy() & df[spec['required']].notna().all(axis=1).to_numpy()
+    if 'deal_type' in df:
+        df['deal_type'] = df['deal_type'].str.lower()
+        # Short rows (a missing field) shift values left and land here
+        valid &= df['deal_type'].isin(['buy', 'sell']).to_numpy()
+        df['exchange'] = df['exchange'].fillna('NSE')
+
+    df[spec['date_col']] = dates.dt.strftime('%Y-%m-%d')
+    df = df[valid].copy()
+    df[spec['int_cols']] = df[spec['int_cols']].round().astype('Int64')
+    return df, int((~valid).sum())
+
+
+def iter_chunks(path, table, chunk_rows=DEFAULT_CHUNK_ROWS, date_formats=None, stats=None):
+    """Yield cleaned chunks of a CSV; only one chunk is held in memory at a time"""
+    spec = STREAM_SPECS[table]
+    stats = stats if stats is not None else {}
+    stats.setdefault('rows', 0)
+    stats.setdefault('rejected', 0)
+    stats.setdefault('dates', set())
+    reader = pd.read_csv(path, dtype=str, chunksize=chunk_rows, skip_blank_lines=True,
+                         keep_default_na=False, na_values=[''])
+    for chunk in reader:
+        df, rejected = prepare_chunk(chunk, spec, date_formats)
+        stats['rows'] += len(df)
+        stats['rejected'] += rejected
+        stats['dates'].update(df[spec['date_col']].unique())
+        yield df
+
+
+def ingest_file(path, table, conn=None, chunk_rows=DEFAULT_CHUNK_ROWS, date_formats=None):
+    """Stream a file into its table (or just parse it when conn is None); returns stats"""
+    stats = {}
+    start = time.perf_counter()
+    chunks = iter_chunks(path, table, chunk_rows, date_formats, stats)
+    if conn is None:
+        for _ in chunks:
+            pass
+        stats['upserted'] = 0
+    else:
+        stats['upserted'] = load_frames(conn, table, chunks)
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def fii_dii_trade_frame(records):
+    """fiidiiTradeReact records -> one fii_dii_cash_provisional template row per date"""
+    df = pd.DataFrame(records)
+    df['leg'] = df['category'].str.extract(r'^(FII|DII)', expand=False)
+    df['Date'] = parse_dates(df['date'].str.strip(), ['%d-%b-%Y']).dt.strftime('%Y-%m-%d')
+    measures = {'buyValue': 'Gross_Purchase', 'sellValue': 'Gross_Sales', 'netValue': 'Net'}
+    df[list(measures)] = parse_numeric_frame(df[list(measures)])
+    df = df.dropna(subset=['leg']).drop_duplicates(['Date', 'leg'], keep='last')
+    wide = df.pivot(index='Date', columns='leg', values=list(measures))
+    wide.columns = [f"{leg}_{measures[measure]}" for measure, leg in wide.columns]
+    columns = [f"{leg}_{m}" for leg in ('FII', 'DII') for m in measures.values()]
+    return wide.reindex(columns=columns).reset_index()
+
+
+def write_synthetic_deals(path, rows, seed=0):
+    """Bulk-deals CSV in template format, written in blocks so it can exceed RAM"""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end='2025-09-30', periods=2500).strftime('%m/%d/%Y').to_numpy()
+    symbols = np.array([f"SYM{i:04d}" for i in range(2000)])
+    clients = np.array([f"CLIENT {i:05d} LIMITED" for i in range(20000)])
+    block = 250_000
+    with open(path, 'w') as f:
+        f.write('Date,Symbol,Stock Name,Client Name,buy / sell,Quantity,Trade Price,Exchange\n')
+        for offset in range(0, rows, block):
+            n = min(block, rows - offset)
+            sym = rng.integers(0, len(symbols), n)
+            frame = pd.DataFrame({
+                'Date': days[rng.integers(0, len(days), n)],
+                'Symbol': symbols[sym],
+                'Stock Name': np.char.add(symbols[sym], ' Ltd.'),
+                'Client Name': clients[rng.integers(0, len(clients), n)],
+                'buy / sell': np.where(rng.random(n) < 0.5, 'buy', 'sell'),
+                'Quantity': rng.integers(10_000, 5_000_000, n),
+                'Trade Price': rng.uniform(10, 5000, n).round(2),
+                'Exchange': 'NSE',
+            })
+            frame.to_csv(f, header=False, index=False)
+
+
+def benchmark(rows=1_000_000, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Parse throughput and peak Python memory for a synthetic bulk-deals file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bulk_deals.csv')
+        write_synthetic_deals(path, rows)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        stats = ingest_file(path, 'bulk_deals', chunk_rows=chunk_rows)
+        # Separate pass: tracing allocations slows parsing down considerably
+        tracemalloc.start()
+        ingest_file(path, 'bulk_deals', chunk_rows=chunk_rows)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"bulk_deals: {stats['rows']:,} rows ({size_mb:,.0f} MB) in {stats['seconds']:.2f}s "
+          f"({stats['rows'] / stats['seconds']:,.0f} rows/s), peak memory {peak / 1024 / 1024:,.0f} MB "
+          f"with {chunk_rows:,}-row chunks")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream NSE deals / stock price CSVs into Postgres')
+    parser.add_argument('table', nargs='?', choices=sorted(STREAM_SPECS))
+    parser.add_argument('files', nargs='*', help='CSV files in the public/templates format')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--dayfirst', action='store_true', help='Dates are DD/MM/YYYY')
+    parser.add_argument('--dry-run', action='store_true', help='Parse and validate only')
+    parser.add_argument('--no-analytics', action='store_true',
+                        help="Don't recompute deals_daily_aggregates for the loaded days")
+    parser.add_argument('--benchmark', type=int, metavar='ROWS',
+                        help='Time parsing of a synthetic bulk-deals file with ROWS rows')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.chunk_rows)
+        return
+    if not args.table or not args.files:
+        parser.error('table and files are required unless --benchmark is given')
+
+    date_formats = DAYFIRST_FORMATS if args.dayfirst else None
+    conn = None if args.dry_run else connect(args.dsn)
+    try:
+        for file_name in args.files:
+            stats = ingest_file(file_name, args.table, conn, args.chunk_rows, date_formats)
+            print(f"✅ {file_name}: {stats['rows']:,} rows parsed, {stats['rejected']:,} rejected, "
+                  f"{stats['upserted']:,} upserted into {args.table} in {stats['seconds']:.1f}s")
+            if conn is not None and args.table in DEAL_SOURCES and not args.no_analytics:
+                # Imported here because deals_analytics reads deal files through this module
+                from deals_analytics import refresh_days
+                rows = refresh_days(conn, DEAL_SOURCES[args.table], stats['dates'])
+                print(f"   {len(stats['dates']):,} deal days re-aggregated ({rows:,} rows)")
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Parquet Dataset Cache
+Stores every extracted dataset as Parquet partitioned by table and financial
+year, written atomically, with a reader that prunes partitions by date range
+and reads only the requested columns
+"""
+
+import argparse
+import os
+import threading
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from fii_dii_calendar import calendar_fields
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'parquet')
+
+# One lock per partition so concurrent writers (backfill workers) merge safely
+partition_locks = {}
+partition_locks_guard = threading.Lock()
+
+
+def partition_lock(path):
+    with partition_locks_guard:
+        return partition_locks.setdefault(path, threading.Lock())
+
+
+def partition_dir(root, table, financial_year):
+    """root/table=<table>/fy=<2025-26>"""
+    return os.path.join(root, f"table={table}", f"fy={financial_year.replace('FY ', '')}")
+
+
+def write_partition(path, df, date_col):
+    """Merge df into a partition file and atomically replace it"""
+    file_path = os.path.join(path, 'part.parquet')
+    with partition_lock(file_path):
+        if os.path.exists(file_path):
+            existing = pq.read_table(file_path).to_pandas()
+            df = pd.concat([existing, df], ignore_index=True)
+        # Re-extracted dates replace what was cached before
+        df = df.drop_duplicates(subset=[date_col], keep='last').sort_values(date_col)
+
+        os.makedirs(path, exist_ok=True)
+        tmp_path = os.path.join(path, f".part-{uuid.uuid4().hex}.tmp")
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        os.replace(tmp_path, file_path)
+
+
+def write_dataset(df, table, date_col='Date', root=DEFAULT_ROOT):
+    """Cache a frame under root, one partition per financial year"""
+    if df.empty:
+        return 0
+    df = df.copy()
+    df[date_col] = pd.to_datetime(df[date_col]).dt.date
+    financial_years = calendar_fields(pd.to_datetime(df[date_col]))['financial_year']
+
+    for financial_year, part in df.groupby(financial_years.to_numpy()):
+        write_partition(partition_dir(root, table, financial_year), part, date_col)
+    print(f"📦 Cached {len(df)} {table} rows as Parquet ({financial_years.nunique()} partitions)")
+    return len(df)
+
+
+def partitions_for_range(root, table, start=None, end=None):
+    """Partition files whose financial year overlaps [start, end]"""
+    table_dir = os.path.join(root, f"table={table}")
+    if not os.path.isdir(table_dir):
+        return []
+
+    wanted = None
+    if start is not None or end is not None:
+        first = pd.Timestamp(start) if start is not None else pd.Timestamp('1900-04-01')
+        last = pd.Timestamp(end) if end is not None else pd.Timestamp.today()
+        months = pd.Series(pd.date_range(first.replace(day=1), last, freq='MS'))
+        if months.empty:
+            months = pd.Series([first])
+        wanted = {fy.replace('FY ', '') for fy in calendar_fields(months)['financial_year']}
+
+    files = []
+    for name in sorted(os.listdir(table_dir)):
+        if not name.startswith('fy='):
+            continue
+        if wanted is not None and name[3:] not in wanted:
+            continue
+        file_path = os.path.join(table_dir, name, 'part.parquet')
+        if os.path.exists(file_path):
+            files.append(file_path)
+    return files
+
+
+def read_dataset(table, start=None, end=None, columns=None, date_col='Date', root=DEFAULT_ROOT):
+    """Read cached rows for a date range, touching only matching partitions and columns"""
+    files = partitions_for_range(root, table, start, end)
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    dataset = ds.dataset(files, format='parquet')
+    condition = None
+    if start is not None:
+        condition = ds.field(date_col) >= pd.Timestamp(start).date()
+    if end is not None:
+        upper = ds.field(date_col) <= pd.Timestamp(end).date()
+        condition = upper if condition is None else condition & upper
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read cached FII/DII datasets from Parquet')
+    parser.add_argument('table')
+    parser.add_argument('--start', help='First date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last date (YYYY-MM-DD)')
+    parser.add_argument('--columns', help='Comma-separated columns to read')
+    parser.add_argument('--date-col', default='Date', help='Date column the dataset was written with')
+    parser.add_argument('--root', default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    columns = args.columns.split(',') if args.columns else None
+    df = read_dataset(args.table, args.start, args.end, columns, args.date_col, args.root)
+    print(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Postgres Bulk Loader
+Streams DataFrames into a staging table with COPY, then upserts them into the
+target table with one set-based INSERT ... ON CONFLICT, in a single transaction
+"""
+
+import argparse
+import os
+from io import StringIO
+
+import pandas as pd
+import psycopg2
+from psycopg2 import sql
+
+from fii_dii_transform import TABLE_SPECS, transform
+from fii_dii_validation import DEFAULT_QUARANTINE_DIR, print_report, validated_transform, write_quarantine
+
+# Conflict key of every table in supabase/migrations that has a UNIQUE constraint,
+# plus the equity tables keyed as their admin uploaders' onConflict
+TABLE_KEYS = {
+    'fii_dii_cash_provisional': ('date',),
+    'fii_cash_data': ('date',),
+    'fii_fo_indices_data': ('date',),
+    'fii_fo_stocks_data': ('date',),
+    'dii_cash_data': ('date',),
+    'dii_fo_indices_data': ('date',),
+    'dii_fo_stocks_data': ('date',),
+    'fii_dii_daily_flows': ('source_table', 'leg', 'date'),
+    'fii_dii_period_rollups': ('source_table', 'leg', 'period_type', 'period'),
+    'ipo_listings': ('company_name', 'listing_date', 'ipo_type'),
+    'cpi_series': ('date', 'geography', 'series_code'),
+    'cpi_components': ('date', 'geography', 'component_code'),
+    'cpi_series_meta': ('series_code',),
+    'repo_rate_comparisons': ('indicator_id',),
+    'forex_reserves_weekly': ('week_ended',),
+    'iip_series': ('date',),
+    'iip_components': ('date', 'classification_type', 'component_code'),
+    'gdp_value': ('year', 'quarter'),
+    'gdp_growth': ('year', 'quarter'),
+    'gdp_annual': ('year',),
+    'gdp_annual_growth': ('year',),
+    'bulk_deals': ('date', 'symbol', 'client_name', 'deal_type'),
+    'block_deals': ('date', 'symbol', 'client_name', 'quantity'),
+    'stock_prices': ('symbol', 'timestamp'),
+    'market_indices': ('symbol', 'timestamp'),
+    'market_breadth': ('date', 'exchange'),
+    'fii_dii_activity': ('date', 'category'),
+    'sector_data': ('date', 'sector_slug'),
+    'stock_master': ('symbol',),
+    'investor_master': ('client_name',),
+    'ipo_data': ('company_name', 'open_date'),
+    'mutual_fund_amcs': ('amc_code',),
+    'mutual_fund_schemes': ('scheme_code',),
+    'heatmap_values': ('indicator_id', 'state_name', 'year_label'),
+    'deals_daily_aggregates': ('date', 'deal_source', 'dimension', 'key'),
+    'amc_portfolio_holdings': ('scheme_id', 'as_of_date', 'stock_name'),
+    'portfolio_sector_allocation': ('scheme_id', 'as_of_date', 'sector'),
+    'portfolio_asset_allocation': ('scheme_id', 'as_of_date', 'asset_type'),
+}
+
+# fii_dii_uploads.upload_type used by the admin uploaders
+UPLOAD_TYPES = {
+    'fii_dii_cash_provisional': 'cash_provisional',
+    'fii_cash_data': 'fii_cash',
+    'fii_fo_indices_data': 'fii_fo_indices',
+    'fii_fo_stocks_data': 'fii_fo_stocks',
+    'dii_cash_data': 'dii_cash',
+    'dii_fo_indices_data': 'dii_fo_indices',
+    'dii_fo_stocks_data': 'dii_fo_stocks',
+}
+
+# Rows are staged this many at a time so huge frames never become one giant CSV string
+COPY_CHUNK_ROWS = 50_000
+
+
+def connect(dsn=None):
+    """Open a connection from --dsn or the DATABASE_URL environment variable"""
+    dsn = dsn or os.environ.get('DATABASE_URL')
+    if not dsn:
+        raise ValueError("No database DSN given (use --dsn or set DATABASE_URL)")
+    return psycopg2.connect(dsn)
+
+
+def copy_frame(cur, staging, df):
+    """COPY a frame into the staging table in CSV chunks"""
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(staging), sql.SQL(', ').join(map(sql.Identifier, df.columns))
+    )
+    for start in range(0, len(df), COPY_CHUNK_ROWS):
+        buffer = StringIO()
+        # Empty unquoted fields are NULL in COPY's CSV format
+        df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cur.copy_expert(statement, buffer)
+
+
+def upsert_statement(table, staging, columns, key):
+    """INSERT ... SELECT from staging, keeping the last staged row per key"""
+    ident = lambda cols: sql.SQL(', ').join(map(sql.Identifier, cols))
+    update_cols = [c for c in columns if c not in key]
+    if update_cols:
+        assignments = [sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in update_cols]
+        if 'updated_at' not in columns:
+            assignments.append(sql.SQL("updated_at = NOW()"))
+        on_conflict = sql.SQL("DO UPDATE SET {}").format(sql.SQL(', ').join(assignments))
+    else:
+        on_conflict = sql.SQL("DO NOTHING")
+
+    return sql.SQL(
+        "INSERT INTO {table} ({cols}) "
+        "SELECT DISTINCT ON ({key}) {cols} FROM {staging} ORDER BY {key}, _load_seq DESC "
+        "ON CONFLICT ({key}) {on_conflict}"
+    ).format(table=sql.Identifier(table), cols=ident(columns), key=ident(key),
+             staging=sql.Identifier(staging), on_conflict=on_conflict)
+
+
+def stage_and_upsert(cur, table, frames, key=None):
+    """Upsert an iterable of frames through a staging table on an open cursor; returns rows upserted
+
+    Does not commit, so callers can combine it with other statements in one transaction
+    """
+    key = tuple(key or TABLE_KEYS[table])
+    staging = f"{table}_staging"
+    columns = None
+    staged = 0
+
+    cur.execute(sql.SQL(
+        "CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ).format(sql.Identifier(staging), sql.Identifier(table)))
+    # Load order, so the newest row wins when a key repeats across frames
+    cur.execute(sql.SQL("ALTER TABLE {} ADD COLUMN _load_seq BIGSERIAL").format(
+        sql.Identifier(staging)))
+
+    for df in frames:
+        if df.empty:
+            continue
+        if columns is None:
+            columns = list(df.columns)
+            missing = [k for k in key if k not in columns]
+            if missing:
+                raise ValueError(f"{table}: frame is missing key columns {missing}")
+        copy_frame(cur, staging, df[columns])
+        staged += len(df)
+
+    if not staged:
+        return 0
+    cur.execute(upsert_statement(table, staging, columns, key))
+    return cur.rowcount
+
+
+def load_frames(conn, table, frames, key=None):
+    """Load an iterable of frames into table in one transaction; returns rows upserted"""
+    with conn:
+        with conn.cursor() as cur:
+            return stage_and_upsert(cur, table, frames, key)
+
+
+def load_frame(conn, table, df, key=None):
+    """Load a single frame; see load_frames"""
+    return load_frames(conn, table, [df], key)
+
+
+def replace_frame(conn, table, df, columns):
+    """Delete the table's rows for every value of columns found in df, then insert df, in one transaction
+
+    For tables the admin uploaders replace wholesale (e.g. one month of state AUM)
+    rather than upsert, so they need no unique constraint
+    """
+    if df.empty:
+        return 0
+    staging = f"{table}_staging"
+    ident = lambda cols: sql.SQL(', ').join(map(sql.Identifier, cols))
+    matches = sql.SQL(' AND ').join(
+        sql.SQL("t.{0} = r.{0}").format(sql.Identifier(c)) for c in columns)
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL(
+                "CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ).format(sql.Identifier(staging), sql.Identifier(table)))
+            copy_frame(cur, staging, df)
+            cur.execute(sql.SQL(
+                "DELETE FROM {table} AS t USING (SELECT DISTINCT {cols} FROM {staging}) AS r WHERE {matches}"
+            ).format(table=sql.Identifier(table), cols=ident(columns), staging=sql.Identifier(staging),
+                     matches=matches))
+            cur.execute(sql.SQL("INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging}").format(
+                table=sql.Identifier(table), cols=ident(df.columns), staging=sql.Identifier(staging)))
+            return cur.rowcount
+
+
+def record_upload(conn, table, file_name, df):
+    """Add a fii_dii_uploads tracking row, as the admin uploaders do"""
+    if table not in UPLOAD_TYPES or df.empty:
+        return
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """INSERT INTO fii_dii_uploads
+                   (upload_type, file_name, records_count, date_range_start, date_range_end, uploaded_by)
+                   VALUES (%s, %s, %s, %s, %s, %s)""",
+                (UPLOAD_TYPES[table], file_name, len(df), df['date'].min(), df['date'].max(), 'pg_loader'),
+            )
+
+
+def prepare_frame(table, df):
+    """Map a public/templates CSV to the table's columns where we have a spec"""
+    if table in TABLE_SPECS:
+        return transform(df, TABLE_SPECS[table], calendar=True)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk load CSV files into Postgres with COPY + upsert')
+    parser.add_argument('table', choices=sorted(TABLE_KEYS))
+    parser.add_argument('files', nargs='+', help='CSV files (template format for FII/DII tables)')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--no-validate', action='store_true',
+                        help="Load FII/DII files without data-quality checks (bad cells become 0)")
+    parser.add_argument('--quarantine-dir', default=DEFAULT_QUARANTINE_DIR)
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    try:
+        for file_name in args.files:
+            if args.table in TABLE_SPECS and not args.no_validate:
+                # Rows failing the checks are set aside instead of loaded
+                df, quarantined, report = validated_transform(
+                    pd.read_csv(file_name, dtype=str), TABLE_SPECS[args.table],
+                    os.path.splitext(os.path.basename(file_name))[0])
+                print_report(report)
+                path = write_quarantine(quarantined, report, args.quarantine_dir)
+                if path:
+                    print(f"   {len(quarantined)} quarantined rows saved to {path}")
+            else:
+                df = prepare_frame(args.table, pd.read_csv(file_name))
+            rows = load_frame(conn, args.table, df)
+            record_upload(conn, args.table, os.path.basename(file_name), df)
+            print(f"✅ {file_name}: upserted {rows} rows into {args.table}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
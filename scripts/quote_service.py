@@ -0,0 +1,386 @@
+"""
+Batched Quote Service
+Drop-in replacement for the fetch-yahoo-finance edge function: symbol requests
+arriving within a short window are coalesced into deduplicated upstream batches,
+and repeat requests are answered from a short-TTL cache (stale-while-revalidate)
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+from aiohttp import web
+
+from fii_dii_async_fetcher import HostRateLimiter, fetch_page
+
+YAHOO_QUOTE_URL = 'https://query1.finance.yahoo.com/v7/finance/quote'
+
+# Same headers the edge function sends upstream
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://finance.yahoo.com/',
+}
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
+}
+
+# The dashboard polls every 5s, so one upstream fetch serves a whole poll round
+DEFAULT_TTL = 5.0
+# Past the TTL a quote is still served (and refreshed behind the caller) this long
+DEFAULT_STALE_TTL = 60.0
+DEFAULT_WINDOW = 0.05
+DEFAULT_MAX_BATCH = 50
+# The dashboards ask for ~20 symbols; anything far beyond that is not a dashboard
+MAX_REQUEST_SYMBOLS = 100
+
+# useWebSocketMarketData's SYMBOLS plus the stocks the dashboards quote most
+DASHBOARD_SYMBOLS = ['^NSEI', '^BSESN', '^NSEBANK', 'INR=X']
+LOAD_TEST_SYMBOLS = DASHBOARD_SYMBOLS + [
+    f"{s}.NS" for s in ('RELIANCE', 'TCS', 'HDFCBANK', 'INFY', 'ICICIBANK', 'SBIN', 'ITC', 'LT',
+                        'BHARTIARTL', 'KOTAKBANK', 'AXISBANK', 'MARUTI', 'TRENT', 'TITAN', 'SUNPHARMA')]
+
+
+class QuoteBatcher:
+    """Collects symbol requests for `window` seconds and fetches each symbol once
+
+    A symbol already waiting for the next batch, or already in an upstream
+    call, shares that call's future instead of being requested again
+    """
+
+    def __init__(self, fetch, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.fetch = fetch
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = {}
+        self.in_flight = {}
+        self.flush_task = None
+
+    def request(self, symbol):
+        """Future resolving to the symbol's quote (None if upstream has none)"""
+        future = self.in_flight.get(symbol) or self.pending.get(symbol)
+        if future is not None:
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self.pending[symbol] = future
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+        return future
+
+    async def flush_later(self):
+        await asyncio.sleep(self.window)
+        self.flush_task = None
+        batch, self.pending = self.pending, {}
+        self.in_flight.update(batch)
+        symbols = sorted(batch)
+        await asyncio.gather(*(self.send(symbols[i:i + self.max_batch], batch)
+                               for i in range(0, len(symbols), self.max_batch)))
+
+    async def send(self, symbols, futures):
+        try:
+            quotes = await self.fetch(symbols)
+        except Exception as e:
+            for symbol in symbols:
+                if not futures[symbol].done():
+                    futures[symbol].set_exception(e)
+        else:
+            for symbol in symbols:
+                if not futures[symbol].done():
+                    futures[symbol].set_result(quotes.get(symbol))
+        finally:
+            for symbol in symbols:
+                self.in_flight.pop(symbol, None)
+
+
+class QuoteCache:
+    """symbol -> (quote, fetched_at), fresh for `ttl`, servable while stale for `stale_ttl`
+
+    Entries past both are dropped, swept at most once per `ttl`, so symbols
+    nobody asks for again don't accumulate
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = {}
+        self.swept_at = 0.0
+
+    def get(self, symbol, now):
+        """('fresh' | 'stale' | 'miss', quote)"""
+        entry = self.entries.get(symbol)
+        if entry is None:
+            return 'miss', None
+        quote, fetched_at = entry
+        age = now - fetched_at
+        if age < self.ttl:
+            return 'fresh', quote
+        if age < self.ttl + self.stale_ttl:
+            return 'stale', quote
+        del self.entries[symbol]
+        return 'miss', None
+
+    def put(self, symbol, quote, now):
+        self.entries[symbol] = (quote, now)
+        if now - self.swept_at >= self.ttl:
+            self.evict(now)
+
+    def evict(self, now):
+        """Drop every entry too old to be served, even as stale"""
+        cutoff = now - self.ttl - self.stale_ttl
+        self.entries = {s: entry for s, entry in self.entries.items() if entry[1] > cutoff}
+        self.swept_at = now
+
+
+class QuoteService:
+    """Quotes for many concurrent viewers from as few upstream calls as possible"""
+
+    def __init__(self, upstream_url=YAHOO_QUOTE_URL, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL,
+                 window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, rate=5.0, burst=5, timeout=10):
+        self.upstream_url = upstream_url
+        self.cache = QuoteCache(ttl, stale_ttl)
+        self.batcher = QuoteBatcher(self.fetch_upstream, window, max_batch)
+        self.limiter = HostRateLimiter(rate, burst)
+        self.semaphore = asyncio.Semaphore(4)
+        self.timeout = timeout
+        self.session = None
+        self.metrics = dict.fromkeys(
+            ['requests', 'symbols_requested', 'hits', 'stale_hits', 'misses',
+             'upstream_calls', 'upstream_symbols', 'upstream_errors', 'refresh_errors'], 0)
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(headers=HEADERS, timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def fetch_upstream(self, symbols):
+        """One v7/finance/quote call; {symbol: quote}"""
+        self.metrics['upstream_calls'] += 1
+        self.metrics['upstream_symbols'] += len(symbols)
+        # aiohttp encodes the query, so symbols like M&M.NS arrive whole
+        params = {'symbols': ','.join(symbols)}
+        try:
+            _, body, _ = await fetch_page(self.session, self.upstream_url, self.limiter, self.semaphore, retries=1,
+                                          backoff=0.2, params=params)
+        except Exception:
+            self.metrics['upstream_errors'] += 1
+            raise
+        now = time.monotonic()
+        quotes = {q['symbol']: q for q in json.loads(body).get('quoteResponse', {}).get('result') or []}
+        # Unknown symbols are cached as None so they don't go upstream on every poll
+        for symbol in symbols:
+            self.cache.put(symbol, quotes.get(symbol), now)
+        return quotes
+
+    def refresh(self, symbol):
+        """Revalidate a stale quote without making the caller wait"""
+        future = self.batcher.request(symbol)
+
+        def done(f):
+            if f.exception() is not None:
+                self.metrics['refresh_errors'] += 1
+        future.add_done_callback(done)
+
+    async def get_quotes(self, symbols):
+        """Quotes in request order; symbols upstream doesn't know are left out"""
+        symbols = list(dict.fromkeys(symbols))
+        self.metrics['requests'] += 1
+        self.metrics['symbols_requested'] += len(symbols)
+        now = time.monotonic()
+        quotes, waiting = {}, {}
+        for symbol in symbols:
+            state, quote = self.cache.get(symbol, now)
+            if state == 'miss':
+                self.metrics['misses'] += 1
+                waiting[symbol] = self.batcher.request(symbol)
+                continue
+            self.metrics['hits' if state == 'fresh' else 'stale_hits'] += 1
+            quotes[symbol] = quote
+            if state == 'stale':
+                self.refresh(symbol)
+        if waiting:
+            # Futures are shared by every viewer of a symbol: one viewer giving up must not cancel them
+            results = await asyncio.gather(*map(asyncio.shield, waiting.values()))
+            quotes.update(zip(waiting, results))
+        return [quotes[s] for s in symbols if quotes.get(s) is not None]
+
+    def snapshot(self):
+        m = dict(self.metrics)
+        served = m['hits'] + m['stale_hits'] + m['misses']
+        m['hit_ratio'] = round((m['hits'] + m['stale_hits']) / served, 4) if served else None
+        m['cached_symbols'] = len(self.cache.entries)
+        return m
+
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status, headers=CORS_HEADERS)
+
+
+def create_app(service):
+    """aiohttp app answering the edge function's POST {symbols} contract, plus /metrics"""
+
+    async def quotes(request):
+        if request.method == 'OPTIONS':
+            return web.Response(text='ok', headers=CORS_HEADERS)
+        try:
+            symbols = (await request.json()).get('symbols')
+        except (json.JSONDecodeError, AttributeError):
+            symbols = None
+        if not symbols or not isinstance(symbols, list):
+            return json_response({'error': 'Symbols array is required', 'success': False}, 400)
+        if len(symbols) > MAX_REQUEST_SYMBOLS:
+            return json_response({'error': f"At most {MAX_REQUEST_SYMBOLS} symbols per request",
+                                  'success': False}, 400)
+        try:
+            result = await service.get_quotes([str(s) for s in symbols])
+        except Exception as e:
+            return json_response({'error': str(e), 'success': False}, 502)
+        return json_response({'quoteResponse': {'result': result, 'error': None}})
+
+    async def metrics(_):
+        return json_response(service.snapshot())
+
+    async def on_startup(_):
+        await service.start()
+
+    async def on_cleanup(_):
+        await service.close()
+
+    app = web.Application()
+    app.router.add_route('*', '/', quotes)
+    app.router.add_route('*', '/functions/v1/fetch-yahoo-finance', quotes)
+    app.router.add_get('/metrics', metrics)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def create_mock_upstream(latency=0.05, calls=None):
+    """Local stand-in for Yahoo's v7/finance/quote; appends each call's symbols to `calls`"""
+    calls = [] if calls is None else calls
+
+    async def quote(request):
+        symbols = [s for s in request.query.get('symbols', '').split(',') if s]
+        calls.append(symbols)
+        await asyncio.sleep(latency)
+        result = []
+        for symbol in symbols:
+            if symbol.startswith('BAD'):
+                continue
+            price = 100 + random.random() * 1000
+            change = random.uniform(-5, 5)
+            result.append({
+                'symbol': symbol,
+                'regularMarketPrice': round(price, 2),
+                'regularMarketChange': round(change, 2),
+                'regularMarketChangePercent': round(change / price * 100, 4),
+                'regularMarketVolume': random.randint(10_000, 10_000_000),
+            })
+        return web.json_response({'quoteResponse': {'result': result, 'error': None}})
+
+    app = web.Application()
+    app.router.add_get('/v7/finance/quote', quote)
+    return app, calls
+
+
+async def start_site(app, host='127.0.0.1', port=0):
+    """Run an app in the current loop; returns (runner, base URL)"""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound}"
+
+
+async def load_test(viewers=200, rounds=5, interval=1.0, latency=0.05, ttl=DEFAULT_TTL):
+    """Concurrent viewers polling random symbol sets through the service, against the mock upstream"""
+    mock, calls = create_mock_upstream(latency)
+    mock_runner, mock_url = await start_site(mock)
+    service = QuoteService(f"{mock_url}/v7/finance/quote", ttl=ttl, rate=1000, burst=1000)
+    service_runner, service_url = await start_site(create_app(service))
+
+    latencies = []
+    async with aiohttp.ClientSession() as session:
+
+        async def viewer():
+            symbols = DASHBOARD_SYMBOLS + random.sample(LOAD_TEST_SYMBOLS[4:], 5)
+            for _ in range(rounds):
+                await asyncio.sleep(random.uniform(0, interval))
+                start = time.perf_counter()
+                async with session.post(service_url, json={'symbols': symbols}) as response:
+                    data = await response.json()
+                    assert response.status == 200 and len(data['quoteResponse']['result']) == len(symbols)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(viewer() for _ in range(viewers)))
+        wall = time.perf_counter() - start
+
+    metrics = service.snapshot()
+    await service_runner.cleanup()
+    await mock_runner.cleanup()
+
+    latencies.sort()
+    distinct = len({s for batch in calls for s in batch})
+    print(f"{viewers} viewers x {rounds} polls = {metrics['requests']:,} requests "
+          f"({metrics['symbols_requested']:,} symbol lookups) in {wall:.2f}s")
+    print(f"upstream: {len(calls)} calls for {sum(map(len, calls))} symbols "
+          f"({distinct} distinct); without the service: {metrics['requests']:,} calls")
+    print(f"cache: {metrics['hits']:,} fresh, {metrics['stale_hits']:,} stale, {metrics['misses']:,} misses "
+          f"(hit ratio {metrics['hit_ratio']:.1%})")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms")
+    return metrics, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve batched, cached Yahoo Finance quotes')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--upstream', default=YAHOO_QUOTE_URL, help='Quote endpoint (v7/finance/quote shape)')
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL, help='Seconds a quote is served as fresh')
+    parser.add_argument('--stale-ttl', type=float, default=DEFAULT_STALE_TTL,
+                        help='Further seconds a quote is served while it is refreshed')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW, help='Seconds requests are coalesced')
+    parser.add_argument('--mock', action='store_true', help='Serve from a local mock upstream instead of Yahoo')
+    parser.add_argument('--load-test', type=int, metavar='VIEWERS',
+                        help='Simulate concurrent dashboard viewers against the mock upstream')
+    parser.add_argument('--rounds', type=int, default=5, help='Polls per viewer in --load-test')
+    args = parser.parse_args()
+
+    if args.load_test:
+        asyncio.run(load_test(args.load_test, args.rounds, ttl=args.ttl))
+        return
+
+    async def serve():
+        upstream = args.upstream
+        if args.mock:
+            mock_runner, mock_url = await start_site(create_mock_upstream()[0])
+            upstream = f"{mock_url}/v7/finance/quote"
+            print(f"⚠️  Using mock upstream at {upstream}")
+        service = QuoteService(upstream, args.ttl, args.stale_ttl, args.window)
+        runner, url = await start_site(create_app(service), args.host, args.port)
+        print(f"✅ Quote service on {url} (POST {{\"symbols\": [...]}}, GET /metrics)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+            if args.mock:
+                await mock_runner.cleanup()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
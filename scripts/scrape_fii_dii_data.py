@@ -4,12 +4,16 @@ Extracts historical FII/DII data and converts to our CSV format
 """
 
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime
 import json
 import time
 
+from fii_dii_async_fetcher import fetch_all_segments
+from embedded_json import extract_json_tables
+from http_cache import UNCHANGED, HTTPCache
+from table_extraction import parse_html_tables
+
 # Base URLs for different data types
 URLS = {
     'cash_provisional': 'https://trendlyne.com/macro-data/fii-dii/latest/cash-pastmonth/',
@@ -19,56 +23,54 @@ URLS = {
     'mf_fo': 'https://trendlyne.com/macro-data/fii-dii/latest/mf-fo/',
 }
 
-def get_financial_year(date_str):
-    """Convert date to financial year (Apr-Mar)"""
-    date = pd.to_datetime(date_str)
-    if date.month >= 4:
-        return f"FY {date.year}-{str(date.year + 1)[-2:]}"
-    else:
-        return f"FY {date.year - 1}-{str(date.year)[-2:]}"
+# Trendlyne updates the provisional cash page intraday; the rest change daily
+CACHE_TTLS = {
+    'https://trendlyne.com/macro-data/fii-dii/latest/cash-pastmonth/': 5 * 60,
+    'https://trendlyne.com/': 60 * 60,
+}
 
-def scrape_trendlyne_data(url, data_type):
-    """Scrape data from Trendlyne"""
+def scrape_trendlyne_data(url, data_type, cache=None):
+    """Scrape data tables from a Trendlyne page
+    
+    With an HTTPCache the page is revalidated instead of re-downloaded, and
+    UNCHANGED is returned when its body matches the last one parsed
+    """
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     }
     
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Try to find data tables or JSON data embedded in the page
-        # Trendlyne often embeds data in script tags
-        scripts = soup.find_all('script')
-        
-        for script in scripts:
-            if script.string and 'data' in script.string:
-                # Try to extract JSON data
-                try:
-                    # Look for patterns like var data = {...}
-                    if 'var data' in script.string or 'const data' in script.string:
-                        print(f"Found potential data in script tag for {data_type}")
-                        # You would parse the JavaScript data here
-                        pass
-                except:
-                    pass
+        if cache is not None:
+            page = cache.get(url, headers=headers)
+            if not page.changed:
+                print(f"{data_type} unchanged since the last run")
+                return UNCHANGED
+            html = page.text
+        else:
+            response = requests.get(url, headers=headers)
+            response.raise_for_status()
+            html = response.text
         
-        # Also try to find HTML tables
-        tables = soup.find_all('table')
+        # Trendlyne often embeds the data as JSON in script tags; reading it
+        # straight from the page text skips DOM and HTML table parsing
+        tables = extract_json_tables(html)
         if tables:
-            print(f"Found {len(tables)} tables for {data_type}")
-            for idx, table in enumerate(tables):
-                print(f"\nTable {idx + 1}:")
-                # Try to parse table
-                try:
-                    df = pd.read_html(str(table))[0]
+            print(f"Found {len(tables)} embedded data payloads for {data_type}")
+            for idx, df in enumerate(tables):
+                print(f"\nPayload {idx + 1}:")
+                print(df.head())
+        else:
+            # Fall back to HTML tables
+            tables = parse_html_tables(html)
+            if tables:
+                print(f"Found {len(tables)} tables for {data_type}")
+                for idx, df in enumerate(tables):
+                    print(f"\nTable {idx + 1}:")
                     print(df.head())
-                except:
-                    pass
         
-        return soup
+        if cache is not None:
+            cache.mark_processed(page)
+        return tables
         
     except Exception as e:
         print(f"Error scraping {data_type}: {e}")
@@ -167,11 +169,27 @@ def main():
     print("3. Add delays between requests")
     print("4. Use browser automation tools\n")
     
-    # Try scraping each URL
-    for data_type, url in URLS.items():
-        print(f"\nScraping {data_type}...")
-        soup = scrape_trendlyne_data(url, data_type)
-        time.sleep(2)  # Be respectful with delays
+    # Fetch every segment concurrently (rate limited per host, no blind sleeps);
+    # pages that have not changed since the last run are neither downloaded
+    # again nor re-parsed
+    start = time.perf_counter()
+    cache = HTTPCache(ttls=CACHE_TTLS)
+    results = fetch_all_segments(URLS, cache=cache)
+    for data_type, tables in results.items():
+        print(f"\n{data_type}:")
+        if tables is None:
+            print("  Failed to fetch")
+            continue
+        if tables is UNCHANGED:
+            print("  Unchanged since the last run")
+            continue
+        print(f"  Found {len(tables)} tables")
+        for idx, df in enumerate(tables):
+            print(f"\nTable {idx + 1}:")
+            print(df.head())
+    print(f"\nFetched {len(results)} segments in {time.perf_counter() - start:.2f}s")
+    print(f"HTTP cache: {cache.summary()}")
+    cache.close()
     
     # Create sample CSVs with the structure
     print("\n\nCreating sample CSV files with correct structure...")
@@ -8,6 +8,8 @@ import os
 import json
 from typing import Dict, Any
 
+from ai_interpretation import SECTION_PROMPTS
+
 def setup_gemini_config():
     """Setup Gemini API configuration"""
     
@@ -62,13 +64,7 @@ export const generateAIInterpretation = async (prompt: string): Promise<string>
     print(example_code)
     
     print("\nForex-specific prompts for better interpretations:")
-    prompts = {
-        "kpis": "Analyze forex reserves KPIs: latest value, weekly change %, yearly change %. Provide 3-4 line economic interpretation focusing on RBI policy and market conditions.",
-        "composition": "Analyze forex reserves composition: FCA %, Gold %, SDRs %, IMF position %. Explain diversification strategy and economic implications in 3-4 lines.",
-        "import_cover": "Analyze import cover ratio (months). Explain adequacy against IMF standards and economic resilience in 3-4 lines.",
-        "volatility": "Analyze weekly volatility patterns in forex reserves. Explain RBI intervention strategy and market dynamics in 3-4 lines.",
-        "comparison": "Analyze relationship between forex reserves and USD/INR exchange rate. Explain correlation and policy implications in 3-4 lines."
-    }
+    prompts = SECTION_PROMPTS
     
     for key, prompt in prompts.items():
         print(f"\n{key.upper()}:")
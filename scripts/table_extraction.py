@@ -0,0 +1,117 @@
+"""
+Shared Table Extraction
+Pulls whole tables out of a live page in a single WebDriver call (or out of
+static HTML) and turns them into DataFrames with typed columns
+"""
+
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# Returns every table under arguments[0] (or the document) as
+# {headers: [...], rows: [[...], ...]} in one round-trip. A row made only of
+# <th> cells is treated as the header, matching the old cell-by-cell logic.
+TABLES_JS = """
+var root = arguments[0] || document;
+var tables = root.tagName === 'TABLE' ? [root] : root.querySelectorAll('table');
+var out = [];
+for (var t = 0; t < tables.length; t++) {
+  var headers = [];
+  var rows = [];
+  var trs = tables[t].rows;
+  for (var i = 0; i < trs.length; i++) {
+    var cells = trs[i].cells;
+    var values = [];
+    var headerOnly = true;
+    for (var j = 0; j < cells.length; j++) {
+      values.push(cells[j].innerText.trim());
+      if (cells[j].tagName !== 'TH') headerOnly = false;
+    }
+    if (!values.length) continue;
+    if (headerOnly) { headers = values; } else { rows.push(values); }
+  }
+  out.push({headers: headers, rows: rows});
+}
+return out;
+"""
+
+# Placeholders Trendlyne / NSE use for missing values
+NULL_TOKENS = {'', '-', '--', '—', 'NA', 'N/A', 'nan'}
+
+
+def parse_numeric(series):
+    """Parse '1,234.5', '(1,234.5)' and '₹ -12' style strings into floats"""
+    text = series.astype(str).str.strip()
+    negative = text.str.startswith('(') & text.str.endswith(')')
+    cleaned = text.str.replace(',', '', regex=False).str.strip('()₹ ')
+    cleaned = cleaned.mask(cleaned.isin(NULL_TOKENS))
+    try:
+        # Fast path: everything left is a plain number
+        values = cleaned.astype('float64')
+    except (TypeError, ValueError):
+        values = pd.to_numeric(cleaned, errors='coerce')
+    return values.mask(negative, -values)
+
+
+def parse_dates(values, formats):
+    """Parse a string column with explicit formats, each tried only on what is still unparsed
+
+    Long files repeat each date many times, so only the distinct strings are parsed
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    pending = pd.Series(True, index=uniques.index)
+    for fmt in formats:
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(uniques[pending], format=fmt, errors='coerce')
+        pending &= parsed.isna()
+    # factorize marks missing values with -1
+    result = parsed.to_numpy().take(codes)
+    result[codes == -1] = np.datetime64('NaT')
+    return pd.Series(result, index=values.index)
+
+
+def type_columns(df):
+    """Convert every column whose non-blank cells are all numeric to float"""
+    typed = df.copy()
+    for col in typed.columns:
+        if pd.api.types.is_numeric_dtype(typed[col]):
+            continue
+        values = parse_numeric(typed[col])
+        blank = typed[col].astype(str).str.strip().isin(NULL_TOKENS)
+        if values.notna().any() and (values.notna() | blank).all():
+            typed[col] = values
+    return typed
+
+
+def to_typed_frame(headers, rows):
+    """Build a typed DataFrame from a header list and a row matrix"""
+    width = max([len(headers)] + [len(r) for r in rows]) if rows else len(headers)
+    columns = list(headers) + [f"col_{i}" for i in range(len(headers), width)]
+    # Ragged rows (colspans, footer notes) are padded to the header width
+    matrix = [list(r) + [''] * (width - len(r)) for r in rows]
+    return type_columns(pd.DataFrame(matrix, columns=columns))
+
+
+def extract_tables(driver, root=None):
+    """Extract every table under root (default: whole page) in one WebDriver call"""
+    return [to_typed_frame(t['headers'], t['rows'])
+            for t in driver.execute_script(TABLES_JS, root)]
+
+
+def extract_table(driver, table):
+    """Extract a single table WebElement in one WebDriver call"""
+    return extract_tables(driver, table)[0]
+
+
+def parse_html_tables(html):
+    """Parse every table in an HTML string with the lxml parser and type the columns"""
+    try:
+        tables = pd.read_html(StringIO(html), flavor='lxml')
+    except ValueError:
+        # read_html raises ValueError when there are no tables
+        return []
+    return [type_columns(df) for df in tables]
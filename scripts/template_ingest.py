@@ -0,0 +1,1082 @@
+"""
+Template Ingestion Framework
+Declares every public/templates CSV format once (columns, types, date formats,
+target table) and runs them all through one vectorised reader / validator /
+loader, so a directory of datasets batch-loads offline instead of through the
+admin uploaders one file at a time
+"""
+
+import argparse
+import csv
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from amfi_reports import parse_report
+from fii_dii_transform import parse_numeric_frame
+from fii_dii_validation import (DEFAULT_QUARANTINE_DIR, ValidationReport, cell_issues, issue_labels,
+                                print_report, row_issues, spec_for, validated_transform, write_quarantine)
+from forex_reserves_ingest import TABLE as FOREX_TABLE, parse_forex_frame
+from nse_stream_ingest import STREAM_SPECS
+from pg_loader import TABLE_KEYS, connect, load_frame, record_upload, replace_frame
+from table_extraction import NULL_TOKENS, parse_dates
+
+TEMPLATES_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'public', 'templates'))
+
+DATE_FORMATS = ['%Y-%m-%d', '%d-%b-%Y', '%d/%m/%Y']
+# ipoParser.parseDate: ISO or MM/DD/YYYY
+IPO_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%d-%b-%Y']
+# "2025/06(JUN)" (IIP wide templates), "2025:06 (JUN)" (MOSPI exports), "2024-12" (components)
+IIP_DATE_FORMATS = ['%Y/%m(%b)', '%Y:%m (%b)', '%Y:%m(%b)', '%Y-%m', '%Y-%m-%d']
+
+# Units and currency markers the uploaders strip before parsing ("500 Cr", "Rs 320", "15.5%")
+UNIT_RE = r'(?i)rs\.?|cr(?:ore)?s?\.?|%'
+
+# The header row is looked for in this many leading lines (AMFI-style preambles are 1-4 lines)
+HEADER_SCAN_LINES = 20
+
+# --benchmark moves dates no earlier than this when it needs fresh date keys (pandas stops at 1677)
+MIN_SYNTHETIC_YEAR = 1700
+
+NO_GAPS = pd.DataFrame(columns=['after', 'before', 'missing_weekdays'])
+
+BREADTH_COUNTS = ['advances', 'declines', 'unchanged', 'high_52w', 'low_52w', 'above_50dma', 'above_200dma',
+                  'total_stocks']
+
+IPO_LISTING_COLUMNS = {
+    'company_name': ['Company Name'],
+    'main_industry': ['Main Industry'],
+    'sector': ['Sector'],
+    'issue_size': ['Issue Size'],
+    'issue_price': ['Issue Price'],
+    'listing_date': ['Listing Date'],
+    'listing_open': ['Listing Open (Rs)'],
+    'listing_close': ['Listing Close (Rs)'],
+    'listing_gain_percent': ['Listing Gain %'],
+    'ltp': ['LTP (Rs)'],
+    'market_cap': ['Market Cap (Cr)'],
+    'current_gain_percent': ['Current Gain %'],
+}
+IPO_LISTING_VALUES = ['issue_size', 'issue_price', 'listing_open', 'listing_close', 'listing_gain_percent', 'ltp',
+                      'market_cap', 'current_gain_percent']
+
+# GDP expenditure components: DB column prefix -> template label
+GDP_COMPONENTS = {
+    'pfce': 'PFCE',
+    'gfce': 'GFCE',
+    'gfcf': 'GFCF',
+    'changes_in_stocks': 'Changes in Stocks',
+    'valuables': 'Valuables',
+    'exports': 'Exports',
+    'imports': 'Imports',
+    'discrepancies': 'Discrepancies',
+    'gdp': 'GDP',
+}
+
+# IIP wide-template headers -> (component_code, component_name, classification_type), as IIPInflationAdmin maps them
+IIP_COMPONENTS = {
+    '1.1 Mining': ('mining', 'Mining', 'sectoral'),
+    '1.2 Manufacturing': ('manufacturing', 'Manufacturing', 'sectoral'),
+    '1.3 Electricity': ('electricity', 'Electricity', 'sectoral'),
+    '2.1 Primary Goods': ('primary_goods', 'Primary Goods', 'use_based'),
+    '2.2 Capital Goods': ('capital_goods', 'Capital Goods', 'use_based'),
+    '2.3 Intermediate Goods': ('intermediate_goods', 'Intermediate Goods', 'use_based'),
+    '2.4 Infrastructure/Construction Goods': ('infrastructure_construction', 'Infrastructure/Construction Goods',
+                                              'use_based'),
+    '2.5 Consumer Durables': ('consumer_durables', 'Consumer Durables', 'use_based'),
+    '2.6 Consumer Non-Durables': ('consumer_non_durables', 'Consumer Non-Durables', 'use_based'),
+}
+
+# The seven flow tables' templates (fii_dii_transform.TABLE_SPECS holds their columns)
+FLOW_TEMPLATES = {
+    'fii_dii_cash_provisional': 'fii_dii_cash_provisional_template.csv',
+    'fii_cash_data': 'fii_cash_template.csv',
+    'fii_fo_indices_data': 'fii_fo_indices_template.csv',
+    'fii_fo_stocks_data': 'fii_fo_stocks_template.csv',
+    'dii_cash_data': 'dii_cash_template.csv',
+    'dii_fo_indices_data': 'dii_fo_indices_template.csv',
+    'dii_fo_stocks_data': 'dii_fo_stocks_template.csv',
+}
+
+LEGACY_FLOW_COLUMNS = [f"{leg}_{measure}" for leg in ('FII_Equity', 'DII_Equity', 'FII_Debt', 'DII_Debt')
+                       for measure in ('Buy', 'Sell', 'Net')]
+
+
+def listing_year(df):
+    """ipo_listings.year from the listing date"""
+    df['year'] = pd.to_numeric(df['listing_date'].str[:4], errors='coerce').astype('Int64')
+    return df
+
+
+def market_cap_display(df):
+    """'₹1234.56 Cr' label next to market_cap in rupees, as StockMasterUpload stores it"""
+    crore = df['market_cap'] / 10_000_000
+    df['market_cap_display'] = ('₹' + crore.map('{:.2f}'.format) + ' Cr').where(crore.notna())
+    return df
+
+
+def iip_components(df, measure):
+    """Wide IIP index / growth template -> one iip_components row per month and component
+
+    The 'Weight' row under the header gives every component's weight
+    """
+    cols = [c for c in df.columns if c in IIP_COMPONENTS]
+    weight_row = df['date'].fillna('').str.strip().str.lower() == 'weight'
+    weights = df.loc[weight_row, cols].iloc[0] if weight_row.any() else pd.Series(np.nan, index=cols)
+    long = df[~weight_row].melt(id_vars=['date'], value_vars=cols, var_name='header', value_name=measure)
+    meta = pd.DataFrame.from_dict(IIP_COMPONENTS, orient='index',
+                                  columns=['component_code', 'component_name', 'classification_type'])
+    long = long.join(meta, on='header')
+    long['weight'] = long['header'].map(weights)
+    return long.drop(columns=['header'])
+
+
+def heatmap_values(df):
+    """Wide state x indicator template -> one row per year, state and indicator slug
+
+    "GDP Growth Rate [%]" -> gdp_growth_rate, the slug HeatmapAdminNew gives the indicator
+    """
+    indicators = [c for c in df.columns if c not in ('year_label', 'state_name')]
+    long = df.melt(id_vars=['year_label', 'state_name'], value_vars=indicators, var_name='indicator',
+                   value_name='value')
+    long = long[long['value'].fillna('').str.strip() != '']
+    names = long['indicator'].str.replace(r'\s*\[[^\]]*\]\s*$', '', regex=True).str.strip()
+    long['indicator'] = names.str.lower().str.replace(r'[^a-z0-9]+', '_', regex=True)
+    return long
+
+
+def clean_report(name, rows):
+    """Report for formats whose own parser already dropped what it could not read"""
+    issues = row_issues('invalid_date', np.zeros(0, dtype=bool), np.empty(0, dtype=object))
+    issues['severity'] = pd.Series(dtype=object)
+    return ValidationReport(name, rows, issues, NO_GAPS, 0.0)
+
+
+def flow_prepare(path, name):
+    """FII/DII flow templates: fii_dii_transform spec + fii_dii_validation checks"""
+    return validated_transform(pd.read_csv(path, dtype=str), spec_for(name), report_name(path, name))
+
+
+def forex_prepare(path, name):
+    """RBI forex template via forex_reserves_ingest, which drops unreadable weeks itself"""
+    start = time.perf_counter()
+    raw = pd.read_csv(path, dtype=str)
+    report = clean_report(report_name(path, name), len(raw))
+    frame = parse_forex_frame(raw)
+    report.elapsed = time.perf_counter() - start
+    return frame, raw.iloc[:0], report
+
+
+def amfi_prepare(path, name):
+    """AMFI investor-behaviour / quarterly AUM reports, parsed to long format by amfi_reports"""
+    start = time.perf_counter()
+    frame = parse_report(path).get(name, pd.DataFrame())
+    report = clean_report(report_name(path, name), len(frame))
+    report.elapsed = time.perf_counter() - start
+    return frame, frame.iloc[:0], report
+
+
+def gdp_format(template, table, columns, keys):
+    """GDP formats differ only in their period columns and value headers"""
+    return {
+        'template': template,
+        'table': table,
+        'columns': {**{k: [v] for k, v in keys.items()}, **columns},
+        'float_cols': list(columns),
+        'required': list(keys),
+    }
+
+
+def iip_wide_formats(template, measure, series_name, components_name):
+    """A wide IIP template feeds iip_series (General Index) and iip_components (the rest)
+
+    Only the template's measure is staged, so an index upload keeps growth figures and
+    vice versa. iip_series.index_value is NOT NULL: load index files before growth files
+    """
+    date = {'date': ['Month/Year', 'Month', 'Date']}
+    return {
+        series_name: {
+            'template': template,
+            'table': 'iip_series',
+            'columns': {**date, measure: ['General Index']},
+            'float_cols': [measure],
+            'date_cols': ['date'],
+            'date_formats': IIP_DATE_FORMATS,
+            'skip': {'date': r'weight'},
+            'required': ['date', measure],
+        },
+        components_name: {
+            'template': template,
+            'table': 'iip_components',
+            'columns': date,
+            'reshape': partial(iip_components, measure=measure),
+            'float_cols': ['weight', measure],
+            'date_cols': ['date'],
+            'date_formats': IIP_DATE_FORMATS,
+            'required': ['date'],
+        },
+    }
+
+
+# Format name -> spec, in load order (AMCs before the schemes that reference them,
+# IIP index before growth). Spec keys, alongside those of nse_stream_ingest.STREAM_SPECS:
+#   template     file in public/templates; other files match by its stem as a name prefix
+#   table        target table, upserted on pg_loader.TABLE_KEYS (None: parse / validate only)
+#   replace      delete the table's rows for these columns' values, then insert (uploaders that replace)
+#   columns      output column -> header aliases, matched case-insensitively (the column name always matches)
+#   int_cols / float_cols / date_cols + date_formats: types; every other column is text
+#   required     rows missing these are quarantined
+#   defaults     fill for blank cells of clean rows, as the uploaders do
+#   scale        multiplier after parsing ('Value (Cr)' -> rupees)
+#   case         {'col': 'upper' | 'lower'}
+#   choices      {'col': (allowed, fallback)}; with no fallback other values are quarantined
+#   constants    fixed columns added to every row
+#   meta         column -> regex over the preamble above the header ("Month Year: 2025-07-01")
+#   skip         {'col': regex}: rows whose cell matches are dropped (the IIP weight row)
+#   reshape      callable(frame) -> frame for wide layouts, run before typing
+#   derive       callable(frame) -> frame, run after typing
+#   lookups      id column -> (table, id column, match column, frame column), resolved at load time
+#   distinct     keep the first row per key (one AMC row per scheme row)
+#   prepare      callable(path, name) -> (clean, quarantined, report) for formats with their own parser
+FORMATS = {
+    **{name: {'template': template, 'table': name, 'prepare': flow_prepare}
+       for name, template in FLOW_TEMPLATES.items()},
+    'fii_dii_monthly': {'template': 'fii_dii_monthly_template.csv', 'table': None, 'prepare': flow_prepare},
+    # Legacy long / wide flow layouts with no table behind them
+    'fii_dii_daily': {
+        'template': 'fii_dii_daily_template.csv',
+        'table': None,
+        'columns': {
+            'date': ['Date'],
+            'investor_type': ['Investor_Type'],
+            'segment': ['Segment'],
+            'asset_class': ['Asset_Class'],
+            'gross_purchase': ['Gross_Purchase'],
+            'gross_sales': ['Gross_Sales'],
+            'net_purchase_sales': ['Net_Purchase_Sales'],
+        },
+        'float_cols': ['gross_purchase', 'gross_sales', 'net_purchase_sales'],
+        'date_cols': ['date'],
+        'case': {'investor_type': 'upper'},
+        'required': ['date', 'investor_type'],
+    },
+    'fii_dii_derivatives': {
+        'template': 'fii_dii_derivatives_template.csv',
+        'table': None,
+        'columns': {
+            'date': ['Date'],
+            'investor_type': ['Investor_Type'],
+            'instrument': ['Instrument'],
+            'market_type': ['Market_Type'],
+            'gross_purchase': ['Gross_Purchase'],
+            'gross_sales': ['Gross_Sales'],
+            'net_purchase_sales': ['Net_Purchase_Sales'],
+        },
+        'float_cols': ['gross_purchase', 'gross_sales', 'net_purchase_sales'],
+        'date_cols': ['date'],
+        'case': {'investor_type': 'upper'},
+        'required': ['date', 'investor_type'],
+    },
+    'fii_dii': {
+        'template': 'fii_dii_template.csv',
+        'table': None,
+        'columns': {'date': ['Date'], **{col.lower(): [col] for col in LEGACY_FLOW_COLUMNS}},
+        'float_cols': [col.lower() for col in LEGACY_FLOW_COLUMNS],
+        'date_cols': ['date'],
+        'required': ['date'],
+    },
+    'forex_reserves': {'template': 'forex_reserves_template.csv', 'table': FOREX_TABLE, 'prepare': forex_prepare},
+    'nse_fii_dii': {
+        'template': 'nse_fii_dii_template.csv',
+        'table': 'fii_dii_activity',
+        'columns': {
+            'date': ['Date'],
+            'category': ['Category'],
+            'buy_value': ['Buy Value (Cr)'],
+            'sell_value': ['Sell Value (Cr)'],
+            'net_value': ['Net Value (Cr)'],
+        },
+        'float_cols': ['buy_value', 'sell_value', 'net_value'],
+        'date_cols': ['date'],
+        'scale': dict.fromkeys(['buy_value', 'sell_value', 'net_value'], 10_000_000),
+        'case': {'category': 'upper'},
+        'required': ['date', 'category'],
+    },
+    'nse_bulk_deals': {
+        **STREAM_SPECS['bulk_deals'],
+        'template': 'nse_bulk_deals_template.csv',
+        'table': 'bulk_deals',
+        'case': {'deal_type': 'lower'},
+        # Short rows (a missing field) shift values left and land here
+        'choices': {'deal_type': (['buy', 'sell'], None)},
+        'defaults': {'exchange': 'NSE'},
+    },
+    'nse_block_deals': {
+        **STREAM_SPECS['block_deals'],
+        'template': 'nse_block_deals_template.csv',
+        'table': 'block_deals',
+        'case': {'deal_type': 'lower'},
+        'choices': {'deal_type': (['buy', 'sell'], None)},
+        'defaults': {'exchange': 'NSE'},
+    },
+    'nse_stock_prices': {**STREAM_SPECS['stock_prices'], 'template': 'nse_stock_prices_template.csv',
+                         'table': 'stock_prices'},
+    'nse_indices': {
+        'template': 'nse_indices_template.csv',
+        'table': 'market_indices',
+        'columns': {
+            'timestamp': ['Date'],
+            'symbol': ['Index Symbol'],
+            'name': ['Index Name'],
+            'last_price': ['Last Price'],
+            'change': ['Change'],
+            'change_percent': ['Change %'],
+            'open': ['Open'],
+            'high': ['High'],
+            'low': ['Low'],
+            'previous_close': ['Previous Close'],
+            'year_high': ['Year High'],
+            'year_low': ['Year Low'],
+            'volume': ['Volume'],
+        },
+        'int_cols': ['volume'],
+        'float_cols': ['last_price', 'change', 'change_percent', 'open', 'high', 'low', 'previous_close',
+                       'year_high', 'year_low'],
+        'date_cols': ['timestamp'],
+        'required': ['timestamp', 'symbol'],
+    },
+    'market_breadth': {
+        'template': 'market_breadth_template.csv',
+        'table': 'market_breadth',
+        'columns': {
+            'date': ['Date'],
+            'exchange': ['Exchange'],
+            'advances': ['Advances'],
+            'declines': ['Declines'],
+            'unchanged': ['Unchanged'],
+            'high_52w': ['High_52W'],
+            'low_52w': ['Low_52W'],
+            'above_50dma': ['Above_50DMA'],
+            'above_200dma': ['Above_200DMA'],
+            'total_stocks': ['Total_Stocks'],
+        },
+        'int_cols': BREADTH_COUNTS,
+        'date_cols': ['date'],
+        'defaults': dict.fromkeys(BREADTH_COUNTS, 0),
+        'required': ['date', 'exchange'],
+    },
+    'nse_market_breadth': {
+        'template': 'nse_market_breadth_template.csv',
+        'table': 'market_breadth',
+        'columns': {
+            'date': ['Date'],
+            'exchange': ['Exchange'],
+            'advances': ['Advances'],
+            'declines': ['Declines'],
+            'unchanged': ['Unchanged'],
+            'high_52w': ['52W High'],
+            'low_52w': ['52W Low'],
+            'total_stocks': ['Total Stocks'],
+            'timestamp': ['Date'],
+        },
+        'int_cols': ['advances', 'declines', 'unchanged', 'high_52w', 'low_52w', 'total_stocks'],
+        'date_cols': ['date', 'timestamp'],
+        'required': ['date', 'exchange'],
+    },
+    'sector_metrics': {
+        'template': 'sector_metrics_template.csv',
+        'table': 'sector_data',
+        'columns': {
+            'date': ['Date'],
+            'sector_name': ['Sector_Name'],
+            'sector_slug': ['Sector_Slug'],
+            'nse_symbol': ['NSE_Symbol'],
+            'bse_symbol': ['BSE_Symbol'],
+            'price': ['Price'],
+            'change_percent': ['Change_Percent'],
+            'pe_ratio': ['PE_Ratio'],
+            'pb_ratio': ['PB_Ratio'],
+            'market_cap': ['Market_Cap'],
+        },
+        'float_cols': ['price', 'change_percent', 'pe_ratio', 'pb_ratio', 'market_cap'],
+        'date_cols': ['date'],
+        'defaults': dict.fromkeys(['price', 'change_percent', 'pe_ratio', 'pb_ratio', 'market_cap'], 0),
+        'required': ['date', 'sector_slug'],
+    },
+    'stock_master': {
+        'template': 'stock_master_template.csv',
+        'table': 'stock_master',
+        'columns': {
+            'symbol': ['Symbol'],
+            'company_name': ['Company Name'],
+            'sector': ['Sector'],
+            'industry': ['Industry'],
+            'market_cap': ['Market Cap (INR Cr)'],
+            'isin': ['ISIN'],
+            'series': ['Series'],
+            'pe_ratio': ['PE Ratio'],
+            'pb_ratio': ['PB Ratio'],
+            'data_source': ['Data Source'],
+        },
+        'float_cols': ['market_cap', 'pe_ratio', 'pb_ratio'],
+        'scale': {'market_cap': 10_000_000},
+        'case': {'symbol': 'upper', 'series': 'upper', 'data_source': 'lower'},
+        'defaults': {'series': 'EQ', 'data_source': 'manual'},
+        'derive': market_cap_display,
+        'required': ['symbol', 'company_name'],
+    },
+    'investor_master': {
+        'template': 'investor_master_template.csv',
+        'table': 'investor_master',
+        'columns': {
+            'client_name': ['Client Name'],
+            'investor_type': ['Investor Type'],
+            'category': ['Category'],
+            'country': ['Country'],
+            'notes': ['Notes'],
+        },
+        'case': {'investor_type': 'upper'},
+        'choices': {'investor_type': (['FII', 'DII', 'HNI', 'OTHERS'], 'OTHERS')},
+        'constants': {'classification_method': 'manual'},
+        'required': ['client_name'],
+    },
+    'ipo_data': {
+        'template': 'ipo_data_template.csv',
+        'table': 'ipo_data',
+        'columns': {
+            'company_name': ['Company_Name'],
+            'issue_size': ['Issue_Size'],
+            'price_band': ['Price_Band'],
+            'sector': ['Sector'],
+            'open_date': ['Open_Date'],
+            'close_date': ['Close_Date'],
+            'listing_date': ['Listing_Date'],
+            'qib_subscription': ['QIB_Subscription'],
+            'nii_subscription': ['NII_Subscription'],
+            'retail_subscription': ['Retail_Subscription'],
+            'total_subscription': ['Total_Subscription'],
+            'listing_gain_percent': ['Listing_Gain_Percent'],
+            'current_price': ['Current_Price'],
+            'status': ['Status'],
+        },
+        'float_cols': ['qib_subscription', 'nii_subscription', 'retail_subscription', 'total_subscription',
+                       'listing_gain_percent', 'current_price'],
+        'date_cols': ['open_date', 'close_date', 'listing_date'],
+        'date_formats': IPO_DATE_FORMATS,
+        'defaults': {**dict.fromkeys(['qib_subscription', 'nii_subscription', 'retail_subscription',
+                                      'total_subscription', 'listing_gain_percent', 'current_price'], 0),
+                     'status': 'upcoming'},
+        'required': ['company_name', 'open_date'],
+    },
+    **{
+        f"{ipo_type}_ipo": {
+            'template': f"{ipo_type}_ipo_template.csv",
+            'table': 'ipo_listings',
+            'columns': IPO_LISTING_COLUMNS,
+            'float_cols': IPO_LISTING_VALUES,
+            'date_cols': ['listing_date'],
+            'date_formats': IPO_DATE_FORMATS,
+            'defaults': dict.fromkeys(IPO_LISTING_VALUES, 0),
+            'constants': {'ipo_type': ipo_type},
+            'derive': listing_year,
+            'required': ['company_name', 'listing_date'],
+        }
+        for ipo_type in ('mainboard', 'sme')
+    },
+    'mutual_fund_amcs': {
+        'template': 'mutual_fund_template.csv',
+        'table': 'mutual_fund_amcs',
+        'columns': {'amc_code': ['AMC_Code'], 'amc_name': ['AMC_Name']},
+        'distinct': True,
+        'constants': {'total_aum': 0, 'num_schemes': 0},
+        'required': ['amc_code', 'amc_name'],
+    },
+    'mutual_fund_schemes': {
+        'template': 'mutual_fund_template.csv',
+        'table': 'mutual_fund_schemes',
+        'columns': {
+            'scheme_code': ['Scheme_Code'],
+            'amc_code': ['AMC_Code'],
+            'scheme_name': ['Scheme_Name'],
+            'category': ['Category'],
+            'sub_category': ['Sub_Category'],
+            'aum': ['AUM_Crores'],
+            'nav': ['NAV'],
+            'returns_1y': ['Returns_1Y'],
+            'returns_3y': ['Returns_3Y'],
+            'returns_5y': ['Returns_5Y'],
+            'expense_ratio': ['Expense_Ratio'],
+            'fund_manager': ['Fund_Manager'],
+            'risk_grade': ['Risk_Grade'],
+        },
+        'float_cols': ['aum', 'nav', 'returns_1y', 'returns_3y', 'returns_5y', 'expense_ratio'],
+        'defaults': dict.fromkeys(['aum', 'nav', 'returns_1y', 'returns_3y', 'returns_5y', 'expense_ratio'], 0),
+        'lookups': {'amc_id': ('mutual_fund_amcs', 'id', 'amc_code', 'amc_code')},
+        'required': ['scheme_code', 'amc_code', 'scheme_name'],
+    },
+    # GDP: quarterly figures are constant-price only; current-price columns are left untouched
+    'gdp_value': gdp_format(
+        'gdp_value_template.csv', 'gdp_value',
+        {f"{prefix}_constant_price": [label] for prefix, label in GDP_COMPONENTS.items()},
+        {'year': 'Year', 'quarter': 'Quarter'}),
+    'gdp_growth': gdp_format(
+        'gdp_growth_template.csv', 'gdp_growth',
+        {f"{prefix}_constant_price_growth": [f"{label} (% growth)"] for prefix, label in GDP_COMPONENTS.items()},
+        {'year': 'Year', 'quarter': 'Quarter'}),
+    'gdp_annual_value': gdp_format(
+        'gdp_annual_value_template.csv', 'gdp_annual',
+        {f"{prefix}_{price}_price": [f"{label} {price.title()} Price"]
+         for prefix, label in GDP_COMPONENTS.items() for price in ('constant', 'current')},
+        {'year': 'Year'}),
+    'gdp_annual_growth': gdp_format(
+        'gdp_annual_growth_template.csv', 'gdp_annual_growth',
+        {f"{prefix}_{price}_price_growth": [f"{label} {price.title()} Price Growth"]
+         for prefix, label in GDP_COMPONENTS.items() for price in ('constant', 'current')},
+        {'year': 'Year'}),
+    'iip_components': {
+        'template': 'iip_components_template.csv',
+        'table': 'iip_components',
+        'columns': {
+            'date': ['Month/Year'],
+            'classification_type': ['Classification Type'],
+            'component_code': ['Component Code'],
+            'component_name': ['Component Name'],
+            'index_value': ['Index Value'],
+            'weight': ['Weight (%)'],
+            'growth_yoy': ['Growth YoY (%)'],
+            'growth_mom': ['Growth MoM (%)'],
+        },
+        'float_cols': ['index_value', 'weight', 'growth_yoy', 'growth_mom'],
+        'date_cols': ['date'],
+        'date_formats': IIP_DATE_FORMATS,
+        'case': {'classification_type': 'lower'},
+        'choices': {'classification_type': (['sectoral', 'use_based'], None)},
+        'required': ['date', 'classification_type', 'component_code', 'component_name', 'index_value'],
+    },
+    **iip_wide_formats('iip_index_template.csv', 'index_value', 'iip_index_series', 'iip_index_components'),
+    **iip_wide_formats('iip_growth_template.csv', 'growth_yoy', 'iip_growth_series', 'iip_growth_components'),
+    # Same layout and figures as the growth template
+    **iip_wide_formats('iip_series_template.csv', 'growth_yoy', 'iip_series', 'iip_series_components'),
+    # Heatmap indicators must exist already (HeatmapAdminNew creates them from the headers)
+    'heatmap': {
+        'template': 'heatmap_template.csv',
+        'table': 'heatmap_values',
+        'columns': {'year_label': ['Year'], 'state_name': ['State Name', 'State']},
+        'reshape': heatmap_values,
+        'float_cols': ['value'],
+        'constants': {'source': 'Admin Upload'},
+        'lookups': {'indicator_id': ('heatmap_indicators', 'id', 'slug', 'indicator')},
+        'required': ['year_label', 'state_name', 'indicator', 'value'],
+    },
+    'state_aum_composition': {
+        'template': 'state_aum_composition_template.csv',
+        'table': 'state_aum_allocation',
+        'replace': ('month_year',),
+        'meta': {'month_year': r'Month\s+Year\s*:\s*([^,\s]+)'},
+        'columns': {
+            'state_name': ['State'],
+            'industry_share_percentage': ['Industry Share (%)'],
+            'liquid_money_market_percentage': ['Liquid/Money Market (%)'],
+            'debt_oriented_percentage': ['Debt Oriented (%)'],
+            'equity_oriented_percentage': ['Equity Oriented (%)'],
+            'etfs_fofs_percentage': ['ETFs/FoFs (%)'],
+        },
+        'float_cols': ['industry_share_percentage', 'liquid_money_market_percentage', 'debt_oriented_percentage',
+                       'equity_oriented_percentage', 'etfs_fofs_percentage'],
+        'date_cols': ['month_year'],
+        'required': ['month_year', 'state_name', 'industry_share_percentage'],
+    },
+    'state_aum_category': {
+        'template': 'state_aum_category_template.csv',
+        'table': 'state_aum_category_values',
+        'replace': ('month_year',),
+        'meta': {'month_year': r'Month\s+Year\s*:\s*([^,\s]+)'},
+        'columns': {
+            'category': ['Category'],
+            'state_name': ['State'],
+            'aum_crores': ['AuM (Rs. Crores)', 'AUM (Rs. Crores)'],
+            'rank': ['Rank'],
+        },
+        'int_cols': ['rank'],
+        'float_cols': ['aum_crores'],
+        'date_cols': ['month_year'],
+        'required': ['month_year', 'category', 'state_name', 'aum_crores'],
+    },
+    # City coordinates come from the frontend's lookup table and are not set here
+    'city_aum': {
+        'template': 'city_aum_template.csv',
+        'table': 'city_aum_allocation',
+        'replace': ('quarter_end_date',),
+        'meta': {'quarter_end_date': r'Quarter\s+End\s+Date\s*:\s*([^,\s]+)'},
+        'columns': {'city_name': ['City Name'], 'aum_percentage': ['AUM Percentage']},
+        'float_cols': ['aum_percentage'],
+        'date_cols': ['quarter_end_date'],
+        'required': ['quarter_end_date', 'city_name', 'aum_percentage'],
+    },
+    # Their admin uploaders derive scores and category mappings, so these stay parse-only
+    'investor_behavior': {'template': 'investor_behavior_template.csv', 'table': None, 'prepare': amfi_prepare},
+    'quarterly_aum': {'template': 'quarterly_aum_template.csv', 'table': None, 'prepare': amfi_prepare},
+}
+
+
+def template_stem(spec):
+    return spec['template'][:-len('_template.csv')]
+
+
+def report_name(path, name):
+    """Format name for its own template file, else format + file name"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return name if stem == os.path.splitext(FORMATS[name]['template'])[0] else f"{name}_{stem}"
+
+
+def normalize(header):
+    return str(header).strip().lower()
+
+
+def alias_map(spec):
+    """normalised header -> output column"""
+    aliases = {}
+    for out, sources in spec['columns'].items():
+        for source in [*sources, out]:
+            aliases.setdefault(normalize(source), out)
+    return aliases
+
+
+def date_columns(spec):
+    if 'date_cols' in spec:
+        return list(spec['date_cols'])
+    return [spec['date_col']] if 'date_col' in spec else []
+
+
+def row_key(spec):
+    """The table's upsert key, in the frame's columns before lookups ([] for replaced / parse-only tables)"""
+    key = () if spec.get('replace') else TABLE_KEYS.get(spec['table'], ())
+    sources = {out: lookup[3] for out, lookup in spec.get('lookups', {}).items()}
+    return [sources.get(col, col) for col in key]
+
+
+def header_row(lines, spec):
+    """Index of the line matching the most header aliases (0 if none do)"""
+    aliases = alias_map(spec)
+    best, header = 0, 0
+    for i, cells in enumerate(csv.reader(lines[:HEADER_SCAN_LINES])):
+        hits = sum(normalize(c) in aliases for c in cells)
+        if hits > best:
+            best, header = hits, i
+    return header
+
+
+def read_template(path, spec):
+    """String frame from the detected header row on, plus the preamble lines above it"""
+    with open(path, encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+    header = header_row(lines, spec)
+    raw = pd.read_csv(StringIO('\n'.join(lines[header:])), dtype=str, keep_default_na=False, na_values=[''],
+                      skip_blank_lines=True, skipinitialspace=True)
+    raw.columns = [str(c).strip() for c in raw.columns]
+    return raw, lines[:header]
+
+
+def map_columns(raw, spec):
+    """Output columns from their first matching header; unmatched headers are kept for reshape"""
+    sources = {}
+    for col in raw.columns:
+        sources.setdefault(normalize(col), col)
+    data = {}
+    for out, names in spec['columns'].items():
+        source = next((sources[n] for n in map(normalize, [*names, out]) if n in sources), None)
+        data[out] = raw[source] if source is not None else pd.Series(None, index=raw.index, dtype='str')
+    df = pd.DataFrame(data, index=raw.index)
+    if spec.get('reshape'):
+        used = {normalize(n) for names in spec['columns'].values() for n in names}
+        extra = [c for c in raw.columns if normalize(c) not in used]
+        df = pd.concat([df, raw[extra]], axis=1)
+    return df
+
+
+def key_labels(df, cols):
+    """'RELIANCE | 2025-01-15'-style label per row, used in issue listings"""
+    cols = [c for c in cols if c in df]
+    if not cols or df.empty:
+        return np.full(len(df), None, dtype=object)
+    text = [df[c].astype('str').fillna('') for c in cols]
+    return text[0].str.cat(text[1:], sep=' | ').to_numpy(dtype=object)
+
+
+def validate_frame(df, spec, name):
+    """Type a mapped string frame and check it in whole-column passes; returns (clean, quarantined, report)"""
+    start = time.perf_counter()
+    int_cols = list(spec.get('int_cols', []))
+    numeric_cols = int_cols + list(spec.get('float_cols', []))
+    date_cols = date_columns(spec)
+    text_cols = [c for c in df.columns if c not in numeric_cols and c not in date_cols]
+    key = row_key(spec)
+    labels = key_labels(df, key or [*spec.get('replace', ()), *list(spec['columns'])[:1]])
+    frame = df.copy()
+    invalid = pd.DataFrame(False, index=df.index, columns=df.columns)
+    parts = [row_issues('invalid_date', np.zeros(len(df), dtype=bool), labels)]
+
+    for col in text_cols:
+        values = frame[col].astype('str').str.strip()
+        frame[col] = values.mask(values == '')
+    for col, case in spec.get('case', {}).items():
+        frame[col] = frame[col].str.upper() if case == 'upper' else frame[col].str.lower()
+
+    if numeric_cols:
+        cells = frame[numeric_cols].astype('str').replace(r'^\s+|\s+$', '', regex=True)
+        blank = cells.isna() | cells.isin(NULL_TOKENS)
+        values = parse_numeric_frame(cells.replace(UNIT_RE, '', regex=True))
+        bad = ~blank & values.isna()
+        invalid[numeric_cols] = bad
+        parts.append(cell_issues('invalid_value', bad.to_numpy(), numeric_cols, cells.to_numpy(dtype=object),
+                                 labels))
+        for col, factor in spec.get('scale', {}).items():
+            values[col] = values[col] * factor
+        frame[numeric_cols] = values
+
+    formats = spec.get('date_formats', DATE_FORMATS)
+    for col in date_cols:
+        text = frame[col].astype('str').str.strip()
+        text = text.mask(text == '')
+        dates = parse_dates(text, formats)
+        bad = (text.notna() & dates.isna()).to_numpy()
+        invalid[col] = bad
+        parts.append(cell_issues('invalid_date', bad[:, None], [col], text.to_numpy(dtype=object)[:, None],
+                                 labels))
+        frame[col] = dates.dt.strftime('%Y-%m-%d')
+
+    for col, (allowed, fallback) in spec.get('choices', {}).items():
+        outside = ~frame[col].isin(allowed)
+        if fallback is not None:
+            frame[col] = frame[col].mask(outside, fallback)
+        else:
+            invalid[col] |= outside
+            parts.append(cell_issues('invalid_value', outside.to_numpy()[:, None], [col],
+                                     frame[[col]].to_numpy(dtype=object), labels))
+
+    required = [c for c in spec.get('required', []) if c in frame]
+    missing = frame[required].isna() & ~invalid[required]
+    parts.append(cell_issues('missing_value', missing.to_numpy(), required, df[required].to_numpy(dtype=object),
+                             labels))
+
+    if key and all(c in frame for c in key):
+        # Placeholder rows (a year with every figure blank) would upsert NULLs over real data
+        values_cols = [c for c in spec['columns'] if c not in key and c in frame]
+        if values_cols:
+            parts.append(row_issues('empty_row', frame[values_cols].isna().all(axis=1).to_numpy(), labels))
+        # Keep the last copy of a key, as the loader's upsert would
+        duplicated = frame.duplicated(subset=key, keep='last') & frame[key].notna().all(axis=1)
+        parts.append(row_issues('duplicate_key', duplicated.to_numpy(), labels))
+
+    if spec.get('derive'):
+        frame = spec['derive'](frame)
+
+    issues = pd.concat([p for p in parts if not p.empty] or parts[:1], ignore_index=True)
+    issues['severity'] = 'error'
+    issues = issues.sort_values(['row', 'check'], kind='stable', ignore_index=True)
+    report = ValidationReport(name, len(df), issues, NO_GAPS, 0.0)
+
+    bad = np.zeros(len(df), dtype=bool)
+    bad[report.bad_rows] = True
+    clean = frame[~bad]
+    if spec.get('defaults'):
+        clean = clean.fillna(spec['defaults'])
+    if int_cols:
+        clean = clean.assign(**{c: clean[c].astype('float64').round().astype('Int64') for c in int_cols})
+    clean = clean.assign(**spec.get('constants', {})).reset_index(drop=True)
+    quarantined = df[bad].copy()
+    if len(quarantined):
+        quarantined['issues'] = issue_labels(report.errors, np.flatnonzero(bad))
+    report.elapsed = time.perf_counter() - start
+    return clean, quarantined, report
+
+
+def prepare_template(path, name):
+    """Read, type and validate one file of a declarative format"""
+    spec = FORMATS[name]
+    raw, preamble = read_template(path, spec)
+    df = map_columns(raw, spec)
+    text = '\n'.join(preamble)
+    for col, pattern in spec.get('meta', {}).items():
+        match = re.search(pattern, text, re.I)
+        df[col] = match.group(1).strip() if match else None
+    for col, pattern in spec.get('skip', {}).items():
+        df = df[~df[col].fillna('').str.strip().str.match(pattern, case=False)]
+    if spec.get('distinct'):
+        df = df.drop_duplicates(subset=row_key(spec), keep='first')
+    if spec.get('reshape'):
+        df = spec['reshape'](df)
+    return validate_frame(df.reset_index(drop=True), spec, report_name(path, name))
+
+
+def prepare(name, path):
+    """(clean, quarantined, report) for one file read as one format"""
+    return FORMATS[name].get('prepare', prepare_template)(path, name)
+
+
+def match_formats(path):
+    """Formats for a file, by the longest template stem its name starts with"""
+    base = os.path.basename(path).lower()
+    stems = {template_stem(spec) for spec in FORMATS.values()}
+    matches = [stem for stem in stems if base.startswith(stem)]
+    if not matches:
+        return []
+    stem = max(matches, key=len)
+    return [name for name, spec in FORMATS.items() if template_stem(spec) == stem]
+
+
+def collect_jobs(paths, format_name=None, only=None):
+    """[(format, path)] in FORMATS (load) order, plus the files no format matched"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith('.csv')))
+        else:
+            files.append(path)
+
+    order = {name: i for i, name in enumerate(FORMATS)}
+    jobs, unmatched = [], []
+    for path in files:
+        names = [format_name] if format_name else match_formats(path)
+        if not names:
+            unmatched.append(path)
+        jobs.extend((name, path) for name in names if not only or name in only)
+    return sorted(jobs, key=lambda job: (order[job[0]], job[1])), unmatched
+
+
+def prepare_all(jobs, workers=None):
+    """Parse every job, in parallel processes unless workers is 1; returns (results, failures)"""
+    results, failures = {}, {}
+    if workers == 1:
+        for job in jobs:
+            try:
+                results[job] = prepare(*job)
+            except Exception as e:
+                failures[job] = str(e)
+        return results, failures
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {job: pool.submit(prepare, *job) for job in jobs}
+        for job, future in futures.items():
+            try:
+                results[job] = future.result()
+            except Exception as e:
+                failures[job] = str(e)
+    return results, failures
+
+
+def resolve_lookups(conn, spec, frame):
+    """Swap lookup source columns for ids from their reference tables; unmatched rows are skipped"""
+    for out, (table, id_col, match_col, source) in spec.get('lookups', {}).items():
+        codes = frame[source].astype('str')
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {match_col}::text, {id_col} FROM {table} WHERE {match_col}::text = ANY(%s)",
+                        (codes.dropna().unique().tolist(),))
+            ids = dict(cur.fetchall())
+        frame = frame.assign(**{out: codes.map(ids)}).drop(columns=[source])
+        unknown = frame[out].isna()
+        if unknown.any():
+            print(f"⚠️  Skipping {int(unknown.sum())} rows with no matching {table}.{match_col}")
+            frame = frame[~unknown]
+    return frame
+
+
+def load_format(conn, name, frame, file_name):
+    """Upsert (or replace) a clean frame into its format's table; returns rows written"""
+    spec = FORMATS[name]
+    frame = resolve_lookups(conn, spec, frame)
+    if spec.get('replace'):
+        rows = replace_frame(conn, spec['table'], frame, spec['replace'])
+    else:
+        rows = load_frame(conn, spec['table'], frame)
+    record_upload(conn, spec['table'], file_name, frame)
+    return rows
+
+
+def template_date(value, formats):
+    """(datetime, matching format, position in days or months for month-only formats), or None"""
+    for fmt in formats:
+        try:
+            date = datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+        return date, fmt, date.toordinal() if '%d' in fmt else date.year * 12 + date.month - 1
+    return None
+
+
+def shift_date(value, formats, steps):
+    """A template date moved `steps` days (or months) back, in its own format
+
+    Unparseable cells (the IIP weight row) come back unchanged; None once the
+    date would pass MIN_SYNTHETIC_YEAR
+    """
+    parsed = template_date(value, formats)
+    if parsed is None:
+        return value
+    date, fmt, position = parsed
+    if '%d' in fmt:
+        date -= timedelta(days=steps)
+    else:
+        position -= steps
+        date = date.replace(year=position // 12, month=position % 12 + 1)
+    return date.strftime(fmt) if date.year >= MIN_SYNTHETIC_YEAR else None
+
+
+def synthetic_file(path, template_path, spec, rows):
+    """Copy of a template with its data rows repeated to the requested size; returns rows written
+
+    Each repeat gets fresh upsert keys, so the copies are parsed rather than
+    quarantined as duplicate keys: a text key column gets a ' <repeat>' suffix,
+    otherwise the key dates move back past the template's range. Date-only keys
+    run out at MIN_SYNTHETIC_YEAR, which can leave the file short
+    """
+    with open(template_path, encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+    header = header_row(lines, spec)
+    aliases = alias_map(spec)
+    columns = [aliases.get(normalize(c)) for c in next(csv.reader([lines[header]]))]
+    body = list(csv.reader(line for line in lines[header + 1:] if line.strip()))
+
+    key, dates = row_key(spec), date_columns(spec)
+    typed = set(spec.get('int_cols', [])) | set(spec.get('float_cols', [])) | set(dates) | set(spec.get('choices', {}))
+    text_keys = [i for i, c in enumerate(columns) if c in key and c not in typed][:1]
+    date_keys = [] if text_keys else [i for i, c in enumerate(columns) if c in key and c in dates]
+    formats = spec.get('date_formats', DATE_FORMATS)
+    # Each repeat moves by the template's whole date range, so repeats never overlap
+    positions = [parsed[2] for cells in body for i in date_keys if i < len(cells)
+                 for parsed in [template_date(cells[i], formats)] if parsed]
+    span = max(positions) - min(positions) + 1 if positions else 1
+
+    def copy(repeat):
+        for cells in body:
+            cells = list(cells)
+            for i in text_keys:
+                if i < len(cells) and cells[i].strip():
+                    cells[i] = f"{cells[i]} {repeat}"
+            for i in date_keys:
+                if i < len(cells):
+                    cells[i] = shift_date(cells[i], formats, repeat * span)
+            yield cells
+
+    out = list(body)
+    repeat = 1
+    while body and len(out) < rows:
+        cells = list(copy(repeat))
+        if any(None in row for row in cells):
+            break
+        out.extend(cells)
+        repeat += 1
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\n'.join(lines[:header + 1]) + '\n')
+        csv.writer(f, lineterminator='\n').writerows(out[:rows])
+    return min(len(out), rows)
+
+
+def benchmark(rows=100_000, templates_dir=TEMPLATES_DIR):
+    """Time the declarative path on every template, repeated to the given row count"""
+    total_rows, total_time = 0, 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, spec in FORMATS.items():
+            template_path = os.path.join(templates_dir, spec['template'])
+            if 'prepare' in spec or not os.path.exists(template_path):
+                continue
+            path = os.path.join(tmp, spec['template'])
+            written = synthetic_file(path, template_path, spec, rows)
+            start = time.perf_counter()
+            clean, quarantined, _ = prepare_template(path, name)
+            elapsed = time.perf_counter() - start
+            total_rows += written
+            total_time += elapsed
+            print(f"{name}: {written:,} rows in {elapsed:.3f}s ({written / elapsed:,.0f} rows/s), "
+                  f"{len(clean):,} clean, {len(quarantined):,} quarantined")
+    print(f"all formats: {total_rows:,} rows in {total_time:.2f}s ({total_rows / total_time:,.0f} rows/s)")
+
+
+def list_formats():
+    for name, spec in FORMATS.items():
+        target = spec['table'] or '(parse only)'
+        how = f"replace by {', '.join(spec['replace'])}" if spec.get('replace') else \
+            f"key {', '.join(TABLE_KEYS.get(spec['table'], ()))}" if spec['table'] else ''
+        print(f"{name:<24} {spec['template']:<40} -> {target} {how}".rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch-ingest public/templates CSV files through their declared formats')
+    parser.add_argument('paths', nargs='*', help='Template CSVs or directories of them (default: public/templates)')
+    parser.add_argument('--format', dest='format_name', help='Read every given file as this format')
+    parser.add_argument('--only', nargs='+', metavar='FORMAT', help='Ingest just these formats')
+    parser.add_argument('--dry-run', action='store_true', help='Parse and validate only: nothing is loaded, quarantined or recorded')
+    parser.add_argument('--dsn', help='Postgres DSN (default: $DATABASE_URL)')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--output-dir', help='Write each clean frame to <report name>.csv here')
+    parser.add_argument('--quarantine-dir', default=DEFAULT_QUARANTINE_DIR)
+    parser.add_argument('--limit', type=int, default=10, help='Issues listed per file')
+    parser.add_argument('--list', action='store_true', help='List the declared formats and exit')
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', help='Time every declarative format on ROWS rows')
+    args = parser.parse_args()
+
+    if args.list:
+        list_formats()
+        return
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    unknown = [n for n in [args.format_name, *(args.only or [])] if n and n not in FORMATS]
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(unknown)} (see --list)")
+
+    jobs, unmatched = collect_jobs(args.paths or [TEMPLATES_DIR], args.format_name, args.only)
+    for path in unmatched:
+        print(f"⚠️  {os.path.basename(path)}: no format matches its name (use --format)")
+    if not jobs:
+        parser.error('no files to ingest')
+
+    start = time.perf_counter()
+    results, failures = prepare_all(jobs, args.workers)
+    conn = None if args.dry_run else connect(args.dsn)
+    totals = {'rows': 0, 'quarantined': 0, 'loaded': 0}
+    try:
+        for name, path in jobs:
+            if (name, path) in failures:
+                print(f"❌ {name} <- {os.path.basename(path)}: {failures[(name, path)]}")
+                continue
+            clean, quarantined, report = results[(name, path)]
+            print_report(report, args.limit)
+            saved = None if args.dry_run else write_quarantine(quarantined, report, args.quarantine_dir)
+            if saved and len(quarantined):
+                print(f"   {len(quarantined)} quarantined rows saved to {saved}")
+            totals['rows'] += len(clean)
+            totals['quarantined'] += len(quarantined)
+            if args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+                clean.to_csv(os.path.join(args.output_dir, f"{report.name}.csv"), index=False)
+
+            table = FORMATS[name]['table']
+            if table is None:
+                print(f"   {len(clean):,} rows parsed ({name} has no table)")
+            elif conn is not None:
+                rows = load_format(conn, name, clean, os.path.basename(path))
+                totals['loaded'] += rows
+                print(f"✅ {name} <- {os.path.basename(path)}: wrote {rows:,} rows to {table}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+    print(f"\n{len(jobs) - len(failures)}/{len(jobs)} files in {time.perf_counter() - start:.2f}s: "
+          f"{totals['rows']:,} clean rows, {totals['quarantined']:,} quarantined"
+          + ("" if args.dry_run else f", {totals['loaded']:,} written"))
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
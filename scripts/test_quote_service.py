@@ -0,0 +1,154 @@
+"""
+Quote Service Tests
+Run from scripts/: python -m pytest -q test_quote_service.py
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from quote_service import MAX_REQUEST_SYMBOLS, QuoteService, create_app, create_mock_upstream, start_site
+
+
+def slow_service(calls, delay=0.2):
+    """QuoteService whose upstream answers every symbol after `delay` seconds"""
+    service = QuoteService(window=0.01)
+
+    async def fetch(symbols):
+        calls.append(symbols)
+        await asyncio.sleep(delay)
+        return {s: {'symbol': s, 'regularMarketPrice': 100.0} for s in symbols}
+
+    service.batcher.fetch = fetch
+    return service
+
+
+def test_cancelled_viewer_does_not_cancel_shared_symbols():
+    calls = []
+
+    async def run():
+        service = slow_service(calls)
+        impatient = asyncio.create_task(asyncio.wait_for(service.get_quotes(['^NSEI', 'INR=X']), 0.05))
+        patient = asyncio.create_task(service.get_quotes(['^NSEI', 'INR=X', '^BSESN']))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return await patient
+
+    quotes = asyncio.run(run())
+    assert [q['symbol'] for q in quotes] == ['^NSEI', 'INR=X', '^BSESN']
+    assert calls == [['INR=X', '^BSESN', '^NSEI']]
+
+
+def test_batch_resolves_after_a_viewer_is_cancelled():
+    calls = []
+
+    async def run():
+        service = slow_service(calls)
+        first = asyncio.create_task(service.get_quotes(['^NSEI']))
+        second = asyncio.create_task(service.get_quotes(['^NSEI', 'INR=X']))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        return await second
+
+    quotes = asyncio.run(run())
+    assert [q['symbol'] for q in quotes] == ['^NSEI', 'INR=X']
+    assert calls == [['INR=X', '^NSEI']]
+
+
+async def with_mock_upstream(test, **options):
+    """Run test(service, calls) against a QuoteService backed by the local mock upstream"""
+    mock, calls = create_mock_upstream(latency=0.01)
+    runner, url = await start_site(mock)
+    service = QuoteService(f"{url}/v7/finance/quote", window=0.01, rate=1000, burst=1000, **options)
+    await service.start()
+    try:
+        return await test(service, calls)
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+
+def test_symbols_are_url_encoded():
+    async def test(service, calls):
+        return await service.get_quotes(['M&M.NS', 'RELIANCE.NS']), calls
+
+    quotes, calls = asyncio.run(with_mock_upstream(test))
+    assert [q['symbol'] for q in quotes] == ['M&M.NS', 'RELIANCE.NS']
+    assert calls == [['M&M.NS', 'RELIANCE.NS']]
+
+
+def test_fresh_quotes_are_served_from_cache():
+    async def test(service, calls):
+        first = await service.get_quotes(['^NSEI', 'INR=X'])
+        second = await service.get_quotes(['INR=X', '^NSEI'])
+        return first, second, calls, service.snapshot()
+
+    first, second, calls, metrics = asyncio.run(with_mock_upstream(test))
+    assert {q['symbol']: q for q in first} == {q['symbol']: q for q in second}
+    assert calls == [['INR=X', '^NSEI']]
+    assert (metrics['hits'], metrics['misses']) == (2, 2)
+
+
+def test_stale_quote_is_served_then_revalidated():
+    async def test(service, calls):
+        first = await service.get_quotes(['^NSEI'])
+        await asyncio.sleep(0.25)
+        stale = await service.get_quotes(['^NSEI'])
+        served_at = len(calls)
+        await asyncio.sleep(0.05)
+        fresh = await service.get_quotes(['^NSEI'])
+        return first, stale, fresh, served_at, calls, service.snapshot()
+
+    first, stale, fresh, served_at, calls, metrics = asyncio.run(with_mock_upstream(test, ttl=0.2, stale_ttl=10))
+    assert stale == first
+    assert served_at == 1
+    assert calls == [['^NSEI'], ['^NSEI']]
+    assert fresh != first
+    assert (metrics['stale_hits'], metrics['hits']) == (1, 1)
+
+
+def test_unknown_symbols_are_cached():
+    async def test(service, calls):
+        first = await service.get_quotes(['BADSYMBOL', '^NSEI'])
+        second = await service.get_quotes(['BADSYMBOL'])
+        return first, second, calls
+
+    first, second, calls = asyncio.run(with_mock_upstream(test))
+    assert [q['symbol'] for q in first] == ['^NSEI']
+    assert second == []
+    assert calls == [['BADSYMBOL', '^NSEI']]
+
+
+def test_expired_entries_are_evicted():
+    async def test(service, calls):
+        await service.get_quotes([f"OLD{i}.NS" for i in range(20)])
+        await asyncio.sleep(0.1)
+        await service.get_quotes(['^NSEI'])
+        return sorted(service.cache.entries)
+
+    assert asyncio.run(with_mock_upstream(test, ttl=0.02, stale_ttl=0.03)) == ['^NSEI']
+
+
+def test_request_symbol_cap():
+    async def run():
+        mock, calls = create_mock_upstream(latency=0.01)
+        mock_runner, url = await start_site(mock)
+        service = QuoteService(f"{url}/v7/finance/quote", window=0.01, rate=1000, burst=1000)
+        runner, base = await start_site(create_app(service))
+        try:
+            async with aiohttp.ClientSession() as session:
+                too_many = [f"S{i}.NS" for i in range(MAX_REQUEST_SYMBOLS + 1)]
+                async with session.post(base, json={'symbols': too_many}) as response:
+                    rejected = response.status
+                async with session.post(base, json={'symbols': too_many[:MAX_REQUEST_SYMBOLS]}) as response:
+                    accepted = response.status, len((await response.json())['quoteResponse']['result'])
+        finally:
+            await runner.cleanup()
+            await mock_runner.cleanup()
+        return rejected, accepted, calls
+
+    rejected, accepted, calls = asyncio.run(run())
+    assert rejected == 400
+    assert accepted == (200, MAX_REQUEST_SYMBOLS)
+    assert sum(map(len, calls)) == MAX_REQUEST_SYMBOLS
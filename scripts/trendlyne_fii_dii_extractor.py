@@ -9,11 +9,18 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import pandas as pd
-import time
+import argparse
 from datetime import datetime
 import json
 
+from browser_pool import DriverPool, run_batch, wait_for_page_ready, wait_for_table
+from fii_dii_transform import MONTHLY_SPEC, transform
+from fii_dii_validation import print_report, validate, write_quarantine
+from http_cache import HTTPCache
+from incremental_sync import write_delta
+from parquet_cache import write_dataset
+from table_extraction import extract_table, extract_tables
+
 def setup_driver(headless=False):
     """Setup Chrome driver"""
     chrome_options = Options()
@@ -27,46 +34,34 @@ def setup_driver(headless=False):
     driver = webdriver.Chrome(options=chrome_options)
     return driver
 
-def get_financial_year(date_str):
-    """Convert date to financial year"""
-    date = pd.to_datetime(date_str)
-    if date.month >= 4:
-        return f"FY {date.year}-{str(date.year + 1)[-2:]}"
-    else:
-        return f"FY {date.year - 1}-{str(date.year)[-2:]}"
+MONTHLY_SUMMARY_URL = 'https://trendlyne.com/macro-data/fii-dii/latest/cash-pastmonth/'
+SUMMARY_TAB_URL = 'https://trendlyne.com/macro-data/fii-dii/month/snapshot-month/'
 
 def extract_monthly_summary(driver):
     """Extract monthly summary data from Trendlyne"""
-    url = 'https://trendlyne.com/macro-data/fii-dii/latest/cash-pastmonth/'
+    url = MONTHLY_SUMMARY_URL
     print(f"Opening: {url}")
     driver.get(url)
     
-    # Wait for page to load
-    time.sleep(5)
-    
     try:
+        # Wait for page to load
+        wait_for_page_ready(driver)
+        
         # Click on "Monthly" tab
         print("Clicking Monthly tab...")
         monthly_tab = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Monthly') or contains(@href, 'monthly')]"))
         )
         monthly_tab.click()
-        time.sleep(3)
         
         # Wait for table to load
         print("Waiting for table...")
-        table = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, 'table'))
-        )
-        
-        # Extract table HTML
-        table_html = table.get_attribute('outerHTML')
+        table = wait_for_table(driver)
         
-        # Parse with pandas
-        dfs = pd.read_html(table_html)
+        # Extract the whole table in a single WebDriver call
+        df = extract_table(driver, table)
         
-        if dfs:
-            df = dfs[0]
+        if not df.empty:
             print(f"\n✅ Extracted {len(df)} rows")
             print(f"Columns: {df.columns.tolist()}")
             print("\nPreview:")
@@ -80,18 +75,13 @@ def extract_monthly_summary(driver):
         print("❌ Timeout waiting for elements")
         # Try to get any tables on the page
         try:
-            tables = driver.find_elements(By.TAG_NAME, 'table')
+            tables = extract_tables(driver)
             print(f"Found {len(tables)} tables on page")
-            if tables:
-                for idx, table in enumerate(tables):
-                    print(f"\nTable {idx + 1}:")
-                    try:
-                        df = pd.read_html(table.get_attribute('outerHTML'))[0]
-                        print(df.head())
-                        if len(df) > 5:  # Likely the data table
-                            return df
-                    except:
-                        pass
+            for idx, df in enumerate(tables):
+                print(f"\nTable {idx + 1}:")
+                print(df.head())
+                if len(df) > 5:  # Likely the data table
+                    return df
         except:
             pass
         return None
@@ -101,28 +91,25 @@ def extract_monthly_summary(driver):
 
 def extract_summary_tab(driver):
     """Extract from Summary tab"""
-    url = 'https://trendlyne.com/macro-data/fii-dii/month/snapshot-month/'
+    url = SUMMARY_TAB_URL
     print(f"\nOpening Summary page: {url}")
     driver.get(url)
-    time.sleep(5)
     
     try:
-        # Find all tables
-        tables = driver.find_elements(By.TAG_NAME, 'table')
+        wait_for_page_ready(driver)
+        
+        # Extract all tables in a single WebDriver call
+        tables = extract_tables(driver)
         print(f"Found {len(tables)} tables")
         
         all_data = []
         
-        for idx, table in enumerate(tables):
-            try:
-                df = pd.read_html(table.get_attribute('outerHTML'))[0]
-                print(f"\nTable {idx + 1}: {df.shape}")
-                print(df.head())
-                
-                if len(df) > 5:  # Significant data
-                    all_data.append(df)
-            except Exception as e:
-                print(f"Error parsing table {idx + 1}: {e}")
+        for idx, df in enumerate(tables):
+            print(f"\nTable {idx + 1}: {df.shape}")
+            print(df.head())
+            
+            if len(df) > 5:  # Significant data
+                all_data.append(df)
         
         return all_data if all_data else None
         
@@ -137,50 +124,17 @@ def transform_to_monthly_format(df):
     print("\nTransforming data...")
     print(f"Original columns: {df.columns.tolist()}")
     
-    monthly_data = []
-    
-    # Column mapping (adjust based on actual Trendlyne format)
-    column_map = {
-        'DATE': 'Date',
-        'Date': 'Date',
-        'FII Equity': 'FII_Equity',
-        'FII Debt': 'FII_Debt',
-        'FII Derivatives': 'FII_Derivatives',
-        'FII Total': 'FII_Total',
-        'DII Equity': 'DII_Equity',
-        'DII Debt': 'DII_Debt',
-        'DII Derivatives': 'DII_Derivatives',
-        'DII Total': 'DII_Total',
-    }
-    
-    # Rename columns
-    df_renamed = df.copy()
-    for old_col, new_col in column_map.items():
-        if old_col in df.columns:
-            df_renamed.rename(columns={old_col: new_col}, inplace=True)
-    
-    # Ensure we have required columns
-    required_cols = ['Date', 'FII_Equity', 'FII_Debt', 'FII_Derivatives', 'FII_Total',
-                     'DII_Equity', 'DII_Debt', 'DII_Derivatives', 'DII_Total']
-    
-    # Fill missing columns with 0
-    for col in required_cols:
-        if col not in df_renamed.columns:
-            df_renamed[col] = 0
-    
-    # Select only required columns
-    result_df = df_renamed[required_cols].copy()
-    
-    # Clean data
-    for col in result_df.columns:
-        if col != 'Date':
-            # Remove commas and convert to numeric
-            result_df[col] = pd.to_numeric(result_df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-    
-    # Format date
-    result_df['Date'] = pd.to_datetime(result_df['Date']).dt.strftime('%Y-%m-%d')
-    
-    return result_df
+    # Column mapping, number cleaning and date formatting are declared in
+    # MONTHLY_SPEC (adjust there if the Trendlyne format changes)
+    transformed = transform(df, MONTHLY_SPEC, fill_value=None)
+
+    # Unparseable cells used to become 0 here; quarantine those rows instead
+    clean, quarantined, report = validate(transformed, MONTHLY_SPEC, 'fii_dii_monthly', daily=False)
+    print_report(report)
+    path = write_quarantine(quarantined, report)
+    if path:
+        print(f"   {len(quarantined)} quarantined rows saved to {path}")
+    return clean.reset_index(drop=True)
 
 def save_to_csv(df, output_file):
     """Save DataFrame to CSV"""
@@ -192,8 +146,58 @@ def save_to_csv(df, output_file):
     print(f"\nLast few rows:")
     print(df.tail())
 
+def extract_with_fallback(driver):
+    """Extract monthly data, falling back to the Summary tab"""
+    print("\n📊 Extracting Monthly Summary Data...")
+    df_monthly = extract_monthly_summary(driver)
+    
+    if df_monthly is None:
+        # Try alternative method
+        print("\n🔄 Trying alternative extraction method...")
+        tables = extract_summary_tab(driver)
+        
+        if tables:
+            df_monthly = tables[0]  # Use first significant table
+    
+    return df_monthly
+
+def extract_batch(workers):
+    """Run both extraction methods concurrently on a pool of headless browsers"""
+    jobs = {
+        'monthly_summary': extract_monthly_summary,
+        'summary_tab': extract_summary_tab,
+    }
+    with DriverPool(lambda: setup_driver(headless=True), size=workers) as pool:
+        results = run_batch(pool, jobs)
+    
+    if results['monthly_summary'] is not None:
+        return results['monthly_summary']
+    if results['summary_tab']:
+        return results['summary_tab'][0]
+    return None
+
+def changed_source_pages(cache):
+    """Source pages whose HTML differs from the last successful extraction
+    
+    A plain HTTP request (conditional, and served from cache while fresh) is
+    far cheaper than a browser session, so an unchanged site costs no browser
+    """
+    user_agent = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    pages = [cache.get(url, headers=user_agent) for url in (MONTHLY_SUMMARY_URL, SUMMARY_TAB_URL)]
+    return pages if any(page.changed for page in pages) else []
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description='Extract FII/DII data from Trendlyne')
+    parser.add_argument('--batch', action='store_true',
+                        help='Non-interactive: no prompt, headless browser pool')
+    parser.add_argument('--workers', type=int, default=2, help='Browsers in the pool (batch mode)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Write only new/changed rows since the last run to a delta CSV')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help="Don't start a browser if the Trendlyne pages haven't changed since the last run")
+    args = parser.parse_args()
+    
     print("="*70)
     print("TRENDLYNE FII/DII DATA EXTRACTOR")
     print("="*70)
@@ -203,43 +207,63 @@ def main():
     print("2. Install ChromeDriver: https://chromedriver.chromium.org/")
     print("3. Add ChromeDriver to PATH")
     
-    input("\nPress Enter to start extraction...")
+    cache = None
+    pages = []
+    if args.skip_unchanged:
+        cache = HTTPCache()
+        try:
+            pages = changed_source_pages(cache)
+        except Exception as e:
+            print(f"\n⚠️  Could not check for changes ({e}); extracting anyway")
+            pages = None
+        if pages == []:
+            print("\n✅ Trendlyne pages unchanged since the last extraction - nothing to do")
+            print(cache.summary())
+            return
+    
+    if not args.batch:
+        input("\nPress Enter to start extraction...")
     
     driver = None
     
     try:
-        # Setup driver
-        print("\n🚀 Starting browser...")
-        driver = setup_driver(headless=False)  # Set True for headless mode
-        
-        # Extract monthly summary
-        print("\n📊 Extracting Monthly Summary Data...")
-        df_monthly = extract_monthly_summary(driver)
-        
-        if df_monthly is None:
-            # Try alternative method
-            print("\n🔄 Trying alternative extraction method...")
-            tables = extract_summary_tab(driver)
-            
-            if tables:
-                df_monthly = tables[0]  # Use first significant table
+        if args.batch:
+            print(f"\n🚀 Starting {args.workers} headless browsers...")
+            df_monthly = extract_batch(args.workers)
+        else:
+            # Setup driver
+            print("\n🚀 Starting browser...")
+            driver = setup_driver(headless=False)
+            df_monthly = extract_with_fallback(driver)
         
         if df_monthly is not None:
             # Transform to our format
             print("\n🔄 Transforming data...")
             transformed_df = transform_to_monthly_format(df_monthly)
+            write_dataset(transformed_df, 'fii_dii_monthly', date_col='Date')
+            
+            if args.incremental:
+                # Only rows that are new or changed since the last run
+                output_file = write_delta(transformed_df, 'fii_dii_monthly', '../public/templates/deltas')
+            else:
+                # Save to CSV
+                output_file = '../public/templates/fii_dii_monthly_extracted.csv'
+                save_to_csv(transformed_df, output_file)
             
-            # Save to CSV
-            output_file = '../public/templates/fii_dii_monthly_extracted.csv'
-            save_to_csv(transformed_df, output_file)
+            # Identical pages are skipped from now on
+            for page in pages or []:
+                cache.mark_processed(page)
             
-            print("\n" + "="*70)
-            print("✅ EXTRACTION COMPLETE!")
-            print("="*70)
-            print(f"\nNext steps:")
-            print(f"1. Review the extracted data: {output_file}")
-            print(f"2. Upload via Admin Panel: /admin → Financial Markets → FII/DII")
-            print(f"3. Select 'Monthly Data' tab and upload the CSV")
+            if output_file is None:
+                print("\n✅ Already up to date - nothing new to upload")
+            else:
+                print("\n" + "="*70)
+                print("✅ EXTRACTION COMPLETE!")
+                print("="*70)
+                print(f"\nNext steps:")
+                print(f"1. Review the extracted data: {output_file}")
+                print(f"2. Upload via Admin Panel: /admin → Financial Markets → FII/DII")
+                print(f"3. Select 'Monthly Data' tab and upload the CSV")
             
         else:
             print("\n❌ Failed to extract data")
@@ -263,6 +287,8 @@ def main():
         if driver:
             print("\n🔒 Closing browser...")
             driver.quit()
+        if cache is not None:
+            cache.close()
     
     print("\n" + "="*70)
 
@@ -27,6 +27,11 @@ const SYMBOLS = [
   'INR=X',      // USD/INR (correct Yahoo Finance symbol)
 ];
 
+// scripts/quote_service.py serves the same contract with batching and caching
+const QUOTE_URL =
+  import.meta.env.VITE_QUOTE_SERVICE_URL ||
+  'https://fhcddkfgqhwwfvqymqow.supabase.co/functions/v1/fetch-yahoo-finance';
+
 export function useWebSocketMarketData() {
   const [quotes, setQuotes] = useState<Map<string, MarketQuote>>(new Map());
   const [isConnected, setIsConnected] = useState(false);
@@ -56,7 +61,7 @@ export function useWebSocketMarketData() {
     try {
       const anonKey = import.meta.env.VITE_SUPABASE_PUBLISHABLE_KEY;
       const response = await fetch(
-        'https://fhcddkfgqhwwfvqymqow.supabase.co/functions/v1/fetch-yahoo-finance',
+        QUOTE_URL,
         {
           method: 'POST',
           headers: {
@@ -0,0 +1,101 @@
+-- =====================================================
+-- AMC Portfolio Holdings Migration
+-- Created: 2026-10-17
+-- Description: Holdings, sector / asset allocation and scraping-log tables
+-- from AMC_SCRAPER_IMPLEMENTATION.md, with the unique keys and per-run timing
+-- columns scripts/amc_holdings.py needs. Safe to run where they already exist
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS amc_portfolio_holdings (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  scheme_id INT NOT NULL REFERENCES mutual_fund_schemes_new(id) ON DELETE CASCADE,
+  as_of_date DATE NOT NULL,
+  stock_name TEXT NOT NULL,
+  isin TEXT,
+  sector TEXT,
+  industry TEXT,
+  holding_percent NUMERIC(8, 4),
+  quantity NUMERIC(20, 2),
+  market_value NUMERIC(20, 2),
+  avg_cost NUMERIC(20, 4),
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS portfolio_sector_allocation (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  scheme_id INT NOT NULL REFERENCES mutual_fund_schemes_new(id) ON DELETE CASCADE,
+  as_of_date DATE NOT NULL,
+  sector TEXT NOT NULL,
+  allocation_percent NUMERIC(8, 4),
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS portfolio_asset_allocation (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  scheme_id INT NOT NULL REFERENCES mutual_fund_schemes_new(id) ON DELETE CASCADE,
+  as_of_date DATE NOT NULL,
+  asset_type TEXT NOT NULL,
+  allocation_percent NUMERIC(8, 4),
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS amc_scraping_logs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  amc_code TEXT NOT NULL,
+  data_type TEXT NOT NULL,
+  status TEXT NOT NULL,
+  records_processed INTEGER DEFAULT 0,
+  error_message TEXT,
+  started_at TIMESTAMPTZ DEFAULT NOW(),
+  completed_at TIMESTAMPTZ
+);
+
+-- Upsert keys (AdityaBirlaScraper upserts holdings on scheme_id, as_of_date, stock_name)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_amc_holdings_key
+  ON amc_portfolio_holdings(scheme_id, as_of_date, stock_name);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sector_allocation_key
+  ON portfolio_sector_allocation(scheme_id, as_of_date, sector);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_asset_allocation_key
+  ON portfolio_asset_allocation(scheme_id, as_of_date, asset_type);
+CREATE INDEX IF NOT EXISTS idx_amc_scraping_logs_started ON amc_scraping_logs(amc_code, started_at DESC);
+
+-- Per-run timing and scheme counts
+ALTER TABLE amc_scraping_logs ADD COLUMN IF NOT EXISTS duration_seconds NUMERIC(10, 3);
+ALTER TABLE amc_scraping_logs ADD COLUMN IF NOT EXISTS schemes_total INTEGER;
+ALTER TABLE amc_scraping_logs ADD COLUMN IF NOT EXISTS schemes_changed INTEGER;
+ALTER TABLE amc_scraping_logs ADD COLUMN IF NOT EXISTS schemes_skipped INTEGER;
+ALTER TABLE amc_scraping_logs ADD COLUMN IF NOT EXISTS schemes_failed INTEGER;
+ALTER TABLE amc_scraping_logs ADD COLUMN IF NOT EXISTS stage_timings JSONB;
+
+-- Row level security: public read of the portfolios, writes for authenticated users only.
+-- scripts/amc_holdings.py connects with the database role, which RLS does not restrict
+ALTER TABLE amc_portfolio_holdings ENABLE ROW LEVEL SECURITY;
+ALTER TABLE portfolio_sector_allocation ENABLE ROW LEVEL SECURITY;
+ALTER TABLE portfolio_asset_allocation ENABLE ROW LEVEL SECURITY;
+ALTER TABLE amc_scraping_logs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to amc_portfolio_holdings" ON amc_portfolio_holdings;
+CREATE POLICY "Allow public read access to amc_portfolio_holdings" ON amc_portfolio_holdings FOR SELECT USING (true);
+DROP POLICY IF EXISTS "Allow public read access to portfolio_sector_allocation" ON portfolio_sector_allocation;
+CREATE POLICY "Allow public read access to portfolio_sector_allocation" ON portfolio_sector_allocation FOR SELECT USING (true);
+DROP POLICY IF EXISTS "Allow public read access to portfolio_asset_allocation" ON portfolio_asset_allocation;
+CREATE POLICY "Allow public read access to portfolio_asset_allocation" ON portfolio_asset_allocation FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Allow authenticated users to manage amc_portfolio_holdings" ON amc_portfolio_holdings;
+CREATE POLICY "Allow authenticated users to manage amc_portfolio_holdings" ON amc_portfolio_holdings FOR ALL USING (auth.role() = 'authenticated');
+DROP POLICY IF EXISTS "Allow authenticated users to manage portfolio_sector_allocation" ON portfolio_sector_allocation;
+CREATE POLICY "Allow authenticated users to manage portfolio_sector_allocation" ON portfolio_sector_allocation FOR ALL USING (auth.role() = 'authenticated');
+DROP POLICY IF EXISTS "Allow authenticated users to manage portfolio_asset_allocation" ON portfolio_asset_allocation;
+CREATE POLICY "Allow authenticated users to manage portfolio_asset_allocation" ON portfolio_asset_allocation FOR ALL USING (auth.role() = 'authenticated');
+DROP POLICY IF EXISTS "Allow authenticated users to manage amc_scraping_logs" ON amc_scraping_logs;
+CREATE POLICY "Allow authenticated users to manage amc_scraping_logs" ON amc_scraping_logs FOR ALL USING (auth.role() = 'authenticated');
+
+-- =====================================================
+-- Comments for documentation
+-- =====================================================
+COMMENT ON COLUMN amc_scraping_logs.duration_seconds IS 'Wall time of the run, started_at to completed_at';
+COMMENT ON COLUMN amc_scraping_logs.schemes_skipped IS 'Schemes whose holdings file or parsed holdings matched the last run';
+COMMENT ON COLUMN amc_scraping_logs.stage_timings IS 'Seconds spent per stage (fetch, parse, load) summed across schemes';
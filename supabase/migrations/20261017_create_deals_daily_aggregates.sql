@@ -0,0 +1,55 @@
+-- =====================================================
+-- Deals Daily Aggregates Migration
+-- Created: 2026-10-17
+-- Description: Per-day bulk / block deal aggregates (market, sector, stock,
+-- investor), maintained by scripts/deals_analytics.py. Values, deal counts
+-- and price sums are additive (a date range is a SUM over its days);
+-- counterparties and the top_* lists are per day only
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS deals_daily_aggregates (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  date DATE NOT NULL,
+  deal_source TEXT NOT NULL CHECK (deal_source IN ('bulk', 'block')),
+  dimension TEXT NOT NULL CHECK (dimension IN ('market', 'sector', 'stock', 'investor')),
+  key TEXT NOT NULL,
+  label TEXT,
+  sector TEXT,
+  investor_type TEXT CHECK (investor_type IN ('FII', 'DII', 'HNI', 'Others')),
+  buy_value NUMERIC(20, 2) NOT NULL DEFAULT 0,
+  sell_value NUMERIC(20, 2) NOT NULL DEFAULT 0,
+  net_flow NUMERIC(20, 2) NOT NULL DEFAULT 0,
+  deal_count INTEGER NOT NULL DEFAULT 0,
+  buy_deals INTEGER NOT NULL DEFAULT 0,
+  sell_deals INTEGER NOT NULL DEFAULT 0,
+  buy_price_sum NUMERIC(20, 4) NOT NULL DEFAULT 0,
+  sell_price_sum NUMERIC(20, 4) NOT NULL DEFAULT 0,
+  counterparties INTEGER NOT NULL DEFAULT 0,
+  top_buyers JSONB,
+  top_sellers JSONB,
+  top_sectors JSONB,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  UNIQUE(date, deal_source, dimension, key)
+);
+
+CREATE INDEX idx_deals_daily_lookup ON deals_daily_aggregates(dimension, date DESC);
+CREATE INDEX idx_deals_daily_key ON deals_daily_aggregates(dimension, key, date DESC);
+
+ALTER TABLE deals_daily_aggregates ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read" ON deals_daily_aggregates FOR SELECT USING (true);
+CREATE POLICY "Allow authenticated insert" ON deals_daily_aggregates FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow authenticated update" ON deals_daily_aggregates FOR UPDATE USING (true);
+CREATE POLICY "Allow authenticated delete" ON deals_daily_aggregates FOR DELETE USING (true);
+
+-- =====================================================
+-- Comments for documentation
+-- =====================================================
+COMMENT ON TABLE deals_daily_aggregates IS 'Per-day bulk/block deal aggregates by market, sector, stock and investor, as computed by useDealsAnalysis';
+COMMENT ON COLUMN deals_daily_aggregates.key IS 'ALL for market rows, otherwise the sector, symbol or client name';
+COMMENT ON COLUMN deals_daily_aggregates.counterparties IS 'Distinct clients (stock rows) or distinct symbols (market, sector and investor rows) that day. Per day only: summing over a range double-counts a client or symbol seen on several days, so range counts need the raw deals';
+COMMENT ON COLUMN deals_daily_aggregates.top_buyers IS 'Top 5 buyers by buy value that day (stock rows). Per day only: not mergeable across days';
+COMMENT ON COLUMN deals_daily_aggregates.top_sellers IS 'Top 5 sellers by sell value that day (stock rows). Per day only: not mergeable across days';
+COMMENT ON COLUMN deals_daily_aggregates.top_sectors IS 'Top 3 sectors by traded value that day (investor rows). Per day only: not mergeable across days';
+COMMENT ON COLUMN deals_daily_aggregates.buy_price_sum IS 'Sum of buy deal prices; divide by buy_deals for the average buy price';
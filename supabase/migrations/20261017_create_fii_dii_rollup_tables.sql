@@ -0,0 +1,77 @@
+-- =====================================================
+-- FII/DII Rollup Tables Migration
+-- Created: 2026-10-17
+-- Description: Precomputed daily flows and month / quarter / FY rollups for
+-- the 7 FII/DII tables, maintained by scripts/fii_dii_rollups.py
+-- =====================================================
+
+-- =====================================================
+-- Table 1: Daily flows per table and leg
+-- =====================================================
+CREATE TABLE IF NOT EXISTS fii_dii_daily_flows (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  source_table TEXT NOT NULL,
+  leg TEXT NOT NULL,
+  date DATE NOT NULL,
+  financial_year TEXT NOT NULL,
+  gross_purchase NUMERIC(15, 2) NOT NULL DEFAULT 0,
+  gross_sales NUMERIC(15, 2) NOT NULL DEFAULT 0,
+  net NUMERIC(15, 2) NOT NULL DEFAULT 0,
+  cumulative_net_fy NUMERIC(17, 2) NOT NULL DEFAULT 0,
+  net_avg_5d NUMERIC(15, 2),
+  net_avg_20d NUMERIC(15, 2),
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  UNIQUE(source_table, leg, date)
+);
+
+CREATE INDEX idx_daily_flows_source_date ON fii_dii_daily_flows(source_table, date DESC);
+CREATE INDEX idx_daily_flows_fy ON fii_dii_daily_flows(source_table, financial_year);
+
+ALTER TABLE fii_dii_daily_flows ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read" ON fii_dii_daily_flows FOR SELECT USING (true);
+CREATE POLICY "Allow authenticated insert" ON fii_dii_daily_flows FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow authenticated update" ON fii_dii_daily_flows FOR UPDATE USING (true);
+CREATE POLICY "Allow authenticated delete" ON fii_dii_daily_flows FOR DELETE USING (true);
+
+-- =====================================================
+-- Table 2: Month / quarter / financial year rollups
+-- =====================================================
+CREATE TABLE IF NOT EXISTS fii_dii_period_rollups (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  source_table TEXT NOT NULL,
+  leg TEXT NOT NULL,
+  period_type TEXT NOT NULL CHECK (period_type IN ('month', 'quarter', 'financial_year')),
+  period TEXT NOT NULL,
+  financial_year TEXT NOT NULL,
+  period_start DATE NOT NULL,
+  period_end DATE NOT NULL,
+  trading_days INTEGER NOT NULL DEFAULT 0,
+  gross_purchase NUMERIC(17, 2) NOT NULL DEFAULT 0,
+  gross_sales NUMERIC(17, 2) NOT NULL DEFAULT 0,
+  net NUMERIC(17, 2) NOT NULL DEFAULT 0,
+  avg_daily_net NUMERIC(15, 2),
+  cumulative_net_fy NUMERIC(17, 2) NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  UNIQUE(source_table, leg, period_type, period)
+);
+
+CREATE INDEX idx_period_rollups_lookup ON fii_dii_period_rollups(source_table, period_type, period_start DESC);
+CREATE INDEX idx_period_rollups_fy ON fii_dii_period_rollups(financial_year);
+
+ALTER TABLE fii_dii_period_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read" ON fii_dii_period_rollups FOR SELECT USING (true);
+CREATE POLICY "Allow authenticated insert" ON fii_dii_period_rollups FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow authenticated update" ON fii_dii_period_rollups FOR UPDATE USING (true);
+CREATE POLICY "Allow authenticated delete" ON fii_dii_period_rollups FOR DELETE USING (true);
+
+-- =====================================================
+-- Comments for documentation
+-- =====================================================
+COMMENT ON TABLE fii_dii_daily_flows IS 'Daily FII/DII flows per source table and leg with FY-to-date cumulative net and 5/20-day rolling averages';
+COMMENT ON TABLE fii_dii_period_rollups IS 'Monthly, quarterly and financial-year FII/DII sums per source table and leg';
+COMMENT ON COLUMN fii_dii_daily_flows.leg IS 'Flow leg of the source table, e.g. fii, equity, futures_indices';
+COMMENT ON COLUMN fii_dii_period_rollups.period IS 'month_name, quarter or financial_year label, as in the source tables';